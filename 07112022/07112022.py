@@ -1,35 +1,23 @@
 # %%
 import matplotlib.pyplot as plt
-import matplotlib.font_manager as fm
 import matplotlib.ticker as ticker
-import matplotlib.gridspec as gridspec
 import matplotlib.patheffects as path_effects
-from matplotlib import rcParams
 from highlight_text import ax_text, fig_text
 import pandas as pd
 
-from PIL import Image
-import urllib
-import os
+import sys
 
-# --- Use this only if you have already downloaded fonts into your
-# --- local directory.
+sys.path.append("..")
+from socviz import fonts
+from socviz.export import save_variants
+from socviz.groups import GroupedFrame, as_grouped
+from socviz.logos import LogoStore
+from socviz.matches import add_outcomes, cumulative, long_format
+from socviz.multiples import SmallMultiples
 
-# Add pretty fonts
+# Add pretty fonts (registered from assets/fonts and cached after the first run)
 
-font_path = r"" #Set the path to where the fonts are located
-
-for x in os.listdir(font_path):
-    for y in os.listdir(f"{font_path}/{x}"):
-        if y.split(".")[-1] == "ttf":
-            fm.fontManager.addfont(f"{font_path}/{x}/{y}")
-            try:
-                fm.FontProperties(weight=y.split("-")[-1].split(".")[0].lower(), fname=y)
-            except Exception as e:
-                print(f"Font {y} could not be added.")
-                continue
-
-rcParams['font.family'] = 'Karla'
+fonts.setup(style = False, family = "Karla")
 
 
 # --- Reading the data
@@ -37,56 +25,35 @@ rcParams['font.family'] = 'Karla'
 df = pd.read_csv("data/538_probs_07112022.csv", encoding = "utf-8")
 df["date"] = pd.to_datetime(df["date"])
 
-# -- Compute the Brier Score for each match
-
-df["home_win"] = [
-    1 if x > y else 0 for x,y in zip(df["score_home"], df["score_away"])
-]
-
-df["tie"] = [
-    1 if x == y else 0 for x,y in zip(df["score_home"], df["score_away"])
-]
-
-df["away_win"] = [
-    1 if x < y else 0 for x,y in zip(df["score_home"], df["score_away"])
-]
+# -- One row per team and match, with the Brier Score of each match
+
+team_matches = long_format(
+    df,
+    columns = {
+        "team_id": ("home_team_id", "away_team_id"),
+        "team_name": ("home_team_name", "away_team_name"),
+        "goals": ("score_home", "score_away"),
+        "prob_win": ("prob_home", "prob_away")
+    },
+    against = {"goals_against": "goals", "prob_loss": "prob_win"},
+    shared = ["match_id", "date", "prob_tie"]
+)
 
-df = df.assign(
-    brier_score = lambda x: 
-    1/3*(
-        (x.prob_home - x.home_win)**2 + 
-        (x.prob_tie - x.tie)**2 +
-        (x.prob_away - x.away_win)**2
-    )
+team_matches = add_outcomes(
+    team_matches,
+    prob_win = "prob_win",
+    prob_tie = "prob_tie",
+    prob_loss = "prob_loss"
 )
 
 # %%
 # -- Compute cumulative average of Brier Score
 
-teams = df[["home_team_id"]].drop_duplicates()
-
-plot_df = pd.DataFrame()
-
-for team in teams["home_team_id"]:
-    aux_df = df[(df["home_team_id"] == team) | (df["away_team_id"] == team)].copy()
-    # compute cumulative average
-    cum_mean = (
-        aux_df["brier_score"].expanding().mean()
-    )
-
-    new_df = pd.DataFrame()
-    new_df["cum_mean"] = cum_mean
-    new_df["team_id"] = team
-
-    plot_df = plot_df.append(new_df)
-
-plot_df = pd.merge(
-    plot_df, 
-    df[["home_team_id", "home_team_name"]].drop_duplicates(),
-    how = "left",
-    left_on = "team_id",
-    right_on = "home_team_id",
-).rename(columns = {"home_team_name":"team_name"})
+plot_df = (
+    cumulative(team_matches, "team_id", "brier_score", how = "mean")
+    .rename(columns = {"cum_brier_score": "cum_mean"})
+    [["cum_mean", "team_id", "team_name"]]
+)
 
 # %%
 # Assign team colors
@@ -96,16 +63,39 @@ plot_df = pd.merge(plot_df, team_colors, how = "left")
 
 # %%
 
-def plot_team_brier_score(ax, team_id, data, label_y = True, label_x = True):
+def plot_brier_background(ax, data, exclude = None):
+    '''
+    Plots the cumulative Brier Score of every team (but exclude)
+    in a lighter color.
+    '''
+
+    teams = as_grouped(data, "team_id")
+
+    for x, aux_df in teams.others(exclude):
+        ax.plot(
+            aux_df.index,
+            aux_df["cum_mean"],
+            color = "gray",
+            alpha = 0.15,
+            lw = 1.25,
+            zorder = 2
+        )
+
+
+def plot_team_brier_score(ax, team_id, data, label_y = True, label_x = True, background = True):
     '''
     Plots the cumulative Brier Score for a given side
     with all the other teams in the backgorund in a lighter
     color.
+
+    data can be a DataFrame or a GroupedFrame keyed by team_id.
+    Set background to False when the other teams are already
+    drawn (e.g. once for every panel with SmallMultiples).
     '''
 
-    df = data.copy()
+    teams = as_grouped(data, "team_id")
 
-    team_df = df[df["team_id"] == team_id].reset_index(drop = True)
+    team_df = teams.get(team_id)
     color = team_df["color"].iloc[0]
 
     ax.plot(
@@ -131,19 +121,8 @@ def plot_team_brier_score(ax, team_id, data, label_y = True, label_x = True):
         size = 8
     )
 
-    for x in df["team_id"].unique():
-        if x == team_id:
-            continue
-        aux_df = df[df["team_id"] == x].reset_index(drop = True)
-
-        ax.plot(
-            aux_df.index,
-            aux_df["cum_mean"],
-            color = "gray",
-            alpha = 0.15,
-            lw = 1.25,
-            zorder = 2
-        )
+    if background:
+        plot_brier_background(ax, teams, exclude = team_id)
 
     ax.grid(ls = ":", color = "lightgrey")
     ax.spines["top"].set_visible(False)
@@ -172,70 +151,46 @@ order_teams = (
 )
 
 fig = plt.figure(figsize=(14, 14), dpi = 200)
-nrows = 10
-ncols = 4
-gspec = gridspec.GridSpec(
-    ncols=ncols, nrows=nrows, figure=fig, 
-    height_ratios = [(1/nrows)*2. if x % 2 != 0 else (1/nrows)/2. for x in range(nrows)], hspace = 0.3
-)
 
-plot_counter = 0
-logo_counter = 0
-for row in range(nrows):
-    for col in range(ncols):
-        if row % 2 != 0:
-            ax = plt.subplot(
-                gspec[row, col],
-                facecolor = "#EFE9E6"
-            )
-
-            teamId = order_teams["team_id"].iloc[plot_counter]
-
-            if col == 0:
-                labels_y = True
-            else:
-                labels_y = False
-            
-            if row == nrows - 1:
-                labels_x = True
-            else:
-                labels_x = False
-            
-            plot_team_brier_score(ax, teamId, plot_df, labels_y, labels_x)           
-
-            plot_counter += 1
-
-        else:
-
-            teamId = order_teams["team_id"].iloc[logo_counter]
-            teamName = plot_df[plot_df["team_id"] == teamId]["team_name"].iloc[0]
-
-            fotmob_url = "https://images.fotmob.com/image_resources/logo/teamlogo/"
-            logo_ax = plt.subplot(
-                gspec[row,col],
-                anchor = "NW", facecolor = "#EFE9E6"
-            )
-            club_icon = Image.open(urllib.request.urlopen(f"{fotmob_url}{teamId:.0f}.png")).convert("LA")
-            logo_ax.imshow(club_icon)
-            logo_ax.axis("off")
-
-            if teamName == "Wolverhampton Wanderers":
-                teamName = "Wolverhampton"
-
-            # # Add the team name
-            ax_text(
-                x = 1.1, 
-                y = 0.7,
-                s = f"{teamName}",
-                ax = logo_ax, 
-                weight = "bold", 
-                font = "Karla", 
-                ha = "left", 
-                size = 13, 
-                annotationbbox_kw = {"xycoords":"axes fraction"}
-            )
-
-            logo_counter += 1
+# -- A header row (logo and name) above each row of plots.
+grid = SmallMultiples(fig, n_panels = 20, ncols = 4, ratio = 2., hspace = 0.3, facecolor = "#EFE9E6")
+
+logos = LogoStore()
+logos.prefetch(order_teams["team_id"])
+
+# -- Partition the data by team once, every panel then slices it.
+teams = GroupedFrame(plot_df, "team_id")
+
+# -- Every team in grey, drawn once at the output resolution and shared by all panels.
+grid.background(lambda ax: plot_brier_background(ax, teams), dpi = 600)
+
+for panel in grid:
+
+    teamId = order_teams["team_id"].iloc[panel.index]
+    teamName = teams.get(teamId)["team_name"].iloc[0]
+
+    plot_team_brier_score(panel.ax, teamId, teams, panel.is_first_col, panel.is_last_row, background = False)
+
+    logo_ax = panel.header_ax
+    club_icon = logos.open(teamId, mode = "LA")
+    logo_ax.imshow(club_icon)
+    logo_ax.axis("off")
+
+    if teamName == "Wolverhampton Wanderers":
+        teamName = "Wolverhampton"
+
+    # # Add the team name
+    ax_text(
+        x = 1.1, 
+        y = 0.7,
+        s = f"{teamName}",
+        ax = logo_ax, 
+        weight = "bold", 
+        font = "Karla", 
+        ha = "left", 
+        size = 13, 
+        annotationbbox_kw = {"xycoords":"axes fraction"}
+    )
 
 fig_text(
     x = 0.11, y = .96, 
@@ -252,20 +207,10 @@ fig_text(
 )
 
 
-plt.savefig(
+# -- Render once, write the opaque and transparent (_tr) versions.
+save_variants(
+	plt.gcf(),
 	"figures/07112022_epl_predictable.png",
 	dpi = 600,
-	facecolor = "#EFE9E6",
-	bbox_inches="tight",
-    edgecolor="none",
-	transparent = False
-)
-
-plt.savefig(
-	"figures/07112022_epl_predictable_tr.png",
-	dpi = 600,
-	facecolor = "none",
-	bbox_inches="tight",
-    edgecolor="none",
-	transparent = True
+	facecolor = "#EFE9E6"
 )
\ No newline at end of file
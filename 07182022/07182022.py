@@ -1,34 +1,21 @@
 # %%
 import matplotlib.pyplot as plt
-import matplotlib.font_manager as fm
 import matplotlib.ticker as ticker
 import matplotlib.patheffects as path_effects
-from matplotlib import rcParams
 from highlight_text import ax_text, fig_text
 import pandas as pd
 
 from PIL import Image
 import urllib
-import os
+import sys
 
-# --- Use this only if you have already downloaded fonts into your
-# --- local directory.
+sys.path.append("..")
+from socviz import fonts
+from socviz.export import save_variants
 
-# Add pretty fonts
+# Add pretty fonts (registered from assets/fonts and cached after the first run)
 
-font_path = r"" #Set the path to where the fonts are located
-
-for x in os.listdir(font_path):
-    for y in os.listdir(f"{font_path}/{x}"):
-        if y.split(".")[-1] == "ttf":
-            fm.fontManager.addfont(f"{font_path}/{x}/{y}")
-            try:
-                fm.FontProperties(weight=y.split("-")[-1].split(".")[0].lower(), fname=y)
-            except Exception as e:
-                print(f"Font {y} could not be added.")
-                continue
-
-rcParams['font.family'] = 'Karla'
+fonts.setup(style = False, family = "Karla")
 
 
 # --- Reading the data
@@ -160,20 +147,10 @@ fig_text(
 )
 
 
-plt.savefig(
+# -- Render once, write the opaque and transparent (_tr) versions.
+save_variants(
+	plt.gcf(),
 	"figures/07182022_the_naughty_boys.png",
 	dpi = 600,
-	facecolor = "#EFE9E6",
-	bbox_inches="tight",
-    edgecolor="none",
-	transparent = False
-)
-
-plt.savefig(
-	"figures/07182022_the_naughty_boys_tr.png",
-	dpi = 600,
-	facecolor = "none",
-	bbox_inches="tight",
-    edgecolor="none",
-	transparent = True
+	facecolor = "#EFE9E6"
 )
\ No newline at end of file
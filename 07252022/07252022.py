@@ -1,34 +1,22 @@
 # %%
 import matplotlib.pyplot as plt
-import matplotlib.font_manager as fm
 import matplotlib.ticker as ticker
 import matplotlib.patheffects as path_effects
-from matplotlib import rcParams
 from highlight_text import fig_text
 import pandas as pd
 
-from PIL import Image
-import urllib
-import os
+import sys
 
-# --- Use this only if you have already downloaded fonts into your
-# --- local directory.
+sys.path.append("..")
+from socviz import fonts
+from socviz.crests import add_logos
+from socviz.export import save_variants
+from socviz.inequality import inequality_metrics
+from socviz.logos import LogoStore
 
-# Add pretty fonts
+# Add pretty fonts (registered from assets/fonts and cached after the first run)
 
-font_path = r"" #Set the path to where the fonts are located
-
-for x in os.listdir(font_path):
-    for y in os.listdir(f"{font_path}/{x}"):
-        if y.split(".")[-1] == "ttf":
-            fm.fontManager.addfont(f"{font_path}/{x}/{y}")
-            try:
-                fm.FontProperties(weight=y.split("-")[-1].split(".")[0].lower(), fname=y)
-            except Exception as e:
-                print(f"Font {y} could not be added.")
-                continue
-
-rcParams['font.family'] = 'Karla'
+fonts.setup(style = False, family = "Karla")
 
 # %%
 
@@ -40,77 +28,17 @@ data = pd.read_csv("data/seriea_touches_07252022.csv", index_col = 0)
 
 
 # ----------------------------------------------------------------
-# Computing the Palma Ratio
+# Computing the Palma Ratio, Hoover Index & Gini Coefficient
 # ----------------------------------------------------------------
 
-inequality_df = (
-    data.groupby(["teamId", "teamName"])
-    ["touches"]
-    .agg(bottom_4 = lambda x: x.quantile(.4), top_10 = lambda x: x.quantile(.9))
-    .reset_index()
+# -- All three metrics for every team from a single sort of the touches.
+# -- Pass bootstrap = 1000 to get confidence bands (<metric>_low/_high).
+inequality_df = inequality_metrics(
+    data, 
+    group_cols = ["teamId", "teamName"], 
+    value_col = "touches"
 )
 
-inequality_df["palma_ratio"] = inequality_df["top_10"]/inequality_df["bottom_4"]
-
-# ----------------------------------------------------------------
-# Computing the Hoover Index
-# ----------------------------------------------------------------
-
-def hoover_index(team_id, df):
-    '''
-    This function calculates the Hoover Index
-    for a given team.
-    '''
-
-    data = df.copy()
-    data = data[data["teamId"] == team_id]
-
-    mean_ = data["touches"].mean()
-
-    data["abs_diff"] = (
-        abs(data["touches"] - mean_)
-    )
-
-    hoover_index = 0.5*(data["abs_diff"].sum())/data["touches"].sum()
-
-    return hoover_index
-
-# ----------------------------------------------------------------
-# Computing the Gini Coefficient
-# ----------------------------------------------------------------
-
-def gini_coefficient(team_id, df):
-    '''
-    This function calculates the Gini Coefficient
-    for a given team.
-    '''
-
-    data = df.copy()
-    data = data[data["teamId"] == team_id]
-
-    mean_ = data["touches"].mean()
-
-    abs_differences = []
-    for i in data["touches"]:
-        for j in data["touches"]:
-            abs_differences.append(abs(i - j))
-    
-    abs_diff_sum = sum(abs_differences)
-
-    gini_coefficient = (
-        abs_diff_sum/(2 * (data.shape[0]**2) * mean_)
-    )
-
-    return gini_coefficient
-
-# -- Create the column
-inequality_df["hoover_index"] = 0
-inequality_df["gini_coefficient"] = 0
-
-for index, team in enumerate(inequality_df["teamId"]):
-    inequality_df["hoover_index"].iloc[index] = hoover_index(team, df = data)
-    inequality_df["gini_coefficient"].iloc[index] = gini_coefficient(team, df = data)
-
 
 # %%
 
@@ -179,19 +107,15 @@ def plot_inequality(ax, fig, metric, df):
 
     ax.tick_params(labelsize = 8)
 
-    DC_to_FC = ax.transData.transform
-    FC_to_NFC = fig.transFigure.inverted().transform
-
-    # Native data to normalized data coordinates
-    DC_to_NFC = lambda x: FC_to_NFC(DC_to_FC(x))
-
-    fotmob_url = "https://images.fotmob.com/image_resources/logo/teamlogo/"
-    for index, teamId in enumerate(data["teamId"]):
-        ax_coords = DC_to_NFC([index - 0.35, -ax.get_ylim()[1]*.175])
-        logo_ax = fig.add_axes([ax_coords[0], ax_coords[1], 0.03, 0.03], anchor = "W")
-        club_icon = Image.open(urllib.request.urlopen(f"{fotmob_url}{teamId:.0f}.png")).convert("LA")
-        logo_ax.imshow(club_icon)
-        logo_ax.axis("off")
+    # -- All the crests below the bars, resized once for the 600 dpi export.
+    add_logos(
+        ax,
+        data["teamId"],
+        [(index - 0.35, -ax.get_ylim()[1]*.175) for index in data.index],
+        box = 0.03,
+        logos = logos,
+        dpi = 600
+    )
     
     ax.tick_params(labelsize = 10)
 
@@ -201,6 +125,10 @@ def plot_inequality(ax, fig, metric, df):
 # -----------------------------------
 # The final plot
 
+# -- Download all the crests in one go before we start drawing.
+logos = LogoStore()
+logos.prefetch(inequality_df["teamId"])
+
 fig = plt.figure(figsize=(7, 10), dpi = 200)
 ax_gini = fig.add_subplot(311, facecolor = "#EFE9E6")
 ax_palma = fig.add_subplot(312, facecolor = "#EFE9E6")
@@ -258,22 +186,12 @@ fig_text(
 )
 
 
-plt.savefig(
+# -- Render once, write the opaque and transparent (_tr) versions.
+save_variants(
+	plt.gcf(),
 	"figures/07252022_seriea_touches.png",
 	dpi = 600,
-	facecolor = "#EFE9E6",
-	bbox_inches="tight",
-    edgecolor="none",
-	transparent = False
-)
-
-plt.savefig(
-	"figures/07252022_seriea_touches_tr.png",
-	dpi = 600,
-	facecolor = "none",
-	bbox_inches="tight",
-    edgecolor="none",
-	transparent = True
+	facecolor = "#EFE9E6"
 )
 
 
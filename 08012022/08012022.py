@@ -1,103 +1,53 @@
 # %%
 import matplotlib.pyplot as plt
-import matplotlib.font_manager as fm
 import matplotlib.ticker as ticker
 import matplotlib.patheffects as path_effects
 import matplotlib.patches as patches
-from matplotlib import rcParams
 from highlight_text import ax_text, fig_text
 import pandas as pd
 
-from PIL import Image
-import urllib
-import os
+import sys
 
-# --- Use this only if you have already downloaded fonts into your
-# --- local directory.
+sys.path.append("..")
+from socviz import fonts
+from socviz.export import save_variants
+from socviz.goalmouth import GoalMouthBins
+from socviz.logos import LogoStore
 
-# Add pretty fonts
+# Add pretty fonts (registered from assets/fonts and cached after the first run)
 
-font_path = r"" #Set the path to where the fonts are located
-
-for x in os.listdir(font_path):
-    for y in os.listdir(f"{font_path}/{x}"):
-        if y.split(".")[-1] == "ttf":
-            fm.fontManager.addfont(f"{font_path}/{x}/{y}")
-            try:
-                fm.FontProperties(weight=y.split("-")[-1].split(".")[0].lower(), fname=y)
-            except Exception as e:
-                print(f"Font {y} could not be added.")
-                continue
-
-rcParams['font.family'] = 'Karla'
+fonts.setup(style = False, family = "Karla")
 
 # --- Read and transform the data
 
 df = pd.read_csv("data/08012022_womens_euro.csv", index_col = 0)
 
+# -- Bin the shots of every match and team once, each grid size is cached.
+shots = GoalMouthBins(df, by = ["match_id", "team_id"])
+
 # ----------------------------------------------------------------
 # -- Declare a function to group the shots into bins
 
-def shot_map_bins(match_id, team_id, grid_x = 6, grid_y = 2, data = df):
+def shot_map_bins(match_id, team_id, grid_x = 6, grid_y = 2, data = shots):
     '''
-    This function takes a playerId and returns the list of 
+    This function takes a match and team and returns the list of 
     percentages (in order) to map the values into our shot map plot.
 
     Args:
         grid_x (int): the number of divisions to be made to the goal aross the x-axis. Must be an even number.
         grid_y (int): the number of divisions to be made to the goal aross the y-axis. Must be an even number.
+        data (GoalMouthBins): the binned shots.
     '''
 
-    data = data.copy()
-    width = 24
-    height = 8
-
-    if (grid_x % 2 != 0) | (grid_y % 2 != 0):
-        raise Exception('grid_x and grid_y must be even integers.')
-
-    increment_x = int(width / grid_x)
-    increment_y = int(height / grid_y) 
-
-    # The data's scale is 2 units wide and .666 high.
-
-    data['x'] = [((x*width)/2.1) for x in data['x']]
-    data['y'] = [((y*height)/.7) for y in data['y']]
+    if (match_id, team_id) not in data:
+        return []
 
-    # Assign intervals
-    bins_x = range(0, width + 1, increment_x)
-    bins_y = range(0, height + 1, increment_y)
-
-    data['bins_x'] = pd.cut(data['x'], bins_x)
-    data['bins_y'] = pd.cut(data['y'], bins_y)
-
-    # -- We add an auxiliary column to help us count the number of shots.
-    data['shot_aux'] = 1
-
-    data_bins = (
-        data
-        .groupby(['bins_x','bins_y','team_id', 'match_id'])
-        ['shot_aux'].sum().
-        reset_index()
-    )
-
-    # -- Count all shots on target.
-    total_shots = data.groupby(['team_id', 'match_id'])['shot_aux'].sum().reset_index()
-    total_shots.columns = ['team_id', 'match_id', 'total']
-
-    # -- Merge it back & calculate the percentage
-    data_bins = pd.merge(data_bins, total_shots, how = 'left', on = ['match_id', 'team_id'])
-    data_bins['shot_pct'] = data_bins['shot_aux']/data_bins['total']
-
-    # -- Order data_bins first by x and then by y
-    team_bins = data_bins[(data_bins['team_id'] == team_id) & (data_bins['match_id'] == match_id)].reset_index()
-    team_bins = team_bins.sort_values(by = ['bins_x', 'bins_y'])
-  
-    return team_bins['shot_pct'].to_list()
+    return data.get((match_id, team_id), grid_x = grid_x, grid_y = grid_y).tolist()
 
 # -------------------------------------------------------------------------
 # Declare a function that plots the shotmap
 
-def shot_map_plot(match_id, team_id, ax, grid_x = 6, grid_y = 2, data = df, main_color = '#005377'):
+def shot_map_plot(match_id, team_id, ax, grid_x = 6, grid_y = 2, data = shots, main_color = '#005377'):
     '''
     This function takes a team, match_id and axes to plot a shot map.
 
@@ -106,14 +56,9 @@ def shot_map_plot(match_id, team_id, ax, grid_x = 6, grid_y = 2, data = df, main
     grid_x (int): the number of divisions to be made to the goal aross the x-axis. Must be an even number.
     grid_y (int): the number of divisions to be made to the goal aross the y-axis. Must be an even number.
     main_color (str): a hex color code for the heat-map.
+    data (GoalMouthBins): the shots binned by match and team.
     '''
 
-    scatter_df = data.copy()
-    scatter_df = scatter_df[
-        (scatter_df["match_id"] == match_id) &
-        (scatter_df["team_id"] == team_id)
-    ]
-
     ax.axis('equal')
 
     # -- The size of the goal
@@ -129,13 +74,13 @@ def shot_map_plot(match_id, team_id, ax, grid_x = 6, grid_y = 2, data = df, main
 
     # -- The data
 
-    data = shot_map_bins(match_id = match_id, team_id = team_id, grid_x = grid_x, grid_y = grid_y, data = data)
+    shots = data
+    data = shot_map_bins(match_id = match_id, team_id = team_id, grid_x = grid_x, grid_y = grid_y, data = shots)
     try:
         max_data = max(data)
         scaled_data = [x/max_data for x in data]
-        scatter_df['x'] = [((x*width)/2.1) for x in scatter_df['x']]
-        scatter_df['y'] = [((y*height)/.7) for y in scatter_df['y']]
-        ax.scatter(scatter_df['x'], scatter_df['y'], ec = "black", color = "white", alpha = 0.5, s = 10)
+        shots_x, shots_y = shots.points((match_id, team_id))
+        ax.scatter(shots_x, shots_y, ec = "black", color = "white", alpha = 0.5, s = 10)
     except:
         scaled_data = [0]*grid_x*grid_y
         data = scaled_data
@@ -222,8 +167,11 @@ layout = [
     ["q3goal_h", "q3goal_h", "q3goal_a", "q3goal_a", ".", "q4goal_h", "q4goal_h", "q4goal_a", "q4goal_a"],
 ]
 
-# -- Fotmob url for logos
-fotmob_url = "https://images.fotmob.com/image_resources/logo/teamlogo/"
+# -- Fotmob logos, fetched in a single batch before drawing
+trophy_url = "https://cdn-icons-png.flaticon.com/512/3112/3112946.png"
+logos = LogoStore()
+logos.prefetch(df["team_id"])
+logos.open_url(trophy_url)
 
 # Hieght ratios (logo, shotmap, space)
 h_ratios = [.35, 1., .25] * 4 + [.35, 1.]
@@ -244,8 +192,8 @@ axs = fig.subplot_mosaic(
 # -------------------- Quarter Finals
 # --------------
 # England vs. Spain
-shot_map_plot(3552651, 5811, axs["q1goal_h"], main_color = "#6fa3e6")
-club_icon = Image.open(urllib.request.urlopen(f"{fotmob_url}{5811:.0f}.png"))
+shot_map_plot(3552651, 5811, axs["q1goal_h"], data = shots, main_color = "#6fa3e6")
+club_icon = logos.open(5811)
 axs["q1logo_h"].imshow(club_icon)
 x_ = axs["q1logo_h"].get_xlim()[1]
 y_ = axs["q1logo_h"].get_ylim()[0]
@@ -260,8 +208,8 @@ axs["q1logo_h"].annotate(
 )
 axs["q1logo_h"].axis("off")
 # --
-shot_map_plot(3552651, 244165, axs["q1goal_a"], main_color = "#cd4201")
-club_icon = Image.open(urllib.request.urlopen(f"{fotmob_url}{244165:.0f}.png"))
+shot_map_plot(3552651, 244165, axs["q1goal_a"], data = shots, main_color = "#cd4201")
+club_icon = logos.open(244165)
 axs["q1logo_a"].imshow(club_icon)
 x_ = axs["q1logo_a"].get_xlim()[1]
 y_ = axs["q1logo_a"].get_ylim()[0]
@@ -277,8 +225,8 @@ axs["q1logo_a"].axis("off")
 
 # --------------
 # Sweden vs. Belgium
-shot_map_plot(3552653, 5814, axs["q2goal_h"], main_color = "#3060a8")
-club_icon = Image.open(urllib.request.urlopen(f"{fotmob_url}{5814:.0f}.png"))
+shot_map_plot(3552653, 5814, axs["q2goal_h"], data = shots, main_color = "#3060a8")
+club_icon = logos.open(5814)
 axs["q2logo_h"].imshow(club_icon)
 x_ = axs["q2logo_h"].get_xlim()[1]
 y_ = axs["q2logo_h"].get_ylim()[0]
@@ -293,8 +241,8 @@ axs["q2logo_h"].annotate(
 )
 axs["q2logo_h"].axis("off")
 # --
-shot_map_plot(3552653, 394233, axs["q2goal_a"], main_color = "#333333")
-club_icon = Image.open(urllib.request.urlopen(f"{fotmob_url}{394233:.0f}.png"))
+shot_map_plot(3552653, 394233, axs["q2goal_a"], data = shots, main_color = "#333333")
+club_icon = logos.open(394233)
 axs["q2logo_a"].imshow(club_icon)
 x_ = axs["q2logo_a"].get_xlim()[1]
 y_ = axs["q2logo_a"].get_ylim()[0]
@@ -310,8 +258,8 @@ axs["q2logo_a"].axis("off")
 
 # --------------
 # France vs. Netherlands
-shot_map_plot(3552654, 6325, axs["q3goal_h"], main_color = "#284898")
-club_icon = Image.open(urllib.request.urlopen(f"{fotmob_url}{6325:.0f}.png"))
+shot_map_plot(3552654, 6325, axs["q3goal_h"], data = shots, main_color = "#284898")
+club_icon = logos.open(6325)
 axs["q3logo_h"].imshow(club_icon)
 x_ = axs["q3logo_h"].get_xlim()[1]
 y_ = axs["q3logo_h"].get_ylim()[0]
@@ -326,8 +274,8 @@ axs["q3logo_h"].annotate(
 )
 axs["q3logo_h"].axis("off")
 # --
-shot_map_plot(3552654, 159980, axs["q3goal_a"], main_color = "#ff6d41")
-club_icon = Image.open(urllib.request.urlopen(f"{fotmob_url}{159980:.0f}.png"))
+shot_map_plot(3552654, 159980, axs["q3goal_a"], data = shots, main_color = "#ff6d41")
+club_icon = logos.open(159980)
 axs["q3logo_a"].imshow(club_icon)
 x_ = axs["q3logo_a"].get_xlim()[1]
 y_ = axs["q3logo_a"].get_ylim()[0]
@@ -343,8 +291,8 @@ axs["q3logo_a"].axis("off")
 
 # --------------
 # Germany vs. Austria
-shot_map_plot(3552652, 5812, axs["q4goal_h"], main_color = "#000000")
-club_icon = Image.open(urllib.request.urlopen(f"{fotmob_url}{5812:.0f}.png"))
+shot_map_plot(3552652, 5812, axs["q4goal_h"], data = shots, main_color = "#000000")
+club_icon = logos.open(5812)
 axs["q4logo_h"].imshow(club_icon)
 x_ = axs["q4logo_h"].get_xlim()[1]
 y_ = axs["q4logo_h"].get_ylim()[0]
@@ -359,8 +307,8 @@ axs["q4logo_h"].annotate(
 )
 axs["q4logo_h"].axis("off")
 # --
-shot_map_plot(3552652, 394231, axs["q4goal_a"], main_color = "#EF3340")
-club_icon = Image.open(urllib.request.urlopen(f"{fotmob_url}{394231:.0f}.png"))
+shot_map_plot(3552652, 394231, axs["q4goal_a"], data = shots, main_color = "#EF3340")
+club_icon = logos.open(394231)
 axs["q4logo_a"].imshow(club_icon)
 x_ = axs["q4logo_a"].get_xlim()[1]
 y_ = axs["q4logo_a"].get_ylim()[0]
@@ -377,8 +325,8 @@ axs["q4logo_a"].axis("off")
 # -------------------- Semi Finals
 # --------------
 # England vs. Sweden
-shot_map_plot(3552655, 5811, axs["s1goal_h"], main_color = "#6fa3e6")
-club_icon = Image.open(urllib.request.urlopen(f"{fotmob_url}{5811:.0f}.png"))
+shot_map_plot(3552655, 5811, axs["s1goal_h"], data = shots, main_color = "#6fa3e6")
+club_icon = logos.open(5811)
 axs["s1logo_h"].imshow(club_icon)
 x_ = axs["s1logo_h"].get_xlim()[1]
 y_ = axs["s1logo_h"].get_ylim()[0]
@@ -393,8 +341,8 @@ axs["s1logo_h"].annotate(
 )
 axs["s1logo_h"].axis("off")
 # --
-shot_map_plot(3552655, 5814, axs["s1goal_a"], main_color = "#3060a8")
-club_icon = Image.open(urllib.request.urlopen(f"{fotmob_url}{5814:.0f}.png"))
+shot_map_plot(3552655, 5814, axs["s1goal_a"], data = shots, main_color = "#3060a8")
+club_icon = logos.open(5814)
 axs["s1logo_a"].imshow(club_icon)
 x_ = axs["s1logo_a"].get_xlim()[1]
 y_ = axs["s1logo_a"].get_ylim()[0]
@@ -410,8 +358,8 @@ axs["s1logo_a"].axis("off")
 
 # --------------
 # France vs. Germany
-shot_map_plot(3552656, 6325, axs["s2goal_h"], main_color = "#284898")
-club_icon = Image.open(urllib.request.urlopen(f"{fotmob_url}{6325:.0f}.png"))
+shot_map_plot(3552656, 6325, axs["s2goal_h"], data = shots, main_color = "#284898")
+club_icon = logos.open(6325)
 axs["s2logo_h"].imshow(club_icon)
 x_ = axs["s2logo_h"].get_xlim()[1]
 y_ = axs["s2logo_h"].get_ylim()[0]
@@ -425,8 +373,8 @@ axs["s2logo_h"].annotate(
 )
 axs["s2logo_h"].axis("off")
 # -- 
-shot_map_plot(3552656, 5812, axs["s2goal_a"], main_color = "#000000")
-club_icon = Image.open(urllib.request.urlopen(f"{fotmob_url}{5812:.0f}.png"))
+shot_map_plot(3552656, 5812, axs["s2goal_a"], data = shots, main_color = "#000000")
+club_icon = logos.open(5812)
 axs["s2logo_a"].imshow(club_icon)
 x_ = axs["s2logo_a"].get_xlim()[1]
 y_ = axs["s2logo_a"].get_ylim()[0]
@@ -443,8 +391,8 @@ axs["s2logo_a"].axis("off")
 
 # ----------- THE FINAL
 # England vs. Germany
-shot_map_plot(3552657, 5811, axs["fgoal_h"], main_color = "#6fa3e6")
-club_icon = Image.open(urllib.request.urlopen(f"{fotmob_url}{5811:.0f}.png"))
+shot_map_plot(3552657, 5811, axs["fgoal_h"], data = shots, main_color = "#6fa3e6")
+club_icon = logos.open(5811)
 axs["flogo_h"].imshow(club_icon)
 x_ = axs["flogo_h"].get_xlim()[1]
 y_ = axs["flogo_h"].get_ylim()[0]
@@ -459,8 +407,8 @@ axs["flogo_h"].annotate(
 )
 axs["flogo_h"].axis("off")
 # -- 
-shot_map_plot(3552657, 5812, axs["fgoal_a"], main_color = "#000000")
-club_icon = Image.open(urllib.request.urlopen(f"{fotmob_url}{5812:.0f}.png"))
+shot_map_plot(3552657, 5812, axs["fgoal_a"], data = shots, main_color = "#000000")
+club_icon = logos.open(5812)
 axs["flogo_a"].imshow(club_icon)
 x_ = axs["flogo_a"].get_xlim()[1]
 y_ = axs["flogo_a"].get_ylim()[0]
@@ -476,7 +424,7 @@ axs["flogo_a"].axis("off")
 
 
 trophy_ax = fig.add_axes([0.22, 0.46, 0.06, 0.06])
-trophy_icon = Image.open(urllib.request.urlopen(f"https://cdn-icons-png.flaticon.com/512/3112/3112946.png"))
+trophy_icon = logos.open_url(trophy_url)
 trophy_ax.imshow(trophy_icon)
 trophy_ax.axis("off")
 
@@ -495,20 +443,10 @@ fig_text(
 	fontsize = 12, color = "#4E616C", font = "Karla"
 )
 
-plt.savefig(
+# -- Render once, write the opaque and transparent (_tr) versions.
+save_variants(
+	plt.gcf(),
 	"figures/08012022_womens_euro.png",
 	dpi = 600,
-	facecolor = "#EFE9E6",
-	bbox_inches="tight",
-    edgecolor="none",
-	transparent = False
-)
-
-plt.savefig(
-	"figures/08012022_womens_euro_tr.png",
-	dpi = 600,
-	facecolor = "none",
-	bbox_inches="tight",
-    edgecolor="none",
-	transparent = True
+	facecolor = "#EFE9E6"
 )
\ No newline at end of file
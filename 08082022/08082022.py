@@ -1,31 +1,20 @@
 # %%
 import matplotlib.pyplot as plt
-import matplotlib.font_manager as fm
-from matplotlib import rcParams
 from highlight_text import fig_text
 import pandas as pd
 
-from PIL import Image
-import urllib
-import os
+import sys
 
+sys.path.append("..")
+from socviz import fonts
+from socviz.crests import add_logos
+from socviz.export import save_variants
+from socviz.logos import LogoStore
 
-# --- Use this only if you have already downloaded fonts into your
-# --- local directory.
 
-# Add pretty fonts
+# Add pretty fonts (registered from assets/fonts and cached after the first run)
 
-for x in os.listdir(font_path):
-    for y in os.listdir(f'{font_path}/{x}'):
-        if y.split('.')[-1] == 'ttf':
-            fm.fontManager.addfont(f'{font_path}/{x}/{y}')
-            try:
-                fm.FontProperties(weight=y.split('-')[-1].split('.')[0].lower(), fname=y)
-            except Exception as e:
-                print(f'Font {y} could not be added.')
-                continue
-
-rcParams['font.family'] = 'Karla'
+fonts.setup(style = False, family = "Karla")
 
 # --- Read and transform the data
 
@@ -136,24 +125,8 @@ def plot_axes_xg_by_match(ax, fig, match_id, data=df):
     home_team_name = match_df[home_conditional]['teamName'].iloc[0]
     away_team_name = match_df[away_conditional]['teamName'].iloc[0]
 
-    DC_to_FC = ax.transData.transform
-    FC_to_NFC = fig.transFigure.inverted().transform
-    # Native data to normalized data coordinates
-    DC_to_NFC = lambda x: FC_to_NFC(DC_to_FC(x))
-
-    fotmob_url = 'https://images.fotmob.com/image_resources/logo/teamlogo/'
-
-    ax_coords = DC_to_NFC([-2, .55])
-    logo_ax = fig.add_axes([ax_coords[0], ax_coords[1], 0.03, 0.03], anchor = 'W')
-    club_icon = Image.open(urllib.request.urlopen(f'{fotmob_url}{home_team_id:.0f}.png')).convert("LA")
-    logo_ax.imshow(club_icon)
-    logo_ax.axis('off')
-
-    ax_coords = DC_to_NFC([-2, -.9])
-    logo_ax = fig.add_axes([ax_coords[0], ax_coords[1], 0.03, 0.03], anchor = 'W')
-    club_icon = Image.open(urllib.request.urlopen(f'{fotmob_url}{away_team_id:.0f}.png')).convert("LA")
-    logo_ax.imshow(club_icon)
-    logo_ax.axis('off')
+    # -- Home crest above the axis, away crest below, resized once for the 600 dpi export.
+    add_logos(ax, [home_team_id, away_team_id], [(-2, .55), (-2, -.9)], box=0.03, logos=logos, dpi=600)
 
     # --- Compute goals and xG
     home_xG = match_df[home_conditional & (match_df['isOwnGoal'] == False)]['xG'].sum()
@@ -198,6 +171,8 @@ axs = f.subplot_mosaic(
 counter = 0
 df = df.sort_values(by='match_id').reset_index(drop=True)
 matches = list(df['match_id'].unique())
+logos = LogoStore()
+logos.prefetch(df['teamId'])
 for k, ax in axs.items():
     match_id = matches[counter]
     plot_axes_xg_by_match(ax, f, match_id=match_id, data=df)
@@ -219,20 +194,10 @@ fig_text(
 	fontsize = 12, color = "#4E616C", font = "Karla"
 )
 
-plt.savefig(
+# -- Render once, write the opaque and transparent (_tr) versions.
+save_variants(
+	plt.gcf(),
 	"figures/08082022_ligue1_round1.png",
 	dpi = 600,
-	facecolor = "#EFE9E6",
-	bbox_inches="tight",
-    edgecolor="none",
-	transparent = False
-)
-
-plt.savefig(
-	"figures/08082022_ligue1_round1_tr.png",
-	dpi = 600,
-	facecolor = "none",
-	bbox_inches="tight",
-    edgecolor="none",
-	transparent = True
+	facecolor = "#EFE9E6"
 )
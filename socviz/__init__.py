@@ -0,0 +1,7 @@
+'''
+Shared helpers for the Viz of the Week visuals.
+
+Each dated folder is still a standalone script or notebook; this package
+holds the pieces they have in common so they don't have to be copied
+from one week to the next.
+'''
@@ -0,0 +1,398 @@
+'''
+Benchmarks for the analytical hot paths, on synthetic data shaped like data/.
+
+Every case builds a fixture with the columns of the CSV its visual reads
+(538 match probabilities, Serie A touches, goal-mouth shots, EPL shots and
+the long xG table), scaled from a single round of one league to ten seasons
+of five leagues. The fixture is built outside the timed section, then the
+hot path is timed `repeat` times (the median is kept) and run once more under
+tracemalloc for its peak memory.
+
+Results can be saved as a baseline, and later runs are compared against it.
+A case is flagged as a regression when it is slower (or uses more memory)
+than the baseline by more than the tolerance.
+
+Usage:
+    python -m socviz.bench                          # every case at every size
+    python -m socviz.bench inequality brier --sizes round season
+    python -m socviz.bench --save-baseline          # .build/bench/baseline.json
+    python -m socviz.bench --tolerance .2           # exits with 1 on regressions
+'''
+
+import argparse
+import json
+import os
+import platform
+import statistics
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+
+from socviz.goalmouth import DATA_HEIGHT, DATA_WIDTH, GoalMouthBins
+from socviz.inequality import inequality_metrics
+from socviz.matches import add_outcomes, cumulative, long_format
+from socviz.rolling import RollingXG
+from socviz.simulation import player_goal_distribution, simulate_player_goals
+
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BASELINE_PATH = os.path.join(REPO_ROOT, ".build", "bench", "baseline.json")
+
+TEAMS = 20
+SQUAD = 28
+SHOTS_PER_TEAM = 12
+ON_TARGET_PER_TEAM = 4
+
+
+class Scale:
+    '''
+    The size of a fixture, in leagues x seasons x rounds of `TEAMS` teams.
+    '''
+
+    def __init__(self, name, leagues, seasons, rounds):
+        self.name = name
+        self.leagues = leagues
+        self.seasons = seasons
+        self.rounds = rounds
+
+    @property
+    def matches(self):
+        return self.leagues*self.seasons*self.rounds*TEAMS//2
+
+    @property
+    def team_seasons(self):
+        return self.leagues*self.seasons*TEAMS
+
+    def __repr__(self):
+        return f"Scale({self.name!r}, {self.leagues}, {self.seasons}, {self.rounds})"
+
+
+SIZES = [
+    Scale("round", 1, 1, 1),
+    Scale("season", 1, 1, 38),
+    Scale("ten_seasons", 1, 10, 38),
+    Scale("five_leagues", 5, 10, 38),
+]
+
+
+# ------------------------------------------------------------
+# Fixtures
+
+def _schedule(scale, rng):
+    '''
+    Every match of the fixture: one row per match with its team-season ids,
+    in date order within each league and season.
+    '''
+    n = scale.matches
+    per_round = TEAMS//2
+    match = np.arange(n)
+    block = match//(scale.rounds*per_round)
+    # -- Each round pairs a random permutation of the league's teams.
+    pairs = np.argsort(rng.random((n//per_round, TEAMS)), axis=1).reshape(-1, 2)
+    round_index = (match//per_round) % scale.rounds
+    start = pd.Timestamp("2012-08-11") + pd.to_timedelta(block % scale.seasons*365, unit="D")
+    return pd.DataFrame({
+        "match_id": 3_000_000 + match,
+        "date": start + pd.to_timedelta(round_index*7, unit="D"),
+        "home_team_id": 10_000 + block*TEAMS + pairs[:, 0],
+        "away_team_id": 10_000 + block*TEAMS + pairs[:, 1],
+    })
+
+
+def match_probabilities(scale, rng):
+    '''
+    Shaped like 07112022/data/538_probs_07112022.csv.
+    '''
+    df = _schedule(scale, rng)
+    probs = rng.dirichlet([4.5, 2.6, 3.5], size=len(df)).round(4)
+    df["home_team_name"] = "Team " + df["home_team_id"].astype(str)
+    df["away_team_name"] = "Team " + df["away_team_id"].astype(str)
+    df["prob_home"] = probs[:, 0]
+    df["prob_tie"] = probs[:, 1]
+    df["prob_away"] = probs[:, 2]
+    df["score_home"] = rng.poisson(1.5, len(df))
+    df["score_away"] = rng.poisson(1.2, len(df))
+    return df
+
+
+def player_touches(scale, rng):
+    '''
+    Shaped like 07252022/data/seriea_touches_07252022.csv.
+    '''
+    n = scale.team_seasons*SQUAD
+    team = 10_000 + np.repeat(np.arange(scale.team_seasons), SQUAD)
+    minutes = rng.integers(1, 90*scale.rounds + 1, n)
+    return pd.DataFrame({
+        "playerId": 1_000_000 + np.arange(n),
+        "playerName": [f"Player {x}" for x in range(n)],
+        "teamId": team,
+        "minutes": minutes,
+        "touches": (minutes*rng.gamma(4, .15, n)).round(),
+        "teamName": "Team " + pd.Series(team).astype(str),
+    })
+
+
+def goal_mouth_shots(scale, rng):
+    '''
+    Shaped like 08012022/data/08012022_womens_euro.csv.
+    '''
+    schedule = _schedule(scale, rng)
+    teams = np.column_stack([schedule["home_team_id"], schedule["away_team_id"]]).ravel()
+    counts = rng.poisson(ON_TARGET_PER_TEAM, len(teams))
+    n = counts.sum()
+    return pd.DataFrame({
+        "x": rng.uniform(0, DATA_WIDTH, n),
+        "y": rng.uniform(0, DATA_HEIGHT, n),
+        "zoomRatio": 1,
+        "team_id": np.repeat(teams, counts),
+        "match_id": np.repeat(np.repeat(schedule["match_id"].to_numpy(), 2), counts),
+    })
+
+
+def shots(scale, rng):
+    '''
+    Shaped like 10312022/data/10312022_epl_shots.csv (the columns the
+    simulations read).
+    '''
+    schedule = _schedule(scale, rng)
+    teams = np.column_stack([schedule["home_team_id"], schedule["away_team_id"]]).ravel()
+    counts = rng.poisson(SHOTS_PER_TEAM, len(teams))
+    team = np.repeat(teams, counts)
+    # -- Shots are concentrated on the first few players of every squad.
+    slot = np.minimum(rng.geometric(.25, len(team)) - 1, SQUAD - 1)
+    player = 1_000_000 + (team - 10_000)*SQUAD + slot
+    return pd.DataFrame({
+        "shot_id": 2_400_000_000 + np.arange(len(team)),
+        "team_id": team,
+        "player_id": player,
+        "xG": rng.beta(.7, 6, len(team)),
+    })
+
+
+def long_xg(scale, rng):
+    '''
+    Shaped like 09262022/data/09262022_epl_xg.csv: one row per match, team
+    and variable.
+    '''
+    schedule = _schedule(scale, rng)
+    n = len(schedule)
+    xg = rng.gamma(2.5, .55, (n, 2)).round(2)
+    score = rng.poisson(xg)
+    teams = np.column_stack([schedule["home_team_id"], schedule["away_team_id"]])
+    variables = {
+        "score_for": score, "xG_for": xg,
+        "score_ag": score[:, ::-1], "xG_ag": xg[:, ::-1],
+    }
+    frames = []
+    for variable, values in variables.items():
+        frames.append(pd.DataFrame({
+            "match_id": np.repeat(schedule["match_id"].to_numpy(), 2),
+            "date": np.repeat(schedule["date"].to_numpy(), 2),
+            "variable": variable,
+            "value": values.ravel(),
+            "venue": np.tile(["H", "A"], n),
+            "team_id": teams.ravel(),
+        }))
+    df = pd.concat(frames, ignore_index=True)
+    df["team_name"] = "Team " + df["team_id"].astype(str)
+    return df.sort_values(["date", "match_id", "team_id"], kind="stable").reset_index(drop=True)
+
+
+# ------------------------------------------------------------
+# Cases
+
+def _brier(df):
+    team_matches = long_format(
+        df,
+        columns = {
+            "team_id": ("home_team_id", "away_team_id"),
+            "team_name": ("home_team_name", "away_team_name"),
+            "goals": ("score_home", "score_away"),
+            "prob_win": ("prob_home", "prob_away")
+        },
+        against = {"goals_against": "goals", "prob_loss": "prob_win"},
+        shared = ["match_id", "date", "prob_tie"]
+    )
+    team_matches = add_outcomes(team_matches, prob_win="prob_win", prob_tie="prob_tie", prob_loss="prob_loss")
+    return cumulative(team_matches, "team_id", "brier_score", how="mean")
+
+
+# -- name -> (fixture, hot path, the visual it comes from)
+CASES = {
+    "brier": (match_probabilities, _brier, "07112022"),
+    "inequality": (player_touches, lambda df: inequality_metrics(df, ("teamId", "teamName"), "touches"), "07252022"),
+    "goalmouth": (goal_mouth_shots, lambda df: GoalMouthBins(df, by=["match_id", "team_id"]).histograms(6, 2), "08012022"),
+    "simulation": (shots, lambda df: simulate_player_goals(df, simulations=1000, seed=0, processes=1), "10312022"),
+    "goal_distribution": (shots, player_goal_distribution, "10312022"),
+    "rolling_xg": (long_xg, lambda df: RollingXG(df, factor=10).dense(10), "09262022"),
+}
+
+
+def measure(func, data, repeat=3):
+    '''
+    Median wall time over `repeat` runs, and the peak traced memory of one more run.
+
+    Returns:
+        dict: time (s) and peak (bytes).
+    '''
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(data)
+        times.append(time.perf_counter() - start)
+    tracemalloc.start()
+    try:
+        func(data)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return {"time": statistics.median(times), "peak": peak}
+
+
+def run(cases=None, sizes=None, repeat=3, seed=0, on_result=None):
+    '''
+    Run the benchmarks.
+
+    Args:
+        cases (list): names from CASES, all of them by default.
+        sizes (list): names from SIZES, all of them by default.
+        repeat (int): timed runs per case and size.
+        seed (int): seed of the fixtures, so every run measures the same data.
+        on_result (callable): called with each result as it's measured.
+
+    Returns:
+        list: one dict per case and size with case, size, rows, time and peak.
+    '''
+    cases = list(CASES) if not cases else cases
+    scales = [x for x in SIZES if not sizes or x.name in sizes]
+    results = []
+    for name in cases:
+        fixture, func, _ = CASES[name]
+        for scale in scales:
+            data = fixture(scale, np.random.default_rng(seed))
+            result = {"case": name, "size": scale.name, "rows": len(data)}
+            result.update(measure(func, data, repeat))
+            results.append(result)
+            if on_result is not None:
+                on_result(result)
+    return results
+
+
+# ------------------------------------------------------------
+# Baselines
+
+def save_baseline(results, path=BASELINE_PATH):
+    '''
+    Store the results as the baseline, keeping the other cases and sizes
+    already in the file.
+    '''
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    previous = load_baseline(path) or {}
+    previous.update({f"{x['case']}/{x['size']}": x for x in results})
+    baseline = {
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "pandas": pd.__version__,
+        "machine": platform.machine(),
+        "results": previous,
+    }
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(baseline, f, indent=1)
+
+
+def load_baseline(path=BASELINE_PATH):
+    try:
+        with open(path, encoding="utf-8") as f:
+            return json.load(f)["results"]
+    except (OSError, ValueError, KeyError):
+        return None
+
+
+def compare(results, baseline, tolerance=.25, min_time=1e-3):
+    '''
+    Add time_change, peak_change and regression to every result.
+
+    Args:
+        tolerance (float): relative slowdown (or memory growth) allowed.
+        min_time (float): absolute slowdown in seconds below which timing
+            differences are treated as noise.
+    '''
+    for result in results:
+        base = baseline.get(f"{result['case']}/{result['size']}") if baseline else None
+        if base is None:
+            result.update(time_change=None, peak_change=None, regression=False)
+            continue
+        time_change = result["time"]/base["time"] - 1 if base["time"] > 0 else 0.
+        peak_change = result["peak"]/base["peak"] - 1 if base["peak"] > 0 else 0.
+        slower = time_change > tolerance and result["time"] - base["time"] > min_time
+        result.update(
+            time_change=time_change,
+            peak_change=peak_change,
+            regression=bool(slower or peak_change > tolerance)
+        )
+    return results
+
+
+def report(results, stream=sys.stdout):
+    '''
+    Print a table of the results, with the change against the baseline if any.
+    '''
+    print(f"{'case':<18} {'size':<13} {'rows':>9} {'time (ms)':>10} {'peak (MB)':>10} {'time':>8} {'peak':>8}", file=stream)
+    for x in results:
+        time_change = f"{x['time_change']:+.0%}" if x.get("time_change") is not None else "-"
+        peak_change = f"{x['peak_change']:+.0%}" if x.get("peak_change") is not None else "-"
+        flag = "  REGRESSION" if x.get("regression") else ""
+        print(
+            f"{x['case']:<18} {x['size']:<13} {x['rows']:>9} {x['time']*1000:>10.1f} "
+            f"{x['peak']/1024**2:>10.1f} {time_change:>8} {peak_change:>8}{flag}",
+            file=stream
+        )
+    return [x for x in results if x.get("regression")]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the analytical hot paths on synthetic fixtures.")
+    parser.add_argument("cases", nargs="*", help="cases to run (default: all), see --list")
+    parser.add_argument("--sizes", nargs="+", choices=[x.name for x in SIZES], help="fixture sizes (default: all)")
+    parser.add_argument("--repeat", type=int, default=3, help="timed runs per case and size")
+    parser.add_argument("--seed", type=int, default=0, help="seed of the fixtures")
+    parser.add_argument("--baseline", default=BASELINE_PATH, help="baseline file to compare against or save to")
+    parser.add_argument("--save-baseline", action="store_true", help="store these results as the baseline")
+    parser.add_argument("--tolerance", type=float, default=.25, help="relative change flagged as a regression")
+    parser.add_argument("--output", help="also write the results to this JSON file")
+    parser.add_argument("--list", action="store_true", help="list the cases and sizes and exit")
+    args = parser.parse_args(argv)
+
+    if args.list:
+        for name, (_, _, visual) in CASES.items():
+            print(f"{name:<18} {visual}")
+        for scale in SIZES:
+            print(f"{scale.name:<18} {scale.matches} matches")
+        return 0
+
+    def progress(result):
+        print(f"{result['case']}/{result['size']}: {result['time']*1000:.1f} ms", file=sys.stderr, flush=True)
+
+    unknown = [x for x in args.cases if x not in CASES]
+    if unknown:
+        parser.error(f"unknown case(s): {', '.join(unknown)}")
+
+    results = run(args.cases, args.sizes, args.repeat, args.seed, on_result=progress)
+    baseline = None if args.save_baseline else load_baseline(args.baseline)
+    compare(results, baseline, args.tolerance)
+    print()
+    regressions = report(results)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=1)
+    if args.save_baseline:
+        save_baseline(results, args.baseline)
+        print(f"\nSaved the baseline to {args.baseline}")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,340 @@
+'''
+Build every visual in the archive in parallel.
+
+Each dated folder holds a script (07112022/07112022.py) or one or more
+notebooks. They use relative data/ and figures/ paths, so every job runs in
+its own process with the working directory set to its folder.
+
+Visuals whose inputs didn't change since their last build are skipped, see
+socviz.graph.
+
+Usage:
+    python -m socviz.build                 # build what changed
+    python -m socviz.build --force         # build everything
+    python -m socviz.build 0725 10312022   # only visuals matching these
+    python -m socviz.build --list
+    python -m socviz.build --trace         # phase traces, see socviz.trace
+    python -m socviz.build --trace --trace-dir /tmp/traces 0725
+'''
+
+import argparse
+import json
+import linecache
+import os
+import re
+import runpy
+import subprocess
+import sys
+import threading
+import time
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import ExitStack, nullcontext
+
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+FOLDER_PATTERN = re.compile(r"^\d{8}$")
+
+
+class Job:
+    '''
+    A single visual: a script or notebook and the folder it runs from.
+    '''
+
+    def __init__(self, path):
+        self.path = path
+        self.folder = os.path.dirname(path)
+        self.name = os.path.relpath(path, REPO_ROOT)
+        self.status = "pending"
+        self.wall_time = None
+        self.max_rss = None
+        self.log_path = None
+        self.reason = None
+
+    def __repr__(self):
+        return f"Job({self.name!r})"
+
+
+def discover(root=REPO_ROOT, patterns=None):
+    '''
+    Find every script and notebook in the dated folders.
+
+    Args:
+        root (str): the repository root.
+        patterns (list): keep only jobs whose path contains one of these strings.
+    '''
+    jobs = []
+    for folder in sorted(os.listdir(root)):
+        folder_path = os.path.join(root, folder)
+        if not FOLDER_PATTERN.match(folder) or not os.path.isdir(folder_path):
+            continue
+        for file in sorted(os.listdir(folder_path)):
+            if file.endswith(".ipynb") or file == f"{folder}.py":
+                jobs.append(Job(os.path.join(folder_path, file)))
+    if patterns:
+        jobs = [x for x in jobs if any(p in x.name for p in patterns)]
+    return jobs
+
+
+# ------------------------------------------------------------
+# Running a single job (inside the child process)
+
+def notebook_cells(path):
+    '''
+    The code cells of a notebook as (index, source) pairs, with IPython
+    magics and shell escapes blanked so line numbers still match the cell.
+    '''
+    with open(path, encoding="utf-8") as f:
+        nb = json.load(f)
+    cells = []
+    for index, cell in enumerate(nb["cells"]):
+        if cell["cell_type"] != "code":
+            continue
+        lines = [
+            "" if x.lstrip().startswith(("%", "!")) else x
+            for x in "".join(cell["source"]).splitlines()
+        ]
+        cells.append((index, "\n".join(lines)))
+    return cells
+
+
+def notebook_source(path):
+    '''
+    Concatenate the code cells of a notebook into a script.
+    '''
+    return "\n\n".join(source for _, source in notebook_cells(path))
+
+
+def run_job(path):
+    '''
+    Execute a script or notebook in the current process, from its folder.
+    With SOC_TRACE_DIR set, the run is traced (see socviz.trace). With
+    SOC_DEPS_FILE set, its inputs and outputs are written there (see
+    socviz.graph).
+    '''
+    trace_dir = os.environ.get("SOC_TRACE_DIR")
+    deps_file = os.environ.get("SOC_DEPS_FILE")
+    with ExitStack() as stack:
+        recorder = None
+        if deps_file:
+            from socviz import graph
+            recorder = stack.enter_context(graph.record(deps_file))
+        if trace_dir:
+            from socviz import trace
+            name = trace.job_name(path)
+            trace_format = os.environ.get("SOC_TRACE_FORMAT", "json")
+            # -- The tracer imports the modules it wraps, they aren't the job's inputs.
+            with recorder.loading() if recorder is not None else nullcontext():
+                stack.enter_context(trace.recording(name, trace.trace_path(trace_dir, name, trace_format), trace_format))
+        _run(path)
+
+
+def _run(path):
+    os.chdir(os.path.dirname(os.path.abspath(path)))
+    if path.endswith(".ipynb"):
+        # -- One code object per cell, registered in linecache, so tracebacks
+        # -- point at the cell and its source line instead of the JSON.
+        namespace = {"__name__": "__main__", "__file__": path}
+        for index, source in notebook_cells(path):
+            filename = f"{path} (cell {index})"
+            linecache.cache[filename] = (len(source), None, source.splitlines(True), filename)
+            exec(compile(source, filename, "exec"), namespace)
+    else:
+        runpy.run_path(path, run_name="__main__")
+
+
+# ------------------------------------------------------------
+# Scheduling (in the parent process)
+
+def _max_rss_bytes(usage):
+    # -- ru_maxrss is in kilobytes on Linux and bytes on macOS.
+    return usage.ru_maxrss if sys.platform == "darwin" else usage.ru_maxrss*1024
+
+
+def _execute(job, log_dir, timeout=None, trace_dir=None, trace_format="json", deps_file=None):
+    env = dict(os.environ)
+    env["MPLBACKEND"] = "Agg"
+    if trace_dir:
+        env["SOC_TRACE_DIR"] = trace_dir
+        env["SOC_TRACE_FORMAT"] = trace_format
+    if deps_file:
+        env["SOC_DEPS_FILE"] = deps_file
+    env["PYTHONPATH"] = os.pathsep.join(
+        x for x in [REPO_ROOT, env.get("PYTHONPATH")] if x
+    )
+    job.log_path = os.path.join(log_dir, f"{job.name.replace(os.sep, '_')}.log")
+    start = time.perf_counter()
+    with open(job.log_path, "w", encoding="utf-8") as log:
+        proc = subprocess.Popen(
+            [sys.executable, "-m", "socviz.build", "--run-job", job.path],
+            cwd=job.folder, env=env, stdout=log, stderr=subprocess.STDOUT
+        )
+        timer = None
+        if timeout:
+            timer = threading.Timer(timeout, proc.kill)
+            timer.start()
+        if hasattr(os, "wait4"):
+            _, status, usage = os.wait4(proc.pid, 0)
+            # -- Reaped behind Popen's back: stop the timer before it kills the
+            # -- pid, which may already belong to another process.
+            if timer is not None:
+                timer.cancel()
+            proc.returncode = -os.WTERMSIG(status) if os.WIFSIGNALED(status) else os.WEXITSTATUS(status)
+            job.max_rss = _max_rss_bytes(usage)
+        else:
+            proc.wait()
+        if timer is not None:
+            timer.cancel()
+    job.wall_time = time.perf_counter() - start
+    job.status = "ok" if proc.returncode == 0 else f"failed ({proc.returncode})"
+    return job
+
+
+def _deps_file(job, log_dir):
+    return os.path.join(log_dir, f"{job.name.replace(os.sep, '_')}.deps.json")
+
+
+def build(jobs, processes=None, log_dir=None, timeout=None, on_done=None,
+          trace_dir=None, trace_format="json", graph=None, force=False):
+    '''
+    Run every job, `processes` at a time, each in its own interpreter.
+
+    With a build graph, jobs whose recorded inputs didn't change are marked
+    "up to date" and not run, and the graph is updated with what every job
+    that ran read.
+
+    Args:
+        jobs (list): Job objects, see discover.
+        processes (int): number of concurrent jobs, defaults to the number of cores.
+        log_dir (str): where each job's output is written.
+        timeout (float): seconds after which a job is killed.
+        on_done (callable): called with each job as it finishes.
+        trace_dir (str): write a phase trace of every job to this folder.
+        trace_format (str): "json" or "chrome".
+        graph (socviz.graph.BuildGraph): skip the jobs that are up to date.
+        force (bool): run every job, but still record it in `graph`.
+    '''
+    processes = processes or os.cpu_count()
+    log_dir = log_dir or os.path.join(REPO_ROOT, ".build", "logs")
+    os.makedirs(log_dir, exist_ok=True)
+    lock = threading.Lock()
+
+    todo = []
+    for job in jobs:
+        if graph is None:
+            todo.append(job)
+            continue
+        job.reason = "forced" if force else graph.stale(job.name)
+        if job.reason is None:
+            job.status = "up to date"
+        else:
+            todo.append(job)
+
+    def run(job):
+        deps_file = _deps_file(job, log_dir) if graph is not None else None
+        if deps_file and os.path.exists(deps_file):
+            os.remove(deps_file)
+        _execute(job, log_dir, timeout, trace_dir, trace_format, deps_file)
+        if graph is not None:
+            with lock:
+                try:
+                    with open(deps_file, encoding="utf-8") as f:
+                        manifest = json.load(f)
+                except (OSError, ValueError):
+                    manifest = None
+                # -- A failed job is rebuilt next time, whatever changed.
+                if job.status == "ok" and manifest is not None:
+                    graph.update(job.name, manifest)
+                else:
+                    graph.forget(job.name)
+        if on_done is not None:
+            on_done(job)
+        return job
+
+    try:
+        with ThreadPoolExecutor(max_workers=processes) as pool:
+            list(pool.map(run, todo))
+    finally:
+        if graph is not None:
+            graph.save()
+    return jobs
+
+
+def report(jobs, stream=sys.stdout):
+    '''
+    Print a summary table of the build, slowest jobs first.
+    '''
+    width = max([len(x.name) for x in jobs] + [3])
+    print(f"{'job':<{width}}  {'status':<12} {'wall (s)':>9} {'peak RSS (MB)':>14}", file=stream)
+    for job in sorted(jobs, key=lambda x: -(x.wall_time or 0)):
+        rss = f"{job.max_rss/1024**2:.0f}" if job.max_rss else "-"
+        wall = f"{job.wall_time:.1f}" if job.wall_time is not None else "-"
+        print(f"{job.name:<{width}}  {job.status:<12} {wall:>9} {rss:>14}", file=stream)
+    failed = [x for x in jobs if x.status not in ("ok", "pending", "up to date")]
+    for job in failed:
+        print(f"\n--- {job.name} failed, last lines of {job.log_path}:", file=stream)
+        with open(job.log_path, encoding="utf-8", errors="replace") as f:
+            print("".join(f.readlines()[-15:]), file=stream)
+    return failed
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Build the Viz of the Week visuals in parallel.")
+    parser.add_argument("patterns", nargs="*", help="only build jobs whose path contains one of these")
+    parser.add_argument("-j", "--jobs", type=int, default=None, help="concurrent jobs (default: all cores)")
+    parser.add_argument("--timeout", type=float, default=None, help="kill jobs after this many seconds")
+    parser.add_argument("--log-dir", default=None, help="where to write per-job logs")
+    parser.add_argument("--list", action="store_true", help="list the jobs and exit")
+    parser.add_argument("--force", action="store_true", help="build every job, even if its inputs didn't change")
+    parser.add_argument("--trace", action="store_true", help="write a phase trace of every job")
+    parser.add_argument("--trace-dir", default=os.path.join(REPO_ROOT, ".build", "traces"), metavar="DIR",
+                        help="where to write the traces (default: .build/traces)")
+    parser.add_argument("--trace-format", choices=["json", "chrome"], default="json", help="format of the traces")
+    parser.add_argument("--run-job", help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.run_job:
+        try:
+            run_job(args.run_job)
+        except Exception:
+            # -- The default hook reads source lines from disk, traceback
+            # -- reads them from linecache, where the notebook cells are.
+            traceback.print_exc()
+            return 1
+        return 0
+
+    jobs = discover(patterns=args.patterns)
+    if args.list:
+        for job in jobs:
+            print(job.name)
+        return 0
+
+    def progress(job):
+        print(f"[{job.status}] {job.name} ({job.wall_time:.1f}s, {job.reason})", flush=True)
+
+    from socviz.graph import BuildGraph
+
+    start = time.perf_counter()
+    trace_dir = os.path.abspath(args.trace_dir) if args.trace else None
+    build(
+        jobs, processes=args.jobs, log_dir=args.log_dir, timeout=args.timeout, on_done=progress,
+        trace_dir=trace_dir, trace_format=args.trace_format, graph=BuildGraph(), force=args.force
+    )
+    skipped = sum(x.status == "up to date" for x in jobs)
+    print(
+        f"\nBuilt {len(jobs) - skipped} of {len(jobs)} visuals in {time.perf_counter() - start:.1f}s"
+        f" ({skipped} up to date)\n"
+    )
+    failed = report(jobs)
+    if trace_dir:
+        from socviz import trace
+        paths = [trace.trace_path(trace_dir, x.name, args.trace_format) for x in jobs if x.status != "up to date"]
+        paths = [x for x in paths if os.path.exists(x)]
+        if paths:
+            print()
+            trace.summarize(paths, top=10)
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,71 @@
+'''
+Team crests placed without an axes per crest.
+
+The tables and bar charts put every crest on its own inset axes
+(fig.add_axes, imshow of the full-size logo, axis("off")), so a figure with
+60 crests lays out and draws 60 extra axes, each resampling a large image.
+add_logos places all the crests of a chart as AnnotationBbox artists of the
+chart's axes, anchored in data coordinates. Each logo is resized once to its
+final pixel size at the output dpi (see LogoStore.thumbnail) and drawn 1:1.
+
+The box follows the fig.add_axes([x, y, box, box], anchor="W") convention
+of the scripts: `xy` is the lower left corner of a box of `box` figure
+fraction, and the crest is fitted in it, against its left edge.
+
+Usage:
+    logos = LogoStore()
+    add_logos(ax, data["teamId"], [(i - .35, -ymax*.175) for i in data.index], box=.03, logos=logos)
+'''
+
+import numpy as np
+from matplotlib import rcParams
+from matplotlib.offsetbox import AnnotationBbox, OffsetImage
+
+from socviz.logos import LogoStore
+
+
+def add_logos(ax, team_ids, xy, box=.03, logos=None, mode="LA", dpi=None, base_url=None,
+              xycoords="data", zorder=5):
+    '''
+    Add the crests of `team_ids` to `ax`.
+
+    Args:
+        ax: the axes the anchors are in.
+        team_ids (list): team ids (or logo URLs), one per crest.
+        xy (list): the (x, y) anchor of every crest, in `xycoords`.
+        box (float or tuple): the size of the box of every crest, in figure
+            fraction, (width, height) or the same for both.
+        logos (LogoStore): where the crests come from, a new one by default.
+        mode (str): PIL mode the crests are converted to, "LA" for greyscale.
+        dpi (float): the resolution the figure will be saved at, crests are
+            resized for it. Defaults to savefig.dpi.
+        xycoords: coordinates of `xy`, see Axes.annotate.
+        zorder (float): zorder of the crests.
+
+    Returns:
+        list: one AnnotationBbox per crest.
+    '''
+    logos = LogoStore() if logos is None else logos
+    if dpi is None:
+        dpi = rcParams["savefig.dpi"]
+    if dpi == "figure":
+        dpi = ax.figure.dpi
+    box_w, box_h = (box, box) if np.isscalar(box) else box
+    fig_w, fig_h = ax.figure.get_size_inches()
+    # -- The box in inches, and in pixels once saved.
+    box_w, box_h = box_w*fig_w, box_h*fig_h
+    size = (box_w*dpi, box_h*dpi)
+
+    artists = []
+    for team_id, anchor in zip(team_ids, xy):
+        thumb = logos.thumbnail(team_id, size, mode=mode, base_url=base_url)
+        # -- zoom 72/dpi draws every thumbnail pixel as one pixel at `dpi`.
+        image = OffsetImage(np.asarray(thumb.convert("RGBA")), zoom=72/dpi)
+        artist = AnnotationBbox(
+            image, anchor, xycoords=xycoords,
+            xybox=(0, box_h*72/2), boxcoords="offset points", box_alignment=(0, .5),
+            frameon=False, pad=0, annotation_clip=False, zorder=zorder
+        )
+        ax.add_artist(artist)
+        artists.append(artist)
+    return artists
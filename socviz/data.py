@@ -0,0 +1,185 @@
+'''
+Columnar cache for the data/*.csv inputs.
+
+The first read_csv of a file parses it with pandas and stores every column as
+a typed .npy file in a <name>.cols/ folder next to the CSV. String columns are
+dictionary-encoded (integer codes + the distinct values). Later reads
+memory-map those arrays instead of re-parsing text, and the cache is rebuilt
+automatically when the CSV's contents (SHA-256) or the read options change.
+
+Usage:
+    from socviz.data import read_csv
+    df = read_csv("data/10312022_epl_shots.csv", index_col=0)
+'''
+
+import hashlib
+import json
+import os
+import shutil
+
+import numpy as np
+import pandas as pd
+
+
+CACHE_SUFFIX = ".cols"
+CACHE_VERSION = 1
+
+
+def cache_dir(path):
+    '''
+    data/name.csv -> data/name.cols
+    '''
+    return os.path.splitext(path)[0] + CACHE_SUFFIX
+
+
+def file_hash(path):
+    sha256 = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            sha256.update(block)
+    return sha256.hexdigest()
+
+
+def _options_key(kwargs):
+    return json.dumps(kwargs, sort_keys=True, default=repr)
+
+
+# ------------------------------------------------------------
+# Writing
+
+def _save_column(folder, i, series):
+    '''
+    Store a column and return its metadata.
+    '''
+    values = series.to_numpy()
+    base = os.path.join(folder, f"{i}")
+    if series.dtype.kind in "biuf":
+        np.save(f"{base}.npy", values)
+        return {"kind": "numeric"}
+    if series.dtype.kind == "M":
+        np.save(f"{base}.npy", values.astype("datetime64[ns]").view("int64"))
+        return {"kind": "datetime", "tz": str(series.dt.tz) if series.dt.tz else None}
+    codes, uniques = pd.factorize(series)
+    if all(isinstance(x, str) for x in uniques):
+        np.save(f"{base}.npy", codes.astype(np.int32))
+        np.save(f"{base}.values.npy", np.asarray(uniques, dtype=str))
+        return {"kind": "string"}
+    # -- Mixed objects (bools with NaN, numbers and strings...) are pickled as is.
+    np.save(f"{base}.npy", values.astype(object), allow_pickle=True)
+    return {"kind": "object"}
+
+
+def write_cache(df, path, kwargs, csv_hash):
+    '''
+    Write `df` as the columnar cache of `path`.
+    '''
+    folder = cache_dir(path)
+    tmp_folder = f"{folder}.{os.getpid()}.tmp"
+    shutil.rmtree(tmp_folder, ignore_errors=True)
+    os.makedirs(tmp_folder)
+
+    index_names = None
+    if not isinstance(df.index, pd.RangeIndex) or df.index.start != 0 or df.index.step != 1:
+        index_names = list(df.index.names)
+        df = df.reset_index()
+
+    columns = []
+    for i, name in enumerate(df.columns):
+        meta = _save_column(tmp_folder, i, df.iloc[:, i])
+        meta.update(name=name, dtype=str(df.dtypes.iloc[i]))
+        columns.append(meta)
+
+    stat = os.stat(path)
+    meta = {
+        "version": CACHE_VERSION,
+        "sha256": csv_hash,
+        "mtime": stat.st_mtime,
+        "size": stat.st_size,
+        "options": _options_key(kwargs),
+        "rows": len(df),
+        "index": index_names,
+        "columns": columns
+    }
+    with open(os.path.join(tmp_folder, "meta.json"), "w", encoding="utf-8") as f:
+        json.dump(meta, f, default=str)
+    shutil.rmtree(folder, ignore_errors=True)
+    os.replace(tmp_folder, folder)
+
+
+# ------------------------------------------------------------
+# Reading
+
+def _read_meta(path, kwargs):
+    '''
+    Return the cache metadata if it is still valid for `path`, else None.
+    '''
+    try:
+        with open(os.path.join(cache_dir(path), "meta.json"), encoding="utf-8") as f:
+            meta = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if meta.get("version") != CACHE_VERSION or meta["options"] != _options_key(kwargs):
+        return None
+    stat = os.stat(path)
+    if (meta["mtime"], meta["size"]) == (stat.st_mtime, stat.st_size):
+        return meta
+    # -- Only hash the file when its stat changed.
+    return meta if meta["sha256"] == file_hash(path) else None
+
+
+def _load_column(folder, i, meta, mmap_mode, categorical):
+    base = os.path.join(folder, f"{i}")
+    kind = meta["kind"]
+    if kind == "numeric":
+        return np.load(f"{base}.npy", mmap_mode=mmap_mode)
+    if kind == "datetime":
+        values = pd.to_datetime(np.load(f"{base}.npy", mmap_mode=mmap_mode).view("datetime64[ns]"))
+        return values.tz_localize("UTC").tz_convert(meta["tz"]) if meta["tz"] else values
+    if kind == "string":
+        codes = np.load(f"{base}.npy", mmap_mode=mmap_mode)
+        uniques = np.load(f"{base}.values.npy").astype(object)
+        values = pd.Categorical.from_codes(codes, categories=uniques)
+        return values if categorical else np.asarray(values, dtype=object)
+    return np.load(f"{base}.npy", allow_pickle=True)
+
+
+def read_cache(path, meta, mmap_mode="c", categorical=False):
+    folder = cache_dir(path)
+    data = {
+        i: _load_column(folder, i, column, mmap_mode, categorical)
+        for i, column in enumerate(meta["columns"])
+    }
+    df = pd.DataFrame(data, copy=False)
+    df.columns = [x["name"] for x in meta["columns"]]
+    if meta["index"] is not None:
+        df = df.set_index(df.columns[:len(meta["index"])].tolist())
+        df.index.names = meta["index"]
+    return df
+
+
+def read_csv(path, mmap_mode="c", categorical=False, refresh=False, **kwargs):
+    '''
+    Drop-in replacement for pd.read_csv backed by a columnar cache.
+
+    Args:
+        path (str): the CSV file.
+        mmap_mode (str): how the .npy columns are opened. The default "c" is
+            copy-on-write, so frames can still be modified in place. None loads
+            them in memory.
+        categorical (bool): return string columns as pd.Categorical instead of object.
+        refresh (bool): rebuild the cache even if it is up to date.
+        **kwargs: passed to pd.read_csv when (re)building the cache.
+
+    Returns:
+        pd.DataFrame
+    '''
+    meta = None if refresh else _read_meta(path, kwargs)
+    if meta is None:
+        df = pd.read_csv(path, **kwargs)
+        try:
+            write_cache(df, path, kwargs, file_hash(path))
+        except OSError:
+            # -- Read-only checkouts still work, just without the cache.
+            return df
+        meta = _read_meta(path, kwargs)
+    return read_cache(path, meta, mmap_mode=mmap_mode, categorical=categorical)
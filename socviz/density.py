@@ -0,0 +1,157 @@
+'''
+Binned Gaussian KDE for touch heatmaps.
+
+pitch.kdeplot evaluates a full Gaussian KDE and draws a stack of filled
+contours for every panel. TouchDensity instead bins the touches of every
+group onto a fixed pitch grid with one bincount and smooths the grids with a
+Gaussian in Fourier space (the grid is zero padded by `cut` bandwidths, so
+nothing wraps around the edges). Grids are cached per group and bandwidth and
+drawn with a single imshow.
+
+Usage:
+    density = TouchDensity(data, by='playerId')
+    density.draw(ax, 122926, cmap='SOC')
+    grids = density.grids(bandwidth=5)          # every player in one batch
+'''
+
+import numpy as np
+
+from socviz.groups import GroupedFrame
+
+
+def scott_bandwidth(x, y):
+    '''
+    Scott's rule per axis (the default of gaussian_kde, ignoring the
+    covariance between x and y).
+    '''
+    n = len(x)
+    if n < 2:
+        return 1., 1.
+    factor = n**(-1/6)
+    bw_x = np.std(x, ddof=1)*factor
+    bw_y = np.std(y, ddof=1)*factor
+    return (bw_x if bw_x > 0 else 1.), (bw_y if bw_y > 0 else 1.)
+
+
+def gaussian_smooth(counts, sigma, cut=4):
+    '''
+    Convolve grids of counts with a Gaussian through the FFT.
+
+    Args:
+        counts (np.ndarray): (..., rows, cols) grids.
+        sigma (tuple): the Gaussian's standard deviation in bins, (rows, cols).
+        cut (float): zero padding on each side, in standard deviations.
+    '''
+    rows, cols = counts.shape[-2:]
+    pad_r = int(np.ceil(cut*sigma[0]))
+    pad_c = int(np.ceil(cut*sigma[1]))
+    shape = (rows + 2*pad_r, cols + 2*pad_c)
+    padded = np.zeros(counts.shape[:-2] + shape)
+    padded[..., pad_r:pad_r + rows, pad_c:pad_c + cols] = counts
+
+    # -- The Fourier transform of a Gaussian is a Gaussian, no kernel to build.
+    freq_r = np.fft.fftfreq(shape[0])[:, None]
+    freq_c = np.fft.rfftfreq(shape[1])[None, :]
+    transfer = np.exp(-2*np.pi**2*((freq_r*sigma[0])**2 + (freq_c*sigma[1])**2))
+    smooth = np.fft.irfft2(np.fft.rfft2(padded)*transfer, s=shape)
+    return smooth[..., pad_r:pad_r + rows, pad_c:pad_c + cols]
+
+
+class TouchDensity:
+    '''
+    Smoothed touch densities per group on a fixed grid.
+
+    Args:
+        data (pd.DataFrame): one row per touch, in axes coordinates.
+        by (str or list): the group column(s), e.g. 'playerId' or ['match_id', 'playerId'].
+        x, y (str): the columns along the horizontal and vertical axes.
+        extent (tuple): (x_min, x_max, y_min, y_max) of the grid, the pitch.
+        bins (tuple): number of cells along x and y.
+        cut (float): padding against wrap-around, in bandwidths.
+    '''
+
+    def __init__(self, data, by="playerId", x="x", y="y", extent=(0, 100, 0, 100), bins=(100, 100), cut=4):
+        self.groups = GroupedFrame(data, by)
+        self.extent = extent
+        self.bins = bins
+        self.cut = cut
+        self._index = {key: i for i, key in enumerate(self.groups.keys())}
+        self.x = self.groups.frame[x].to_numpy(dtype=float)
+        self.y = self.groups.frame[y].to_numpy(dtype=float)
+        self._counts = None
+        self._cache = {}
+
+    @property
+    def cell_size(self):
+        x_min, x_max, y_min, y_max = self.extent
+        return (x_max - x_min)/self.bins[0], (y_max - y_min)/self.bins[1]
+
+    def counts(self):
+        '''
+        Touch counts of every group, shape (groups, y bins, x bins).
+        '''
+        if self._counts is not None:
+            return self._counts
+        x_min, x_max, y_min, y_max = self.extent
+        nx, ny = self.bins
+        sizes = [end - start for start, end in (self.groups.bounds(key) for key in self._index)]
+        codes = np.repeat(np.arange(len(sizes)), sizes)
+        ix = np.floor((self.x - x_min)/(x_max - x_min)*nx).astype(np.int64)
+        iy = np.floor((self.y - y_min)/(y_max - y_min)*ny).astype(np.int64)
+        # -- Touches on the far touchline/goal line go in the last cell.
+        ix[self.x == x_max] = nx - 1
+        iy[self.y == y_max] = ny - 1
+        inside = (ix >= 0) & (ix < nx) & (iy >= 0) & (iy < ny)
+        cells = (codes*ny + iy)*nx + ix
+        counts = np.bincount(cells[inside], minlength=len(sizes)*nx*ny)
+        self._counts = counts.reshape(len(sizes), ny, nx).astype(float)
+        return self._counts
+
+    def _sigma(self, key, bandwidth):
+        if bandwidth is None or bandwidth == "scott":
+            start, end = self.groups.bounds(key)
+            bandwidth = scott_bandwidth(self.x[start:end], self.y[start:end])
+        bw_x, bw_y = (bandwidth, bandwidth) if np.isscalar(bandwidth) else bandwidth
+        size_x, size_y = self.cell_size
+        return bw_y/size_y, bw_x/size_x
+
+    def grid(self, key, bandwidth="scott"):
+        '''
+        The density of one group (rows along y), cached per bandwidth.
+
+        Args:
+            bandwidth: "scott", a standard deviation in data units, or (x, y).
+        '''
+        cache_key = (key, bandwidth if np.isscalar(bandwidth) or bandwidth is None else tuple(bandwidth))
+        if cache_key not in self._cache:
+            counts = self.counts()[self._index[key]]
+            self._cache[cache_key] = gaussian_smooth(counts, self._sigma(key, bandwidth), self.cut)
+        return self._cache[cache_key]
+
+    def grids(self, bandwidth="scott"):
+        '''
+        The densities of every group. A fixed bandwidth smooths all the
+        grids with a single batched FFT.
+        '''
+        if bandwidth is None or bandwidth == "scott":
+            return {key: self.grid(key, bandwidth) for key in self._index}
+        bandwidth = bandwidth if np.isscalar(bandwidth) else tuple(bandwidth)
+        smooth = gaussian_smooth(self.counts(), self._sigma(None, bandwidth), self.cut)
+        result = {}
+        for key, i in self._index.items():
+            self._cache[(key, bandwidth)] = smooth[i]
+            result[key] = smooth[i]
+        return result
+
+    def draw(self, ax, key, bandwidth="scott", cmap="SOC", zorder=-1, **kwargs):
+        '''
+        Draw the density of a group with a single imshow over the grid's extent.
+        '''
+        grid = self.grid(key, bandwidth)
+        # -- Keep the pitch's aspect, imshow would otherwise reset it.
+        kwargs.setdefault("aspect", ax.get_aspect())
+        return ax.imshow(
+            grid, extent=self.extent, origin="lower", cmap=cmap,
+            vmin=0, vmax=grid.max() if grid.max() > 0 else 1,
+            interpolation="bilinear", zorder=zorder, **kwargs
+        )
@@ -0,0 +1,218 @@
+'''
+Streaming reader for WhoScored match-centre JSON.
+
+The match files are one big object whose "events" key holds the list of
+every on-ball action. iter_events walks the document incrementally, skips
+everything else without building it, and yields one event at a time.
+read_events builds typed column arrays (x, y, playerId, isTouch, ...) and a
+playerId -> row index in that same single pass.
+
+Usage:
+    events = read_events("data/brighton_leicester_09052022.json")
+    touches = events.to_frame(player_ids=[122926, 71824], touches_only=True)
+'''
+
+import json
+import re
+
+import numpy as np
+import pandas as pd
+
+
+CHUNK_SIZE = 1 << 16
+
+_WHITESPACE = re.compile(r"\s*")
+_STRUCTURE = re.compile(r'["\[\]{}]')
+_STRING = re.compile(r'"(?:[^"\\]|\\.)*"', re.DOTALL)
+
+
+class _Stream:
+    '''
+    A text buffer that is refilled from the file on demand.
+    '''
+
+    def __init__(self, f):
+        self.f = f
+        self.buf = ""
+        self.pos = 0
+        self.eof = False
+        self.decoder = json.JSONDecoder()
+
+    def fill(self):
+        chunk = self.f.read(CHUNK_SIZE)
+        if not chunk:
+            self.eof = True
+            return False
+        # -- Drop what we've consumed so the buffer stays small.
+        self.buf = self.buf[self.pos:] + chunk
+        self.pos = 0
+        return True
+
+    def peek(self):
+        while True:
+            self.pos = _WHITESPACE.match(self.buf, self.pos).end()
+            if self.pos < len(self.buf):
+                return self.buf[self.pos]
+            if not self.fill():
+                raise ValueError("Unexpected end of JSON document.")
+
+    def expect(self, char):
+        if self.peek() != char:
+            raise ValueError(f"Expected '{char}' at position {self.pos}, got '{self.buf[self.pos]}'.")
+        self.pos += 1
+
+    def decode(self):
+        '''
+        Decode the next complete JSON value.
+        '''
+        self.peek()
+        while True:
+            try:
+                value, end = self.decoder.raw_decode(self.buf, self.pos)
+                # -- A number could continue in the next chunk.
+                if end == len(self.buf) and not self.eof and not isinstance(value, (dict, list, str)):
+                    raise json.JSONDecodeError("truncated", self.buf, end)
+                self.pos = end
+                return value
+            except json.JSONDecodeError:
+                if not self.fill():
+                    raise
+
+    def skip(self):
+        '''
+        Move past the next JSON value without building it.
+        '''
+        if self.peek() not in "[{":
+            self.decode()
+            return
+        depth = 0
+        while True:
+            match = _STRUCTURE.search(self.buf, self.pos)
+            if match is None:
+                self.pos = len(self.buf)
+                if not self.fill():
+                    raise ValueError("Unexpected end of JSON document.")
+                continue
+            char = match.group()
+            if char == '"':
+                string = _STRING.match(self.buf, match.start())
+                if string is None:
+                    # -- The string continues in the next chunk.
+                    self.pos = match.start()
+                    if not self.fill():
+                        raise ValueError("Unterminated string in JSON document.")
+                    continue
+                self.pos = string.end()
+                continue
+            self.pos = match.end()
+            depth += 1 if char in "[{" else -1
+            if depth == 0:
+                return
+
+
+def iter_events(path, key="events"):
+    '''
+    Yield the items of the top-level `key` list one at a time.
+    '''
+    with open(path, encoding="utf-8") as f:
+        stream = _Stream(f)
+        stream.expect("{")
+        while stream.peek() != "}":
+            name = stream.decode()
+            stream.expect(":")
+            if name != key:
+                stream.skip()
+            else:
+                stream.expect("[")
+                while stream.peek() != "]":
+                    yield stream.decode()
+                    if stream.peek() == ",":
+                        stream.pos += 1
+                stream.pos += 1
+            if stream.peek() == ",":
+                stream.pos += 1
+
+
+# -- Column name -> (dtype, missing value). Nested {"displayName": ...} dicts
+# -- like type or outcomeType are flattened to their display name.
+COLUMNS = {
+    "id": (float, np.nan),
+    "eventId": (np.int64, -1),
+    "minute": (np.int64, -1),
+    "second": (np.int64, -1),
+    "expandedMinute": (np.int64, -1),
+    "period": (object, None),
+    "teamId": (np.int64, -1),
+    "playerId": (np.int64, -1),
+    "x": (float, np.nan),
+    "y": (float, np.nan),
+    "endX": (float, np.nan),
+    "endY": (float, np.nan),
+    "type": (object, None),
+    "outcomeType": (object, None),
+    "isTouch": (bool, False),
+    "isShot": (bool, False),
+    "isGoal": (bool, False),
+}
+
+
+class EventTable:
+    '''
+    Column arrays of a match's events plus a playerId -> rows index.
+    '''
+
+    def __init__(self, columns, player_index):
+        self.columns = columns
+        self.player_index = player_index
+
+    def __len__(self):
+        return len(self.columns["playerId"])
+
+    def __getitem__(self, column):
+        return self.columns[column]
+
+    def rows(self, player_ids=None, touches_only=False):
+        '''
+        Row positions of the given players (in that order), or of every event.
+        '''
+        if player_ids is None:
+            rows = np.arange(len(self))
+        else:
+            empty = np.array([], dtype=np.int64)
+            rows = np.concatenate([self.player_index.get(int(x), empty) for x in player_ids] + [empty])
+        if touches_only:
+            rows = rows[self.columns["isTouch"][rows]]
+        return rows
+
+    def to_frame(self, columns=None, player_ids=None, touches_only=False):
+        '''
+        DataFrame of the selected events and columns.
+        '''
+        columns = list(self.columns) if columns is None else columns
+        rows = self.rows(player_ids, touches_only)
+        return pd.DataFrame({x: self.columns[x][rows] for x in columns})
+
+
+def read_events(path, columns=COLUMNS, key="events"):
+    '''
+    Stream the events of a WhoScored match file into an EventTable.
+
+    Args:
+        path (str): the match JSON.
+        columns (dict): column name -> (dtype, missing value) to extract.
+    '''
+    values = {x: [] for x in columns}
+    player_rows = {}
+    for row, event in enumerate(iter_events(path, key)):
+        for name, (_, missing) in columns.items():
+            value = event.get(name, missing)
+            if isinstance(value, dict):
+                value = value.get("displayName")
+            values[name].append(value)
+        player_id = event.get("playerId")
+        if player_id is not None:
+            player_rows.setdefault(int(player_id), []).append(row)
+
+    arrays = {x: np.array(values[x], dtype=columns[x][0]) for x in columns}
+    player_index = {k: np.array(v, dtype=np.int64) for k, v in player_rows.items()}
+    return EventTable(arrays, player_index)
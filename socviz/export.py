@@ -0,0 +1,130 @@
+'''
+Export a figure as opaque and transparent PNGs from a single draw.
+
+Every visual is saved twice at 600 dpi, once over the background colour and
+once with a transparent background. Instead of drawing the figure twice,
+save_variants rasterizes it once with transparent patches and composites the
+facecolor underneath for the opaque file (figures with axes of another
+colour are drawn a second time for it). Both files are encoded in parallel.
+
+Usage:
+    save_variants(fig, "figures/07112022_epl_predictable.png", facecolor="#EFE9E6")
+    # -> figures/07112022_epl_predictable.png & figures/07112022_epl_predictable_tr.png
+'''
+
+import io
+import os
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import ExitStack
+
+import numpy as np
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.colors import to_rgba
+from PIL import Image
+
+from socviz.trace import phase
+
+
+def transparent_name(path, suffix="_tr"):
+    '''
+    figures/name.png -> figures/name_tr.png
+    '''
+    root, ext = os.path.splitext(path)
+    return f"{root}{suffix}{ext}"
+
+
+def render_rgba(fig, dpi=600, bbox_inches="tight", pad_inches=0.1, transparent=True, facecolor="none", **kwargs):
+    '''
+    Draw the figure once, with transparent figure and axes patches unless
+    `transparent` is False (then over `facecolor`, axes backgrounds kept).
+
+    Returns:
+        np.ndarray: (height, width, 4) uint8 array, not premultiplied.
+    '''
+    original_canvas = fig.canvas
+    with ExitStack() as stack:
+        if transparent:
+            # -- Same as savefig(transparent=True): hide the figure and axes backgrounds.
+            facecolor = "none"
+            patches = [fig.patch] + [ax.patch for ax in fig.axes]
+            for patch in patches:
+                stack.callback(patch.set_edgecolor, patch.get_edgecolor())
+                stack.callback(patch.set_facecolor, patch.get_facecolor())
+                patch.set_facecolor("none")
+                patch.set_edgecolor("none")
+        stack.callback(fig.set_canvas, original_canvas)
+
+        canvas = FigureCanvasAgg(fig)
+        fig.savefig(
+            io.BytesIO(), format="rgba", dpi=dpi,
+            bbox_inches=bbox_inches, pad_inches=pad_inches,
+            facecolor=facecolor, edgecolor="none", **kwargs
+        )
+        # -- The Agg renderer keeps the buffer of the last draw (at the tight size).
+        return np.array(canvas.buffer_rgba())
+
+
+def composite(rgba, facecolor):
+    '''
+    Flatten an RGBA image onto a solid background colour.
+    '''
+    image = Image.fromarray(rgba)
+    background = tuple(int(round(x*255)) for x in to_rgba(facecolor))
+    return Image.alpha_composite(Image.new("RGBA", image.size, background), image)
+
+
+def _has_own_background(ax, facecolor):
+    '''
+    Whether the axes background differs from `facecolor` (and shows).
+    Axes.draw only paints the patch with the axis and the frame on, so the
+    axis("off") logo axes don't count.
+    '''
+    if not (ax.get_visible() and ax.axison and ax.get_frame_on() and ax.patch.get_visible()):
+        return False
+    color = to_rgba(ax.patch.get_facecolor())
+    return color[3] > 0 and color != to_rgba(facecolor)
+
+
+def _encode(image, path, dpi):
+    image.save(path, dpi=(dpi, dpi))
+    return path
+
+
+def save_variants(fig, path, facecolor="auto", transparent_path=None, dpi=600,
+                  bbox_inches="tight", pad_inches=0.1, **kwargs):
+    '''
+    Save the opaque and transparent versions of a figure from a single draw.
+
+    Args:
+        fig (Figure): the figure to export.
+        path (str): file name of the opaque image.
+        facecolor (str): background of the opaque image, "auto" uses the figure's.
+            Axes backgrounds are dropped from the transparent image like in
+            savefig(transparent=True) and kept in the opaque one.
+        transparent_path (str): file name of the transparent image, defaults to
+            path with a _tr suffix. False only writes the opaque image.
+        dpi (int): output resolution.
+
+    Returns:
+        list: the written paths.
+    '''
+    if facecolor == "auto":
+        facecolor = fig.get_facecolor()
+    if transparent_path is None:
+        transparent_path = transparent_name(path)
+
+    options = dict(dpi=dpi, bbox_inches=bbox_inches, pad_inches=pad_inches, **kwargs)
+    # -- Compositing only restores the figure background, axes with their own
+    # -- colour need the opaque file drawn as is.
+    if any(_has_own_background(ax, facecolor) for ax in fig.axes):
+        opaque = Image.fromarray(render_rgba(fig, transparent=False, facecolor=facecolor, **options))
+        rgba = render_rgba(fig, **options) if transparent_path else None
+    else:
+        rgba = render_rgba(fig, **options)
+        opaque = composite(rgba, facecolor)
+    outputs = [(opaque, path)]
+    if transparent_path:
+        outputs.append((Image.fromarray(rgba), transparent_path))
+
+    with phase("encode"), ThreadPoolExecutor(max_workers=len(outputs)) as pool:
+        return list(pool.map(lambda x: _encode(x[0], x[1], dpi), outputs))
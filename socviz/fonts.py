@@ -0,0 +1,157 @@
+'''
+Register the fonts in assets/fonts and apply the SOC stylesheet in one step.
+
+Reading every font file with FreeType on each run is the slow part of
+fm.fontManager.addfont, so the resulting font entries are cached in a JSON
+file keyed on each file's mtime, size and SHA-256. Later runs (and every job
+of a batch build) only rebuild the entries of fonts that changed.
+
+Usage:
+    from socviz import fonts
+    fonts.setup()                       # stylesheet + fonts, Karla by default
+    fonts.setup(family="DM Sans")
+'''
+
+import hashlib
+import json
+import os
+
+import matplotlib.pyplot as plt
+import matplotlib.font_manager as fm
+import matplotlib.text as mtext
+
+
+ASSETS_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "assets")
+FONT_DIR = os.path.join(ASSETS_DIR, "fonts")
+STYLESHEET = os.path.join(ASSETS_DIR, "stylesheets", "soc_base.mplstyle")
+FAMILIES = ["Karla", "DM_Sans", "Nippo", "Comico"]
+
+CACHE_PATH = os.environ.get(
+    "SOC_FONT_CACHE",
+    os.path.join(os.path.expanduser("~"), ".cache", "soc-viz", "fonts.json")
+)
+
+_FIELDS = ["fname", "name", "style", "variant", "weight", "stretch", "size"]
+_registered = set()
+
+
+def font_files(font_dir=FONT_DIR, families=FAMILIES):
+    '''
+    List the .ttf and .otf files of the given family folders.
+    '''
+    files = []
+    for family in families:
+        folder = os.path.join(font_dir, family)
+        for file in sorted(os.listdir(folder)):
+            if file.split(".")[-1].lower() in ("ttf", "otf"):
+                files.append(os.path.join(folder, file))
+    return files
+
+
+def _sha256(path):
+    with open(path, "rb") as f:
+        return hashlib.sha256(f.read()).hexdigest()
+
+
+def _read_cache(cache_path):
+    try:
+        with open(cache_path, encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def _write_cache(cache_path, cache):
+    os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+    tmp_path = f"{cache_path}.{os.getpid()}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(cache, f)
+    os.replace(tmp_path, cache_path)
+
+
+def _entry_from_file(path):
+    font = fm.ft2font.FT2Font(path)
+    entry = fm.ttfFontProperty(font)
+    return {x: getattr(entry, x) for x in _FIELDS}
+
+
+def font_entries(files=None, cache_path=CACHE_PATH):
+    '''
+    Return the font entries (as dicts) for `files`, parsing only the fonts
+    that are not in the cache or have changed since.
+    '''
+    files = font_files() if files is None else files
+    cache = _read_cache(cache_path)
+    entries = []
+    dirty = False
+    for path in files:
+        stat = os.stat(path)
+        cached = cache.get(path)
+        if cached is not None and (cached["mtime"], cached["size"]) != (stat.st_mtime, stat.st_size):
+            # -- Touched but possibly identical (e.g. a fresh checkout).
+            sha256 = _sha256(path)
+            if cached["sha256"] != sha256:
+                cached = None
+            else:
+                cached.update(mtime=stat.st_mtime, size=stat.st_size)
+                dirty = True
+        if cached is None:
+            cached = {
+                "mtime": stat.st_mtime,
+                "size": stat.st_size,
+                "sha256": _sha256(path),
+                "entry": _entry_from_file(path)
+            }
+            cache[path] = cached
+            dirty = True
+        entries.append(cached["entry"])
+    if dirty:
+        _write_cache(cache_path, cache)
+    return entries
+
+
+def register_fonts(files=None, cache_path=CACHE_PATH):
+    '''
+    Add the fonts to matplotlib's font manager (once per process).
+    '''
+    for entry in font_entries(files, cache_path):
+        if entry["fname"] in _registered:
+            continue
+        fm.fontManager.ttflist.append(fm.FontEntry(**entry))
+        _registered.add(entry["fname"])
+    if hasattr(fm.fontManager, "_findfont_cached"):
+        fm.fontManager._findfont_cached.cache_clear()
+
+
+def _register_on_first_layout():
+    '''
+    Defer register_fonts until the first piece of text is laid out. Every
+    text draw (and tight bbox computation) goes through Text._get_layout.
+    '''
+    original = mtext.Text._get_layout
+
+    def _get_layout(self, renderer):
+        mtext.Text._get_layout = original
+        register_fonts()
+        return original(self, renderer)
+
+    mtext.Text._get_layout = _get_layout
+
+
+def setup(style=True, family=None, lazy=True):
+    '''
+    Apply the SOC stylesheet and make the repository fonts available.
+
+    Args:
+        style (bool): apply assets/stylesheets/soc_base.mplstyle.
+        family (str): font family to use, the stylesheet defaults to Karla.
+        lazy (bool): only register the fonts when text is first laid out.
+    '''
+    if style:
+        plt.style.use(STYLESHEET)
+    if family is not None:
+        plt.rcParams["font.family"] = family
+    if lazy:
+        _register_on_first_layout()
+    else:
+        register_fonts()
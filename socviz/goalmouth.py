@@ -0,0 +1,95 @@
+'''
+Goal-mouth shot placement histograms for every group of shots at once.
+
+Shot maps split the goal into a grid_x by grid_y grid and show the share of a
+team's shots that ended up in each cell. GoalMouthBins rescales the shot
+coordinates once, then bins every group (match and team, player...) in a
+single bincount per grid size. Each grid is cached, so asking for another
+group is an index lookup.
+
+Usage:
+    bins = GoalMouthBins(df, by=["match_id", "team_id"])
+    shares = bins.get((3552651, 5811), grid_x=6, grid_y=2)   # x-major, like the plot's cells
+    x, y = bins.points((3552651, 5811))                      # shots in goal units
+'''
+
+import numpy as np
+
+from socviz.groups import GroupedFrame
+
+
+# -- The goal is drawn 24 units wide and 8 high. Shot coordinates come
+# -- scaled to 2.1 units wide and .7 high.
+GOAL_WIDTH = 24
+GOAL_HEIGHT = 8
+DATA_WIDTH = 2.1
+DATA_HEIGHT = .7
+
+
+def grid_edges(size, divisions):
+    '''
+    Cell edges along one side of the goal, same as the range() the plots draw.
+    '''
+    return np.arange(0, size + 1, int(size / divisions))
+
+
+class GoalMouthBins:
+    '''
+    Shot placement shares per group and grid size.
+
+    Args:
+        data (pd.DataFrame): one row per shot on target.
+        by (str or list): the group column(s), e.g. ["match_id", "team_id"] or "player_id".
+        x, y (str): the shot coordinate columns.
+    '''
+
+    def __init__(self, data, by=("match_id", "team_id"), x="x", y="y"):
+        self.groups = GroupedFrame(data, by)
+        self._index = {key: i for i, key in enumerate(self.groups.keys())}
+        sizes = [end - start for start, end in (self.groups.bounds(key) for key in self._index)]
+        self._codes = np.repeat(np.arange(len(sizes)), sizes)
+        self._totals = np.array(sizes, dtype=float)
+        self.x = self.groups.frame[x].to_numpy(dtype=float)*GOAL_WIDTH/DATA_WIDTH
+        self.y = self.groups.frame[y].to_numpy(dtype=float)*GOAL_HEIGHT/DATA_HEIGHT
+        self._cache = {}
+
+    def __contains__(self, key):
+        return key in self._index
+
+    def histograms(self, grid_x=6, grid_y=2):
+        '''
+        Shot shares of every group, shape (groups, cells along x, cells along y).
+
+        Cells are right-closed like pd.cut, and shots outside the goal still
+        count towards each group's total.
+        '''
+        if (grid_x % 2 != 0) | (grid_y % 2 != 0):
+            raise ValueError("grid_x and grid_y must be even integers.")
+        if (grid_x, grid_y) in self._cache:
+            return self._cache[(grid_x, grid_y)]
+
+        edges_x = grid_edges(GOAL_WIDTH, grid_x)
+        edges_y = grid_edges(GOAL_HEIGHT, grid_y)
+        nx, ny = len(edges_x) - 1, len(edges_y) - 1
+        ix = np.searchsorted(edges_x, self.x, side="left") - 1
+        iy = np.searchsorted(edges_y, self.y, side="left") - 1
+        inside = (ix >= 0) & (ix < nx) & (iy >= 0) & (iy < ny)
+
+        cells = (self._codes*nx + ix)*ny + iy
+        counts = np.bincount(cells[inside], minlength=len(self._totals)*nx*ny)
+        shares = counts.reshape(len(self._totals), nx, ny)/self._totals[:, None, None]
+        self._cache[(grid_x, grid_y)] = shares
+        return shares
+
+    def get(self, key, grid_x=6, grid_y=2):
+        '''
+        Shares of one group, cells ordered by x and then by y.
+        '''
+        return self.histograms(grid_x, grid_y)[self._index[key]].ravel()
+
+    def points(self, key):
+        '''
+        The shots of one group in goal units.
+        '''
+        start, end = self.groups.bounds(key)
+        return self.x[start:end], self.y[start:end]
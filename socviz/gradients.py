@@ -0,0 +1,91 @@
+'''
+Gradient lines and fills drawn as a single collection.
+
+Colouring a series segment by segment (one fill_between or plot call per
+segment, with a colour from a fader) creates thousands of artists per chart.
+gradient_line and gradient_fill build every segment at once and let a
+colormap colour them, so a whole series is one LineCollection or
+PolyCollection.
+
+Usage:
+    cmap = two_color_cmap('#00285e', '#97c1e7')
+    gradient_fill(ax, df['X'], df['Y_for'], df['Y_ag'], df['Z'], cmap=cmap, vmin=-1, vmax=1, alpha=0.3)
+'''
+
+import numpy as np
+from matplotlib.collections import LineCollection, PolyCollection
+from matplotlib.colors import LinearSegmentedColormap, Normalize
+
+
+def two_color_cmap(low, high, name=None, N=256):
+    '''
+    A colormap that fades linearly (in RGB) from `low` to `high`.
+    '''
+    return LinearSegmentedColormap.from_list(name or f"{low}_{high}", [low, high], N=N)
+
+
+def _norm(values, vmin, vmax):
+    vmin = np.nanmin(values) if vmin is None else vmin
+    vmax = np.nanmax(values) if vmax is None else vmax
+    return Normalize(vmin=vmin, vmax=vmax)
+
+
+def gradient_line(ax, x, y, values, cmap, vmin=None, vmax=None, **kwargs):
+    '''
+    Draw a line whose segment i is coloured by values[i].
+
+    Args:
+        ax (Axes): where to draw.
+        x, y (array): the vertices of the line.
+        values (array): the colour value at each vertex (the last one is unused).
+        cmap (str or Colormap): e.g. two_color_cmap(low, high) or 'SOC'.
+        vmin, vmax (float): the range mapped onto the colormap, defaults to
+            the range of values.
+        **kwargs: passed to LineCollection (linewidths, zorder, alpha...).
+
+    Returns:
+        LineCollection
+    '''
+    points = np.column_stack([np.asarray(x, dtype=float), np.asarray(y, dtype=float)])
+    segments = np.stack([points[:-1], points[1:]], axis=1)
+    values = np.asarray(values, dtype=float)
+    lines = LineCollection(segments, cmap=cmap, norm=_norm(values, vmin, vmax), **kwargs)
+    lines.set_array(values[:-1])
+    ax.add_collection(lines)
+    ax.autoscale_view()
+    return lines
+
+
+def gradient_fill(ax, x, y1, y2, values, cmap, vmin=None, vmax=None, **kwargs):
+    '''
+    Fill between y1 and y2 with one quad per segment, quad i coloured by values[i].
+
+    Args:
+        ax (Axes): where to draw.
+        x, y1, y2 (array): the two curves.
+        values (array): the colour value at each vertex (the last one is unused).
+        cmap (str or Colormap): e.g. two_color_cmap(low, high) or 'SOC'.
+        vmin, vmax (float): the range mapped onto the colormap, defaults to
+            the range of values.
+        **kwargs: passed to PolyCollection (alpha, zorder...). The edges take
+            the face colour, like fill_between(color=...).
+
+    Returns:
+        PolyCollection
+    '''
+    x = np.asarray(x, dtype=float)
+    y1 = np.asarray(y1, dtype=float)
+    y2 = np.asarray(y2, dtype=float)
+    values = np.asarray(values, dtype=float)
+    quads = np.stack([
+        np.column_stack([x[:-1], y1[:-1]]),
+        np.column_stack([x[1:], y1[1:]]),
+        np.column_stack([x[1:], y2[1:]]),
+        np.column_stack([x[:-1], y2[:-1]]),
+    ], axis=1)
+    kwargs.setdefault("edgecolors", "face")
+    polys = PolyCollection(quads, cmap=cmap, norm=_norm(values, vmin, vmax), **kwargs)
+    polys.set_array(values[:-1])
+    ax.add_collection(polys)
+    ax.autoscale_view()
+    return polys
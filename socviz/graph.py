@@ -0,0 +1,365 @@
+'''
+Content-hashed build graph for incremental rebuilds.
+
+While a visual is built, record() notes every file it reads inside the
+repository: the script or notebook, its data/ files (including reads from
+other folders, like ../01022023/data/team_mapping.csv), the socviz modules
+it imports, the stylesheet and fonts. It also notes the logos it fetches and
+the files it writes. socviz.data caches (<name>.cols/) count as their CSV.
+
+BuildGraph keeps the SHA-256 of each of those inputs per visual in
+.build/graph.json. A visual is only rebuilt when one of its inputs changed,
+a logo it used is no longer cached as the same image, or one of its outputs
+is missing. Files whose size and mtime didn't change aren't re-hashed, so
+checking the whole archive takes a fraction of a second.
+
+Usage:
+    python -m socviz.build            # only rebuilds what changed
+    python -m socviz.build --force    # rebuilds everything
+'''
+
+import builtins
+import hashlib
+import json
+import os
+import sys
+import threading
+import types
+from contextlib import contextmanager
+
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+GRAPH_PATH = os.path.join(REPO_ROOT, ".build", "graph.json")
+GRAPH_VERSION = 1
+
+IGNORED_DIRS = {".build", ".git", "__pycache__", ".ipynb_checkpoints"}
+DATA_CACHE_SUFFIX = ".cols"
+WRITE_FLAGS = os.O_WRONLY | os.O_RDWR | os.O_APPEND | os.O_CREAT
+# -- Modules that run the build without changing what it draws.
+TOOLING = {"socviz.build", "socviz.graph", "socviz.trace", "socviz.bench"}
+
+
+def file_hash(path):
+    sha256 = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            sha256.update(block)
+    return sha256.hexdigest()
+
+
+def repo_path(path, root=REPO_ROOT):
+    '''
+    The path of a file relative to the repository, None outside of it or in
+    build folders. Files in a data cache map to the cached CSV.
+    '''
+    if not isinstance(path, (str, bytes, os.PathLike)):
+        return None
+    path = os.path.abspath(os.fsdecode(path))
+    rel = os.path.relpath(path, root)
+    if rel.startswith(os.pardir) or os.path.isabs(rel):
+        return None
+    parts = rel.split(os.sep)
+    if any(x in IGNORED_DIRS for x in parts):
+        return None
+    for i, part in enumerate(parts[:-1]):
+        if part.endswith(DATA_CACHE_SUFFIX):
+            return os.path.join(*parts[:i], part[:-len(DATA_CACHE_SUFFIX)] + ".csv")
+    return rel
+
+
+# ------------------------------------------------------------
+# Recording (inside the job's process)
+
+class Recorder:
+    '''
+    Collects the repository files a process reads and writes, and the logos
+    it fetches.
+    '''
+
+    def __init__(self, root=REPO_ROOT):
+        self.root = root
+        self.reads = set()
+        self.writes = set()
+        self.logos = {}
+        self.active = False
+        # -- Modules only imported to record the build.
+        self.tooling = set(TOOLING)
+        # -- Modules the build tools imported first, and the ones the job imports.
+        self.preloaded = set()
+        self.imported = set()
+        self._loading = False
+        self._lock = threading.Lock()
+
+    def import_hook(self, name, fromlist=(), level=0, importer=None):
+        if not self.active or self._loading or level or importer in self.tooling:
+            return
+        with self._lock:
+            self.imported.add(name)
+            self.imported.update(f"{name}.{x}" for x in fromlist or ())
+
+    @contextmanager
+    def loading(self):
+        '''
+        Modules first imported inside the block (by the build tools) are only
+        inputs of the jobs that import them as well.
+        '''
+        before = set(sys.modules)
+        self._loading = True
+        try:
+            yield
+        finally:
+            self._loading = False
+            self.preloaded.update(set(sys.modules) - before)
+
+    def audit(self, event, args):
+        if not self.active or event != "open":
+            return
+        path, mode, flags = args
+        rel = repo_path(path, self.root)
+        if rel is None:
+            return
+        if mode is not None:
+            writing = any(x in mode for x in "wax+")
+        else:
+            writing = bool(flags & WRITE_FLAGS)
+        # -- Building a data cache writes next to the CSV, the CSV is still an input.
+        if writing and any(DATA_CACHE_SUFFIX in x for x in os.fsdecode(path).split(os.sep)[:-1]):
+            return
+        with self._lock:
+            (self.writes if writing else self.reads).add(rel)
+
+    def fetched(self, url, blob_path):
+        with self._lock:
+            self.logos[url] = os.path.splitext(os.path.basename(blob_path))[0]
+
+    def _used_modules(self):
+        '''
+        The modules the job imported, with the modules they use in turn.
+        '''
+        todo = [x for x in self.imported if x in sys.modules]
+        used = set()
+        while todo:
+            name = todo.pop()
+            if name in used or name in self.tooling:
+                continue
+            used.add(name)
+            for value in list(vars(sys.modules[name]).values()):
+                dep = value.__name__ if isinstance(value, types.ModuleType) else getattr(value, "__module__", None)
+                # -- A package holds its imported submodules, it doesn't use them.
+                if isinstance(value, types.ModuleType) and dep.startswith(f"{name}."):
+                    continue
+                module = sys.modules.get(dep) if isinstance(dep, str) else None
+                if repo_path(getattr(module, "__file__", None), self.root) is not None:
+                    todo.append(dep)
+        return used
+
+    def manifest(self):
+        inputs = set(self.reads)
+        # -- Imports read the .pyc when it's up to date, so add the sources of
+        # -- every repository module that was imported (except the build tools,
+        # -- and what they imported themselves unless the job uses it too).
+        used = self._used_modules()
+        for name, module in list(sys.modules.items()):
+            spec = getattr(module, "__spec__", None)
+            if name in self.tooling or getattr(spec, "name", None) in self.tooling:
+                continue
+            if name in self.preloaded and name not in used:
+                continue
+            inputs.add(repo_path(getattr(module, "__file__", None), self.root))
+        if self.logos:
+            inputs.add(repo_path(sys.modules["socviz.logos"].__file__, self.root))
+        # -- Fonts are only opened when text is first laid out, list them all.
+        fonts = sys.modules.get("socviz.fonts")
+        if fonts is not None:
+            inputs.add(repo_path(fonts.STYLESHEET, self.root))
+            try:
+                inputs.update(repo_path(x, self.root) for x in fonts.font_files())
+            except OSError:
+                pass
+        outputs = sorted(x for x in self.writes if os.path.exists(os.path.join(self.root, x)))
+        # -- A file the job rewrote (a cache, an intermediate CSV) isn't an input.
+        inputs = sorted(x for x in inputs - set(outputs) if x is not None)
+        return {"inputs": inputs, "outputs": outputs, "logos": dict(sorted(self.logos.items()))}
+
+
+_recorder = None
+
+
+def _hook_logos(recorder):
+    if "socviz.logos" not in sys.modules:
+        # -- Imported here, it's only an input of the jobs that use logos.
+        recorder.preloaded.add("socviz.logos")
+    try:
+        from socviz.logos import LogoStore
+    except ImportError:
+        return
+    fetch = LogoStore.fetch
+
+    def traced_fetch(self, url):
+        path = fetch(self, url)
+        recorder.fetched(url, path)
+        return path
+
+    LogoStore.fetch = traced_fetch
+
+
+def _hook_imports(recorder):
+    import_module = builtins.__import__
+
+    def traced_import(name, globals=None, locals=None, fromlist=(), level=0):
+        module = import_module(name, globals, locals, fromlist, level)
+        recorder.import_hook(name, fromlist, level, (globals or {}).get("__name__"))
+        return module
+
+    builtins.__import__ = traced_import
+
+
+@contextmanager
+def record(path, root=REPO_ROOT):
+    '''
+    Record the inputs and outputs of everything inside the block and write
+    them as JSON to `path`. Audit hooks can't be removed, so this is meant to
+    run once per process. They need Python 3.8: before that nothing is
+    written, and the build graph rebuilds the job every time.
+    '''
+    global _recorder
+    if not hasattr(sys, "addaudithook"):
+        yield None
+        return
+    if _recorder is None:
+        _recorder = Recorder(root)
+        sys.addaudithook(_recorder.audit)
+        _hook_logos(_recorder)
+        _hook_imports(_recorder)
+    _recorder.active = True
+    try:
+        yield _recorder
+    finally:
+        _recorder.active = False
+        manifest = _recorder.manifest()
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(manifest, f, indent=1)
+
+
+# ------------------------------------------------------------
+# The graph (in the build process)
+
+def _logo_index():
+    '''
+    url -> sha256 of the logos in the LogoStore cache.
+    '''
+    try:
+        from socviz.logos import DEFAULT_CACHE_DIR
+    except ImportError:
+        return {}
+    try:
+        with open(os.path.join(DEFAULT_CACHE_DIR, "index.json"), encoding="utf-8") as f:
+            index = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    return {
+        url: entry["sha256"] for url, entry in index.items()
+        if os.path.exists(os.path.join(DEFAULT_CACHE_DIR, "objects", f"{entry['sha256']}.png"))
+    }
+
+
+class BuildGraph:
+    '''
+    The recorded inputs of every visual and the hashes they were built with.
+
+    Args:
+        path (str): the JSON file the graph is kept in.
+        root (str): the repository root, paths are stored relative to it.
+    '''
+
+    def __init__(self, path=GRAPH_PATH, root=REPO_ROOT):
+        self.path = path
+        self.root = root
+        self.jobs = {}
+        self.files = {}
+        self._logos = None
+        self._hashes = {}
+        try:
+            with open(path, encoding="utf-8") as f:
+                graph = json.load(f)
+            if graph.get("version") == GRAPH_VERSION:
+                self.jobs = graph["jobs"]
+                self.files = graph["files"]
+        except (OSError, ValueError, KeyError):
+            pass
+
+    def hash(self, rel):
+        '''
+        SHA-256 of a repository file, None if it doesn't exist. Only files
+        whose size or mtime changed since the last build are read.
+        '''
+        if rel in self._hashes:
+            return self._hashes[rel]
+        path = os.path.join(self.root, rel)
+        try:
+            stat = os.stat(path)
+        except OSError:
+            self._hashes[rel] = None
+            return None
+        cached = self.files.get(rel)
+        if cached is not None and (cached["mtime"], cached["size"]) == (stat.st_mtime, stat.st_size):
+            sha256 = cached["sha256"]
+        else:
+            sha256 = file_hash(path)
+            self.files[rel] = {"mtime": stat.st_mtime, "size": stat.st_size, "sha256": sha256}
+        self._hashes[rel] = sha256
+        return sha256
+
+    def logos(self):
+        if self._logos is None:
+            self._logos = _logo_index()
+        return self._logos
+
+    def stale(self, name):
+        '''
+        Why the visual `name` has to be rebuilt, None when it's up to date.
+        '''
+        job = self.jobs.get(name)
+        if job is None:
+            return "never built"
+        for rel, sha256 in job["inputs"].items():
+            if self.hash(rel) != sha256:
+                return f"{rel} changed" if self.hash(rel) else f"{rel} is missing"
+        logos = self.logos()
+        for url, sha256 in job["logos"].items():
+            if logos.get(url) != sha256:
+                return f"logo {url} changed"
+        for rel in job["outputs"]:
+            if not os.path.exists(os.path.join(self.root, rel)):
+                return f"{rel} is missing"
+        return None
+
+    def update(self, name, manifest):
+        '''
+        Store the inputs recorded while building `name`, with their current hashes.
+        '''
+        # -- Hash again, the job may have changed files since they were checked.
+        self._hashes.clear()
+        self.jobs[name] = {
+            "inputs": {x: self.hash(x) for x in manifest["inputs"] if self.hash(x) is not None},
+            "logos": manifest["logos"],
+            "outputs": manifest["outputs"],
+        }
+
+    def forget(self, name):
+        self.jobs.pop(name, None)
+
+    def save(self):
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        # -- Only keep the stat cache of files some visual still depends on.
+        used = {x for job in self.jobs.values() for x in job["inputs"]}
+        graph = {
+            "version": GRAPH_VERSION,
+            "jobs": self.jobs,
+            "files": {k: v for k, v in self.files.items() if k in used},
+        }
+        tmp_path = f"{self.path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(graph, f, indent=1, sort_keys=True)
+        os.replace(tmp_path, self.path)
@@ -0,0 +1,103 @@
+'''
+Partition a frame once by key for O(1) lookups inside plotting loops.
+
+Panel grids usually filter the whole frame for the highlighted team and
+again for every other team, on every panel. GroupedFrame sorts the rows by
+key once so that each group is a contiguous block, and keeps the bounds of
+every block. Getting a group is then a slice, not a boolean scan.
+
+Usage:
+    teams = GroupedFrame(df, "team_id")
+    team_df = teams.get(team_id)                 # DataFrame, index 0..n-1
+    xg = teams.values(team_id, "xG")             # NumPy slice
+    for other_id, other_df in teams.others(team_id):
+        ...
+'''
+
+import numpy as np
+import pandas as pd
+
+
+class GroupedFrame:
+    '''
+    A frame sorted by `by` with the row bounds of every group.
+
+    Args:
+        data (pd.DataFrame): the frame to partition.
+        by (str or list): the key column(s), e.g. "team_id" or ["match_id", "team_id"].
+            Groups keep the original row order and appear in order of first
+            appearance. Multi-column keys are tuples.
+    '''
+
+    def __init__(self, data, by):
+        self.by = [by] if isinstance(by, str) else list(by)
+        if len(self.by) == 1:
+            codes, uniques = pd.factorize(data[self.by[0]])
+            keys = list(uniques)
+        else:
+            codes, uniques = pd.MultiIndex.from_frame(data[self.by]).factorize()
+            keys = [tuple(x) for x in uniques]
+        order = np.argsort(codes, kind="stable")
+        self.frame = data.iloc[order].reset_index(drop=True)
+
+        bounds = np.concatenate([[0], np.cumsum(np.bincount(codes, minlength=len(keys)))])
+        self._slices = {
+            key: (int(bounds[i]), int(bounds[i + 1])) for i, key in enumerate(keys)
+        }
+        self._arrays = {}
+
+    def __len__(self):
+        return len(self._slices)
+
+    def __contains__(self, key):
+        return key in self._slices
+
+    def __iter__(self):
+        for key in self._slices:
+            yield key, self.get(key)
+
+    def keys(self):
+        return list(self._slices)
+
+    def bounds(self, key):
+        '''
+        (start, end) rows of a group in self.frame, (0, 0) for a key with no rows.
+        '''
+        return self._slices.get(key, (0, 0))
+
+    def get(self, key):
+        '''
+        The rows of a group as a DataFrame indexed from 0, empty for a key
+        with no rows.
+        '''
+        start, end = self.bounds(key)
+        group = self.frame.iloc[start:end]
+        group.index = pd.RangeIndex(end - start)
+        return group
+
+    def values(self, key, column):
+        '''
+        One column of a group as a NumPy array (a view, not a copy), empty
+        for a key with no rows.
+        '''
+        if column not in self._arrays:
+            self._arrays[column] = self.frame[column].to_numpy()
+        start, end = self.bounds(key)
+        return self._arrays[column][start:end]
+
+    def others(self, key):
+        '''
+        Iterate over every group except `key`.
+        '''
+        for other in self._slices:
+            if other != key:
+                yield other, self.get(other)
+
+
+def as_grouped(data, by):
+    '''
+    Accept either a DataFrame or a GroupedFrame in plotting helpers.
+    '''
+    if isinstance(data, GroupedFrame):
+        return data
+    return GroupedFrame(data, by)
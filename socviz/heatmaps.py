@@ -0,0 +1,115 @@
+'''
+Zone heatmaps drawn with one mesh and one grid collection.
+
+The zone boards colour every cell of a ZoneGrid with its own fill_between
+(after filtering the frame for it) and draw every grid line with its own
+ax.plot, so a board of 20 pitches with 30 zones holds hundreds of artists.
+zone_heatmap maps the per-zone values (or colours) to RGBA in NumPy and
+draws all the zones with a single pcolormesh; zone_grid_lines draws the
+inner edges of the grid as a single LineCollection.
+
+Values are in ZoneGrid order (zone = ix*ny + iy), or shaped like grid.shape.
+On a VerticalPitch the pitch's x runs along the axes' y, pass vertical=True.
+
+Usage:
+    zones = positional_zones('uefa')
+    ratio = ...                                   # one value per zone
+    colors = np.select([ratio > .55, ratio < .45], ['#3E5641', '#461220'], '#FCB9B2')
+    zone_heatmap(ax, zones, colors=colors, alpha=.75, zorder=0)
+    zone_heatmap(ax, zones, ratio, cmap='SOC', vmin=0, vmax=1)
+    zone_grid_lines(ax, zones, color='black', lw=.3)
+'''
+
+import matplotlib
+import numpy as np
+from matplotlib.collections import LineCollection
+from matplotlib.colors import ListedColormap, Normalize, to_rgba_array
+
+
+def zone_rgba(grid, values=None, colors=None, cmap=None, norm=None, vmin=None, vmax=None, alpha=None):
+    '''
+    The colour of every zone as an (nx, ny, 4) RGBA array.
+
+    Args:
+        grid (ZoneGrid): the zones.
+        values (array): one value per zone, mapped through `cmap` and `norm`
+            (NaN gets the colormap's "bad" colour).
+        colors (array): one colour per zone (names, hex or RGBA), used
+            instead of values.
+        cmap (str or Colormap): the colormap for `values`.
+        norm (Normalize): defaults to Normalize(vmin, vmax).
+        alpha (float): multiplies the alpha of every zone.
+    '''
+    nx, ny = grid.shape
+    if colors is not None:
+        colors = np.asarray(colors)
+        if colors.dtype.kind in "USO":
+            rgba = to_rgba_array(colors.reshape(-1))
+        else:
+            rgba = to_rgba_array(colors.reshape(-1, colors.shape[-1]))
+    else:
+        values = np.ma.masked_invalid(np.asarray(values, dtype=float).reshape(-1))
+        # -- colormaps.get_cmap only exists from matplotlib 3.6.
+        if cmap is None:
+            cmap = matplotlib.rcParams["image.cmap"]
+        if isinstance(cmap, str):
+            cmap = matplotlib.colormaps[cmap]
+        norm = Normalize(vmin, vmax) if norm is None else norm
+        rgba = cmap(norm(values))
+    rgba = np.array(rgba, dtype=float).reshape(nx, ny, 4)
+    if alpha is not None:
+        rgba[..., 3] *= alpha
+    return rgba
+
+
+def zone_heatmap(ax, grid, values=None, colors=None, cmap=None, norm=None, vmin=None, vmax=None,
+                 alpha=None, vertical=False, zorder=0, **kwargs):
+    '''
+    Fill every zone of `grid` with one pcolormesh.
+
+    Args:
+        ax: the axes, usually with a pitch drawn on it.
+        grid (ZoneGrid): the zones.
+        values, colors, cmap, norm, vmin, vmax, alpha: see zone_rgba.
+        vertical (bool): the pitch is a VerticalPitch.
+        zorder (float): zorder of the mesh.
+        **kwargs: passed to pcolormesh.
+
+    Returns:
+        QuadMesh
+    '''
+    rgba = zone_rgba(grid, values, colors, cmap, norm, vmin, vmax, alpha)
+    nx, ny = grid.shape
+    # -- RGBA arrays are only accepted by pcolormesh from matplotlib 3.8: map
+    # -- the zone indices through a colormap holding one colour per zone.
+    zones = np.arange(nx*ny).reshape(nx, ny)
+    kwargs.setdefault("edgecolors", "none")
+    kwargs.setdefault("antialiased", True)
+    kwargs.update(cmap=ListedColormap(rgba.reshape(-1, 4)), norm=Normalize(-.5, nx*ny - .5))
+    # -- pcolormesh rows run along the axes' y.
+    if vertical:
+        mesh = ax.pcolormesh(grid.edges_y, grid.edges_x, zones, zorder=zorder, **kwargs)
+    else:
+        mesh = ax.pcolormesh(grid.edges_x, grid.edges_y, zones.T, zorder=zorder, **kwargs)
+    return mesh
+
+
+def zone_grid_lines(ax, grid, vertical=False, color="black", ls="dashed", lw=.3, zorder=0, **kwargs):
+    '''
+    Draw the inner edges of `grid` as one LineCollection.
+
+    Returns:
+        LineCollection
+    '''
+    x0, x1 = grid.edges_x[0], grid.edges_x[-1]
+    y0, y1 = grid.edges_y[0], grid.edges_y[-1]
+    segments = (
+        [[(x, y0), (x, y1)] for x in grid.edges_x[1:-1]]
+        + [[(x0, y), (x1, y)] for y in grid.edges_y[1:-1]]
+    )
+    segments = np.array(segments, dtype=float).reshape(-1, 2, 2)
+    if vertical:
+        segments = segments[..., ::-1]
+    lines = LineCollection(segments, colors=color, linestyles=ls, linewidths=lw, zorder=zorder, **kwargs)
+    ax.add_collection(lines, autolim=False)
+    return lines
@@ -0,0 +1,323 @@
+'''
+A persistent store for the team crests we pull from Fotmob.
+
+Every image is saved once under a content-addressed cache (the file name is
+the SHA-256 of its bytes) and an index maps each URL to its blob. The cache
+is bounded in size and evicts the least recently used logos first.
+
+Usage:
+    logos = LogoStore()
+    logos.prefetch(df["teamId"])           # one concurrent batch
+    club_icon = logos.open(teamId, mode="LA")
+    thumb = logos.thumbnail(teamId, (126, 126), mode="LA")   # resized once, cached
+'''
+
+import hashlib
+import json
+import os
+import threading
+import time
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+from PIL import Image
+
+
+FOTMOB_TEAM_URL = "https://images.fotmob.com/image_resources/logo/teamlogo/"
+FOTMOB_LEAGUE_URL = "https://images.fotmob.com/image_resources/logo/leaguelogo/"
+
+DEFAULT_CACHE_DIR = os.environ.get(
+    "SOC_LOGO_CACHE",
+    os.path.join(os.path.expanduser("~"), ".cache", "soc-viz", "logos")
+)
+
+
+def _is_offline():
+    return os.environ.get("SOC_OFFLINE", "0").lower() not in ("", "0", "false", "no")
+
+
+class LogoStore:
+    '''
+    On-disk LRU cache of logo images keyed by URL.
+
+    Args:
+        cache_dir (str): where blobs and the index are stored.
+        base_url (str): prefix used to build URLs from team ids.
+        max_bytes (int): size bound of the cache, older logos are evicted past it.
+        offline (bool): never touch the network, missing logos raise FileNotFoundError.
+            Defaults to the SOC_OFFLINE environment variable.
+        max_workers (int): threads used by prefetch.
+        timeout (float): per-request timeout in seconds.
+    '''
+
+    def __init__(self, cache_dir=DEFAULT_CACHE_DIR, base_url=FOTMOB_TEAM_URL,
+                 max_bytes=256 * 1024**2, offline=None, max_workers=16, timeout=10):
+        self.cache_dir = cache_dir
+        self.base_url = base_url
+        self.max_bytes = max_bytes
+        self.offline = _is_offline() if offline is None else offline
+        self.max_workers = max_workers
+        self.timeout = timeout
+
+        self._objects_dir = os.path.join(cache_dir, "objects")
+        self._thumbs_dir = os.path.join(cache_dir, "thumbs")
+        self._index_path = os.path.join(cache_dir, "index.json")
+        self._lock = threading.Lock()
+        self._removed = set()
+        self._pinned = {}
+        self._thumbs = {}
+        os.makedirs(self._objects_dir, exist_ok=True)
+        self._index = self._read_index()
+
+    # ------------------------------------------------------------
+    # Index bookkeeping
+
+    def _read_index(self):
+        try:
+            with open(self._index_path, encoding="utf-8") as f:
+                index = json.load(f)
+        except (OSError, ValueError):
+            return {}
+        # -- Drop entries whose blob was removed behind our back.
+        return {
+            url: entry for url, entry in index.items()
+            if os.path.exists(self._blob_path(entry["sha256"]))
+        }
+
+    def _write_index(self):
+        '''
+        Merge our view with whatever is on disk (other processes may share the
+        cache) and replace the index atomically.
+        '''
+        with self._lock:
+            index = self._read_index()
+            for url, entry in self._index.items():
+                if url not in index or index[url]["last_used"] < entry["last_used"]:
+                    index[url] = entry
+            for url in self._removed:
+                index.pop(url, None)
+            self._removed.clear()
+            self._index = index
+            tmp_path = f"{self._index_path}.{os.getpid()}.tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(index, f)
+            os.replace(tmp_path, self._index_path)
+
+    def _blob_path(self, sha256):
+        return os.path.join(self._objects_dir, f"{sha256}.png")
+
+    def _touch(self, url):
+        self._index[url]["last_used"] = time.time()
+
+    # ------------------------------------------------------------
+    # Fetching
+
+    def url(self, team_id, base_url=None):
+        '''
+        Build the logo URL for a team (or country) id.
+        '''
+        base_url = self.base_url if base_url is None else base_url
+        if isinstance(team_id, str):
+            return f"{base_url}{team_id}.png"
+        return f"{base_url}{team_id:.0f}.png"
+
+    def _download(self, url):
+        if self.offline:
+            raise FileNotFoundError(f"{url} is not cached and the store is offline.")
+        with urllib.request.urlopen(url, timeout=self.timeout) as response:
+            content = response.read()
+        sha256 = hashlib.sha256(content).hexdigest()
+        blob_path = self._blob_path(sha256)
+        if not os.path.exists(blob_path):
+            tmp_path = f"{blob_path}.{threading.get_ident()}.tmp"
+            with open(tmp_path, "wb") as f:
+                f.write(content)
+            os.replace(tmp_path, blob_path)
+        entry = {
+            "sha256": sha256,
+            "size": len(content),
+            "last_used": time.time()
+        }
+        with self._lock:
+            self._index[url] = entry
+            self._removed.discard(url)
+        return entry
+
+    def fetch(self, url):
+        '''
+        Return the local path of the image at `url`, downloading it if needed.
+        The logo being fetched is never evicted to make room, even when it is
+        larger than max_bytes on its own.
+        '''
+        with self._lock:
+            entry = self._index.get(url)
+            if entry is not None:
+                self._touch(url)
+        if entry is None:
+            self._pin([url])
+            try:
+                entry = self._download(url)
+                self._evict(keep=[url])
+            finally:
+                self._unpin([url])
+        return self._blob_path(entry["sha256"])
+
+    def prefetch(self, team_ids, base_url=None):
+        '''
+        Make sure every logo in `team_ids` is cached before we start drawing.
+        Missing logos are downloaded concurrently in a single batch.
+
+        Returns:
+            dict: team_id -> local path.
+        '''
+        team_ids = list(dict.fromkeys(team_ids))
+        urls = [self.url(x, base_url) for x in team_ids]
+        missing = [x for x in dict.fromkeys(urls) if x not in self._index]
+        # -- The batch is kept whole, the paths we return must still exist.
+        self._pin(urls)
+        try:
+            if missing:
+                with ThreadPoolExecutor(max_workers=min(self.max_workers, len(missing))) as pool:
+                    list(pool.map(self._download, missing))
+            paths = {team_id: self.fetch(url) for team_id, url in zip(team_ids, urls)}
+            self._evict(keep=urls)
+        finally:
+            self._unpin(urls)
+        self._write_index()
+        return paths
+
+    def open(self, team_id, mode=None, base_url=None):
+        '''
+        Open a team logo as a PIL image, optionally converted to `mode` (e.g. "LA").
+        '''
+        return self.open_url(self.url(team_id, base_url), mode=mode)
+
+    def open_url(self, url, mode=None):
+        '''
+        Open any cached image URL (league logos, icons) as a PIL image.
+        '''
+        was_cached = url in self._index
+        image = Image.open(self.fetch(url))
+        if not was_cached:
+            self._write_index()
+        if mode is not None:
+            image = image.convert(mode)
+        return image
+
+    def thumbnail(self, team_id, size, mode=None, base_url=None):
+        '''
+        A logo resized to fit in `size` pixels, keeping its aspect ratio.
+
+        Thumbnails are kept in memory and under thumbs/ in the cache, keyed
+        by the logo's content, so each size is only resampled once.
+
+        Args:
+            team_id: the team id, or a full URL.
+            size (tuple): the (width, height) box in pixels.
+            mode (str): convert the logo first, e.g. "LA".
+        '''
+        url = team_id if isinstance(team_id, str) and "://" in team_id else self.url(team_id, base_url)
+        width, height = (int(round(x)) for x in size)
+        was_cached = url in self._index
+        sha256 = os.path.splitext(os.path.basename(self.fetch(url)))[0]
+        if not was_cached:
+            self._write_index()
+        key = (sha256, mode, width, height)
+        if key in self._thumbs:
+            return self._thumbs[key]
+        thumb_path = os.path.join(self._thumbs_dir, f"{sha256}-{mode or 'orig'}-{width}x{height}.png")
+        try:
+            thumb = Image.open(thumb_path)
+            thumb.load()
+        except (OSError, ValueError):
+            image = Image.open(self._blob_path(sha256))
+            if mode is not None:
+                image = image.convert(mode)
+            scale = min(width/image.width, height/image.height)
+            thumb = image.resize(
+                (max(1, round(image.width*scale)), max(1, round(image.height*scale))),
+                Image.LANCZOS
+            )
+            os.makedirs(self._thumbs_dir, exist_ok=True)
+            tmp_path = f"{thumb_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+            thumb.save(tmp_path, format="PNG")
+            os.replace(tmp_path, thumb_path)
+        self._thumbs[key] = thumb
+        return thumb
+
+    # ------------------------------------------------------------
+    # Eviction
+
+    def size(self):
+        '''
+        Total bytes held by the cache.
+        '''
+        blobs = {entry["sha256"]: entry["size"] for entry in self._index.values()}
+        return sum(blobs.values())
+
+    def _pin(self, urls):
+        '''
+        Keep `urls` out of eviction (from any thread) until unpinned.
+        '''
+        with self._lock:
+            for url in urls:
+                self._pinned[url] = self._pinned.get(url, 0) + 1
+
+    def _unpin(self, urls):
+        with self._lock:
+            for url in urls:
+                self._pinned[url] -= 1
+                if not self._pinned[url]:
+                    del self._pinned[url]
+
+    def _evict(self, keep=()):
+        with self._lock:
+            if self.size() <= self.max_bytes:
+                return
+            keep = set(keep) | set(self._pinned)
+            by_age = sorted(
+                [x for x in self._index if x not in keep],
+                key=lambda x: self._index[x]["last_used"]
+            )
+            while by_age and self.size() > self.max_bytes:
+                url = by_age.pop(0)
+                entry = self._index.pop(url)
+                self._removed.add(url)
+                # -- Blobs are shared between URLs with identical content.
+                if not any(x["sha256"] == entry["sha256"] for x in self._index.values()):
+                    try:
+                        os.remove(self._blob_path(entry["sha256"]))
+                    except OSError:
+                        pass
+                    self._remove_thumbs(entry["sha256"])
+
+    def _remove_thumbs(self, sha256=None):
+        '''
+        Remove the thumbnails of a logo, or every thumbnail.
+        '''
+        self._thumbs = {k: v for k, v in self._thumbs.items() if sha256 is not None and k[0] != sha256}
+        try:
+            files = os.listdir(self._thumbs_dir)
+        except OSError:
+            return
+        for file in files:
+            if sha256 is None or file.startswith(f"{sha256}-"):
+                try:
+                    os.remove(os.path.join(self._thumbs_dir, file))
+                except OSError:
+                    pass
+
+    def clear(self):
+        '''
+        Remove every cached logo.
+        '''
+        with self._lock:
+            for entry in self._index.values():
+                try:
+                    os.remove(self._blob_path(entry["sha256"]))
+                except OSError:
+                    pass
+            self._removed.update(self._index)
+            self._index = {}
+            self._remove_thumbs()
+        self._write_index()
@@ -0,0 +1,124 @@
+'''
+Turn match tables (one row per match, home and away columns) into one row
+per team and match, and compute results, points and Brier scores on it.
+
+Every visual that ranks teams over a season reshapes its match table the same
+way: pick the home columns, pick the away columns, rename both and stack them.
+long_format does that in one vectorized pass and keeps the rows in match
+order (home then away for each match), so grouped cumulative aggregates are
+in chronological order when the matches are.
+
+Usage:
+    teams = long_format(
+        df,
+        columns = {
+            "team_id": ("home_team_id", "away_team_id"),
+            "goals": ("score_home", "score_away"),
+            "prob_win": ("prob_home", "prob_away"),
+        },
+        against = {"goals_against": "goals", "prob_loss": "prob_win"},
+        shared = ["match_id", "date", "prob_tie"]
+    )
+    teams = add_outcomes(teams, prob_win = "prob_win", prob_tie = "prob_tie", prob_loss = "prob_loss")
+    teams = cumulative(teams, "team_id", ["points", "xpoints"])
+'''
+
+import numpy as np
+import pandas as pd
+
+
+def long_format(matches, columns, against=None, shared=None, venue="venue"):
+    '''
+    One row per team and match from a table of matches.
+
+    Args:
+        matches (pd.DataFrame): one row per match.
+        columns (dict): long column -> (home column, away column), e.g.
+            {"team_id": ("home_team_id", "away_team_id")}.
+        against (dict): long column -> one of `columns` whose value for the
+            opponent it holds, e.g. {"goals_against": "goals"}.
+        shared (list): match-level columns copied to both rows (match_id, date...).
+        venue (str): name of the "H"/"A" column, None to leave it out.
+
+    Returns:
+        pd.DataFrame: 2 * len(matches) rows, home and away row of each match
+            next to each other.
+    '''
+    against = {} if against is None else against
+    shared = [] if shared is None else list(shared)
+    n = len(matches)
+
+    data = {}
+    for name in shared:
+        data[name] = np.repeat(matches[name].to_numpy(), 2)
+    if venue is not None:
+        data[venue] = np.tile(np.array(["H", "A"], dtype=object), n)
+    for name, (home, away) in columns.items():
+        data[name] = np.column_stack([matches[home].to_numpy(), matches[away].to_numpy()]).ravel()
+    for name, column in against.items():
+        home, away = columns[column]
+        data[name] = np.column_stack([matches[away].to_numpy(), matches[home].to_numpy()]).ravel()
+
+    return pd.DataFrame(data)
+
+
+def add_outcomes(data, goals="goals", goals_against="goals_against",
+                 prob_win=None, prob_tie=None, prob_loss=None):
+    '''
+    Add win, tie, loss and points columns and, when the pre-match
+    probabilities are given, xpoints and the match's Brier score.
+
+    The Brier score is the mean squared error of the three outcome
+    probabilities, so it's the same for both teams of a match.
+
+    Returns:
+        pd.DataFrame: a copy of `data` with the new columns.
+    '''
+    data = data.copy()
+    goals_for = data[goals].to_numpy()
+    goals_ag = data[goals_against].to_numpy()
+    win = (goals_for > goals_ag).astype(np.int64)
+    tie = (goals_for == goals_ag).astype(np.int64)
+    loss = (goals_for < goals_ag).astype(np.int64)
+
+    data["win"] = win
+    data["tie"] = tie
+    data["loss"] = loss
+    data["points"] = 3*win + tie
+
+    if prob_win is not None and prob_tie is not None:
+        p_win = data[prob_win].to_numpy(dtype=float)
+        p_tie = data[prob_tie].to_numpy(dtype=float)
+        data["xpoints"] = 3*p_win + p_tie
+        if prob_loss is not None:
+            p_loss = data[prob_loss].to_numpy(dtype=float)
+            data["brier_score"] = ((p_win - win)**2 + (p_tie - tie)**2 + (p_loss - loss)**2)/3
+    return data
+
+
+def cumulative(data, by, columns, how="sum", prefix="cum_"):
+    '''
+    Grouped running totals (how="sum") or expanding means (how="mean"),
+    in the row order of `data`.
+
+    Args:
+        data (pd.DataFrame): e.g. the output of long_format, sorted by date.
+        by (str or list): the group column(s), e.g. "team_id".
+        columns (str or list): the columns to accumulate.
+        how (str): "sum" or "mean".
+        prefix (str): the new columns are named prefix + column.
+
+    Returns:
+        pd.DataFrame: a copy of `data` with the new columns.
+    '''
+    if how not in ("sum", "mean"):
+        raise ValueError(f"how must be 'sum' or 'mean', got '{how}'.")
+    columns = [columns] if isinstance(columns, str) else list(columns)
+    data = data.copy()
+    groups = data.groupby(by, sort=False)
+    totals = groups[columns].cumsum()
+    if how == "mean":
+        totals = totals.div(groups.cumcount() + 1, axis=0)
+    for column in columns:
+        data[f"{prefix}{column}"] = totals[column].to_numpy()
+    return data
@@ -0,0 +1,180 @@
+'''
+Small multiples that draw the shared background once.
+
+The "highlight one, grey out the rest" grids draw every other team in grey
+on every panel, so a 20-panel league grid holds 20 x 19 background series.
+The grey layer is the same on every panel: SmallMultiples draws it once on
+an off-screen axes the size of a panel, rasterizes it at the output dpi and
+stamps the same image into every panel (one artist each). Only the
+highlighted series are drawn as vector artists, and the panel limits are the
+ones of the background, as if every series had been plotted.
+
+SmallMultiples also builds the alternating header row (logo and name) /
+plot row GridSpec layout of these grids.
+
+Usage:
+    grid = SmallMultiples(fig, n_panels=20, ncols=4, ratio=2., hspace=.3, facecolor="#EFE9E6")
+    grid.background(lambda ax: draw_all_teams(ax, color="gray", alpha=.15), dpi=600)
+    for panel, team_id in zip(grid, order_teams):
+        panel.ax.plot(...)            # the highlight
+        panel.header_ax.imshow(...)   # the logo
+'''
+
+import math
+
+import numpy as np
+from matplotlib import rcParams
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.figure import Figure
+from matplotlib.gridspec import GridSpec
+
+
+def render_layer(draw, size, dpi):
+    '''
+    Draw a layer on an off-screen axes and rasterize it.
+
+    Args:
+        draw (callable): called with the axes, draws the layer. It may set
+            the limits, otherwise they are autoscaled to what it drew.
+        size (tuple): the (width, height) of the axes in inches.
+        dpi (float): the resolution of the image.
+
+    Returns:
+        np.ndarray: (height, width, 4) uint8 image, transparent where
+            nothing was drawn.
+        tuple: the x limits of the layer.
+        tuple: the y limits of the layer.
+    '''
+    fig = Figure(figsize=size, dpi=dpi)
+    canvas = FigureCanvasAgg(fig)
+    fig.patch.set_alpha(0)
+    ax = fig.add_axes([0, 0, 1, 1])
+    draw(ax)
+    xlim, ylim = ax.get_xlim(), ax.get_ylim()
+    # -- Only the layer itself: no background, spines, ticks or labels.
+    ax.patch.set_visible(False)
+    ax.set_axis_off()
+    canvas.draw()
+    return np.array(canvas.buffer_rgba()), xlim, ylim
+
+
+def stamp(ax, image, xlim, ylim, zorder=2):
+    '''
+    Place a layer from render_layer on an axes, fixing its limits to the
+    layer's so later artists don't rescale it.
+    '''
+    artist = ax.imshow(
+        image, extent=(*xlim, *ylim), origin="upper", aspect="auto",
+        interpolation="nearest", zorder=zorder
+    )
+    ax.set_xlim(xlim)
+    ax.set_ylim(ylim)
+    ax.set_autoscale_on(False)
+    return artist
+
+
+class Panel:
+    '''
+    A plot axes of the grid with its header axes.
+
+    Attributes:
+        index (int): position of the panel, row by row.
+        row, col (int): position in the grid of panels.
+        ax: the plot axes.
+        header_ax: the axes above it, for the logo and name.
+        is_first_col, is_last_row (bool): where the axis labels usually go.
+    '''
+
+    def __init__(self, index, row, col, ax, header_ax, is_last_row):
+        self.index = index
+        self.row = row
+        self.col = col
+        self.ax = ax
+        self.header_ax = header_ax
+        self.is_first_col = col == 0
+        self.is_last_row = is_last_row
+
+    def __repr__(self):
+        return f"Panel({self.index}, row={self.row}, col={self.col})"
+
+
+class SmallMultiples:
+    '''
+    A grid of panels, each a header row above a plot row.
+
+    Args:
+        fig (Figure): the figure to add the axes to.
+        n_panels (int): number of panels, filled row by row.
+        ncols (int): panels per row.
+        ratio (float): how much taller the plot rows are than the header
+            rows are short, height_ratios = (1/nrows)*ratio for plots and
+            (1/nrows)/ratio for headers.
+        hspace (float): passed to GridSpec.
+        facecolor (str): background of the plot axes.
+        header_anchor (str): anchor of the header axes.
+    '''
+
+    def __init__(self, fig, n_panels, ncols, ratio=2., hspace=.3, facecolor="#EFE9E6", header_anchor="NW"):
+        self.fig = fig
+        self.ncols = ncols
+        n_panel_rows = math.ceil(n_panels/ncols)
+        nrows = 2*n_panel_rows
+        self.gspec = GridSpec(
+            ncols=ncols, nrows=nrows, figure=fig,
+            height_ratios=[(1/nrows)*ratio if x % 2 != 0 else (1/nrows)/ratio for x in range(nrows)],
+            hspace=hspace
+        )
+        self.panels = []
+        for row in range(n_panel_rows):
+            count = min(ncols, n_panels - row*ncols)
+            headers = [
+                fig.add_subplot(self.gspec[2*row, col], anchor=header_anchor, facecolor=facecolor)
+                for col in range(count)
+            ]
+            for col in range(count):
+                ax = fig.add_subplot(self.gspec[2*row + 1, col], facecolor=facecolor)
+                self.panels.append(Panel(
+                    len(self.panels), row, col, ax, headers[col], is_last_row=row == n_panel_rows - 1
+                ))
+        self.layer = None
+
+    def __iter__(self):
+        return iter(self.panels)
+
+    def __len__(self):
+        return len(self.panels)
+
+    def __getitem__(self, index):
+        return self.panels[index]
+
+    def panel_size(self):
+        '''
+        The (width, height) of a plot axes in inches.
+        '''
+        position = self.panels[0].ax.get_position()
+        width, height = self.fig.get_size_inches()
+        return position.width*width, position.height*height
+
+    def background(self, draw, dpi=None, zorder=2):
+        '''
+        Draw the layer shared by every panel once and stamp it into all of them.
+
+        Args:
+            draw (callable): called with an axes the size of a panel, draws
+                the background series (and may set the limits).
+            dpi (float): the resolution the figure will be saved at, so the
+                layer isn't resampled. Defaults to savefig.dpi.
+            zorder (float): zorder of the layer in the panels.
+
+        Returns:
+            np.ndarray: the rasterized layer.
+        '''
+        if dpi is None:
+            dpi = rcParams["savefig.dpi"]
+        if dpi == "figure":
+            dpi = self.fig.dpi
+        image, xlim, ylim = render_layer(draw, self.panel_size(), dpi)
+        for panel in self.panels:
+            stamp(panel.ax, image, xlim, ylim, zorder=zorder)
+        self.layer = (image, xlim, ylim)
+        return image
@@ -0,0 +1,258 @@
+'''
+Pitch templates drawn once and stamped into any number of axes.
+
+Every panel of the pitch boards builds a new Pitch/VerticalPitch and calls
+pitch.draw(ax=ax), which computes and adds the same lines, arcs, boxes and
+spots each time (dozens of artists per pitch). pitch_template creates the
+pitch once per set of parameters and draws it once on an off-screen axes. The
+drawn markings are turned into one PathCollection per zorder (and cap and join
+style), and stamping the template into a panel adds those few collections and
+the axes settings (limits, aspect, background) instead of the whole pitch.
+With raster=True, the markings are rasterized once at the output dpi and
+stamped as one image.
+
+The pitch and its dim (positional_x, positional_y...) are kept on the
+template, so pitch.kdeplot and friends still work.
+
+Usage:
+    template = pitch_template(VerticalPitch, pitch_type='opta', goal_type='box', linewidth=1.1, line_color='black')
+    for ax in axes:
+        template.draw(ax)
+    pos_x, pos_y = template.dim.positional_x, template.dim.positional_y
+'''
+
+import numpy as np
+from matplotlib.axis import Axis
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.collections import PathCollection
+from matplotlib.figure import Figure
+from matplotlib.image import AxesImage
+from matplotlib.lines import Line2D
+from matplotlib.patches import Patch
+from matplotlib.path import Path
+
+from socviz.multiples import render_layer, stamp
+
+
+_TEMPLATES = {}
+
+
+def _freeze(value):
+    if isinstance(value, dict):
+        return tuple(sorted((k, _freeze(v)) for k, v in value.items()))
+    if isinstance(value, (list, tuple, np.ndarray)):
+        return tuple(_freeze(x) for x in value)
+    return value
+
+
+def _line_style(artist):
+    return {
+        "facecolors": "none",
+        "edgecolors": artist.get_color(),
+        "linewidths": artist.get_linewidth(),
+        "linestyles": artist.get_linestyle(),
+        "alpha": artist.get_alpha(),
+    }
+
+
+def _patch_style(artist):
+    return {
+        "facecolors": artist.get_facecolor() if artist.get_fill() else "none",
+        "edgecolors": artist.get_edgecolor(),
+        "linewidths": artist.get_linewidth(),
+        "linestyles": artist.get_linestyle(),
+        "alpha": None,
+    }
+
+
+def _shows_axis(ax):
+    '''
+    Whether the axes draws any of its axis: spines, ticks, grid lines, tick
+    labels or axis labels. mplsoccer hides them one by one and leaves the
+    axis on, so ax.axison alone doesn't tell.
+    '''
+    if not ax.axison:
+        return False
+    if any(x.get_visible() for x in ax.spines.values()):
+        return True
+    for axis in (ax.xaxis, ax.yaxis):
+        if not axis.get_visible():
+            continue
+        if axis.label.get_visible() and axis.label.get_text():
+            return True
+        for tick in axis.get_major_ticks() + axis.get_minor_ticks():
+            if any(x.get_visible() for x in (tick.tick1line, tick.tick2line, tick.gridline)):
+                return True
+            if any(x.get_visible() and x.get_text() for x in (tick.label1, tick.label2)):
+                return True
+    return False
+
+
+class PitchTemplate:
+    '''
+    A pitch drawn once, as the data needed to draw it again.
+
+    Args:
+        pitch: an mplsoccer Pitch or VerticalPitch.
+
+    Attributes:
+        pitch: the pitch, for its plotting methods.
+        dim: pitch.dim, computed once.
+    '''
+
+    def __init__(self, pitch):
+        self.pitch = pitch
+        self.dim = pitch.dim
+        self._raster = {}
+
+        fig = Figure()
+        canvas = FigureCanvasAgg(fig)
+        ax = fig.add_subplot()
+        pitch.draw(ax=ax)
+        # -- Arcs only compute their path when drawn.
+        canvas.draw()
+        self.xlim = ax.get_xlim()
+        self.ylim = ax.get_ylim()
+        self.aspect = ax.get_aspect()
+        self.facecolor = ax.get_facecolor()
+        self.axison = _shows_axis(ax)
+        self.layers = self._harvest(ax)
+
+    def _harvest(self, ax):
+        '''
+        Group the pitch artists into layers of paths (in data coordinates)
+        that share a zorder, in drawing order. None when the pitch drew
+        something a layer can't reproduce, then it's drawn the usual way.
+        '''
+        if self.axison:
+            return None
+        artists = sorted(
+            [x for x in ax.get_children() if x.get_visible() and x not in (ax.patch, *ax.spines.values())
+             and not isinstance(x, Axis)],
+            key=lambda x: x.get_zorder()
+        )
+        layers = []
+        for artist in artists:
+            if isinstance(artist, (Line2D, Patch)) and artist.get_clip_path() is not None:
+                return None
+            if isinstance(artist, Line2D):
+                if artist.get_marker() not in ("None", None, "", " ") or artist.get_transform() != ax.transData:
+                    return None
+                path, style = Path(artist.get_xydata()), _line_style(artist)
+                joints = (artist.get_solid_capstyle(), artist.get_solid_joinstyle())
+            elif isinstance(artist, Patch):
+                if artist.get_hatch() or artist.get_data_transform() != ax.transData:
+                    return None
+                path = artist.get_patch_transform().transform_path(artist.get_path())
+                style = _patch_style(artist)
+                joints = (artist.get_capstyle(), artist.get_joinstyle())
+            elif isinstance(artist, AxesImage):
+                layers.append(("image", artist))
+                continue
+            elif getattr(artist, "get_text", None) is not None and not artist.get_text():
+                continue
+            else:
+                return None
+            # -- Cap and join styles are per collection, they split layers too.
+            key = (artist.get_zorder(), artist.get_clip_on(), *joints)
+            if not layers or layers[-1][0] != key:
+                layers.append((key, {"paths": [], "styles": []}))
+            layers[-1][1]["paths"].append(path)
+            layers[-1][1]["styles"].append(style)
+        return layers
+
+    def _setup(self, ax):
+        ax.set_xlim(self.xlim)
+        ax.set_ylim(self.ylim)
+        ax.set_aspect(self.aspect)
+        ax.set_facecolor(self.facecolor)
+        # -- Like mplsoccer, hide the spines, grid and ticks one by one: with
+        # -- the axis off, matplotlib doesn't draw the axes background.
+        for spine in ax.spines.values():
+            spine.set_visible(False)
+        ax.grid(False)
+        ax.tick_params(
+            bottom=False, top=False, left=False, right=False,
+            labelbottom=False, labeltop=False, labelleft=False, labelright=False
+        )
+
+    def draw(self, ax, raster=False, dpi=600):
+        '''
+        Draw the pitch on `ax`, like pitch.draw(ax=ax).
+
+        Args:
+            ax: the axes.
+            raster (bool): stamp the markings as one image rendered at `dpi`
+                (rendered once per axes size) instead of vector collections.
+            dpi (float): the resolution of the raster.
+
+        Returns:
+            list: the artists added.
+        '''
+        if self.layers is None:
+            self.pitch.draw(ax=ax)
+            return []
+        if raster:
+            return [self._draw_raster(ax, dpi)]
+        artists = []
+        for key, layer in self.layers:
+            if key == "image":
+                artists.append(ax.imshow(
+                    layer.get_array(), extent=layer.get_extent(), origin=layer.origin,
+                    cmap=layer.get_cmap(), alpha=layer.get_alpha(), zorder=layer.get_zorder(),
+                    interpolation=layer.get_interpolation(), aspect=self.aspect
+                ))
+                continue
+            zorder, clip_on, capstyle, joinstyle = key
+            styles = layer["styles"]
+            collection = PathCollection(
+                layer["paths"],
+                facecolors=[x["facecolors"] for x in styles],
+                edgecolors=[x["edgecolors"] for x in styles],
+                linewidths=[x["linewidths"] for x in styles],
+                linestyles=[x["linestyles"] for x in styles],
+                capstyle=capstyle, joinstyle=joinstyle, zorder=zorder, clip_on=clip_on
+            )
+            # -- Per path alpha (lines drawn with alpha=) is folded into the colours.
+            alphas = [x["alpha"] for x in styles]
+            if any(x is not None for x in alphas):
+                edgecolors = collection.get_edgecolors()
+                edgecolors[:, 3] *= [1 if x is None else x for x in alphas]
+                collection.set_edgecolors(edgecolors)
+            ax.add_collection(collection, autolim=False)
+            artists.append(collection)
+        self._setup(ax)
+        return artists
+
+    def _draw_raster(self, ax, dpi):
+        self._setup(ax)
+        # -- The box the pitch is drawn in once the aspect is applied.
+        ax.apply_aspect()
+        position = ax.get_position()
+        width, height = ax.figure.get_size_inches()
+        size = (round(position.width*width, 4), round(position.height*height, 4))
+        if (size, dpi) not in self._raster:
+            self._raster[(size, dpi)] = render_layer(lambda x: self.draw(x), size, dpi)
+        image, xlim, ylim = self._raster[(size, dpi)]
+        artist = stamp(ax, image, xlim, ylim, zorder=min([k[0] for k, _ in self.layers if k != "image"] + [1]))
+        self._setup(ax)
+        return artist
+
+
+def pitch_template(pitch_class, **kwargs):
+    '''
+    The template of `pitch_class(**kwargs)`, created on first use.
+
+    Args:
+        pitch_class: Pitch or VerticalPitch.
+        **kwargs: the pitch parameters (pitch_type, half, linewidth,
+            line_color, goal_type...), the cache key.
+    '''
+    key = (pitch_class.__module__, pitch_class.__qualname__, _freeze(kwargs))
+    if key not in _TEMPLATES:
+        _TEMPLATES[key] = PitchTemplate(pitch_class(**kwargs))
+    return _TEMPLATES[key]
+
+
+def clear_templates():
+    _TEMPLATES.clear()
@@ -0,0 +1,304 @@
+'''
+Event qualifiers and satisfied event types as packed flag matrices.
+
+The WhoScored event CSVs store two list columns as Python literals:
+qualifiers ("[{'Length': '17.4'}, {'Zone': 'Back'}, {'ThrowIn': True}]") and
+satisfied_events_types ("['touches', 'passAccurate']"). Running literal_eval
+on every row and looping over the dicts is most of the time it takes to load
+a match, and it doesn't scale to a season.
+
+Both columns are tokenized with a single regex pass over the whole column.
+Every distinct name gets a position in a vocabulary, and each row becomes a
+packed bit mask (one bit per name), so filters like "throw-in or corner" are
+one vectorized test. Qualifiers that carry numbers (Length, Angle,
+PassEndX...) become float columns. read_event_csv caches the result next to
+the socviz.data columnar cache of the CSV.
+
+Usage:
+    events = read_event_csv('data/02012023_fa_cup_solar.csv', index_col=0, low_memory=False)
+    data = events.data
+    data['is_open_play'] = ~events.qualifiers.any('GoalKick', 'FreekickTaken', 'CornerTaken', 'ThrowIn')
+    data['won_possession'] = events.event_types.any('ballRecovery', 'interceptionWon')
+    data['pass_length'] = events.values['Length']
+'''
+
+import json
+import os
+import re
+
+import numpy as np
+import pandas as pd
+
+from socviz.data import cache_dir, read_csv
+
+
+CACHE_NAME = "qualifiers.npz"
+CACHE_VERSION = 1
+
+# -- Tokens are row separators or whole items, e.g. {'Zone': 'Back'} or 'passAccurate'.
+_QUALIFIER_TOKENS = re.compile(r"""\n|\{[^{}]*\}""")
+_ITEM_TOKENS = re.compile(r"""\n|'[^']*'|"[^"]*\"""")
+_QUALIFIER = re.compile(r"""\{\s*(?:'([^']*)'|"([^"]*)")\s*:\s*(?:'([^']*)'|"([^"]*)"|(.*?))\s*\}""", re.DOTALL)
+_LITERALS = {"True": True, "False": False, "None": None}
+
+
+class FlagMatrix:
+    '''
+    A packed boolean matrix, one row per event and one bit per name.
+
+    Args:
+        vocabulary (list): the name of every bit.
+        bits (np.ndarray): uint8 (rows, ceil(len(vocabulary)/8)) array from
+            np.packbits(..., axis=1).
+    '''
+
+    def __init__(self, vocabulary, bits):
+        self.vocabulary = list(vocabulary)
+        self.bits = bits
+        self._index = {name: i for i, name in enumerate(self.vocabulary)}
+
+    @classmethod
+    def from_pairs(cls, rows, codes, vocabulary, n_rows, chunk_size=1 << 16):
+        '''
+        Build the matrix from the (row, name code) of every item, rows in
+        increasing order.
+        '''
+        n_bits = max(len(vocabulary), 1)
+        bits = np.zeros((n_rows, (n_bits + 7)//8), dtype=np.uint8)
+        # -- Unpacked rows take a byte per name, so pack them a chunk at a time.
+        for first in range(0, n_rows, chunk_size):
+            last = min(first + chunk_size, n_rows)
+            start, end = np.searchsorted(rows, [first, last])
+            unpacked = np.zeros((last - first, n_bits), dtype=bool)
+            unpacked[rows[start:end] - first, codes[start:end]] = True
+            bits[first:last] = np.packbits(unpacked, axis=1)
+        return cls(vocabulary, bits)
+
+    def __len__(self):
+        return len(self.bits)
+
+    def __contains__(self, name):
+        return name in self._index
+
+    def pattern(self, names):
+        '''
+        The byte pattern with the bits of `names` set. Unknown names are ignored.
+        '''
+        flags = np.zeros(self.bits.shape[1]*8, dtype=bool)
+        flags[[self._index[x] for x in names if x in self._index]] = True
+        return np.packbits(flags)
+
+    def any(self, *names):
+        '''
+        Whether each row has at least one of `names`.
+        '''
+        return (self.bits & self.pattern(names)).any(axis=1)
+
+    def all(self, *names):
+        '''
+        Whether each row has every one of `names`.
+        '''
+        if any(x not in self._index for x in names):
+            return np.zeros(len(self), dtype=bool)
+        pattern = self.pattern(names)
+        return ((self.bits & pattern) == pattern).all(axis=1)
+
+    def to_frame(self, names=None, index=None):
+        '''
+        One boolean column per name.
+        '''
+        unpacked = np.unpackbits(self.bits, axis=1, count=len(self.vocabulary)).astype(bool)
+        frame = pd.DataFrame(unpacked, columns=self.vocabulary, index=index)
+        return frame if names is None else frame[list(names)]
+
+
+# ------------------------------------------------------------
+# Tokenizing
+
+def _tokenize(strings, pattern):
+    '''
+    Run `pattern` once over the whole column.
+
+    Returns:
+        np.ndarray: the row of every token.
+        np.ndarray: the token's position in `tokens`.
+        list: the distinct tokens, so each one is only parsed once.
+        int: the number of rows.
+    '''
+    strings = pd.Series(strings).fillna("[]").astype(str).tolist()
+    # -- repr() escapes newlines, so a newline is a safe row separator.
+    matches = pattern.findall("\n".join(strings) + "\n")
+    codes, tokens = pd.factorize(np.array(matches, dtype=object))
+    tokens = list(tokens)
+    separator = tokens.index("\n") if "\n" in tokens else -1
+    is_separator = codes == separator
+    rows = np.cumsum(is_separator)[~is_separator]
+    return rows, codes[~is_separator], tokens, len(strings)
+
+
+def _vocabulary(names, codes):
+    '''
+    Sort the distinct names and re-code the tokens against them. Tokens
+    without a name get -1.
+    '''
+    vocabulary = sorted(set(names) - {""})
+    position = {name: i for i, name in enumerate(vocabulary)}
+    token_codes = np.array([position.get(x, -1) for x in names], dtype=np.int64)
+    return vocabulary, token_codes[codes]
+
+
+def parse_event_types(strings):
+    '''
+    Parse a satisfied_events_types column into a FlagMatrix.
+    '''
+    rows, codes, tokens, n_rows = _tokenize(strings, _ITEM_TOKENS)
+    vocabulary, codes = _vocabulary([x[1:-1] for x in tokens], codes)
+    return FlagMatrix.from_pairs(rows, codes, vocabulary, n_rows)
+
+
+def parse_qualifiers(strings):
+    '''
+    Parse a qualifiers column.
+
+    Returns:
+        FlagMatrix: which qualifiers each event has.
+        pd.DataFrame: one column per qualifier that carries a value. Numeric
+            qualifiers are floats and the rest are objects, NaN/None when
+            the event doesn't have it (the first value wins if it's repeated).
+    '''
+    rows, codes, tokens, n_rows = _tokenize(strings, _QUALIFIER_TOKENS)
+    # -- Only the distinct items are parsed, e.g. {'Zone': 'Back'} once per column.
+    names, values, quoted, literal = [], [], [], []
+    for token in tokens:
+        match = _QUALIFIER.fullmatch(token)
+        # -- The separator, or something that isn't a one-key dict.
+        single_name, double_name, single, double, bare = match.groups() if match else ("", None, None, None, None)
+        names.append(single_name if single_name is not None else double_name)
+        quoted.append(match is not None and bare is None)
+        literal.append(bare in _LITERALS)
+        values.append(single if single is not None else double if double is not None else _LITERALS.get(bare, bare))
+    token_codes = codes
+    vocabulary, codes = _vocabulary(names, token_codes)
+    keep = codes >= 0
+    rows, codes, token_codes = rows[keep], codes[keep], token_codes[keep]
+    flags = FlagMatrix.from_pairs(rows, codes, vocabulary, n_rows)
+
+    values = np.array(values, dtype=object)
+    quoted = np.array(quoted, dtype=bool)
+    literal = np.array(literal, dtype=bool)
+    order = np.argsort(codes, kind="stable")
+    bounds = np.concatenate([[0], np.cumsum(np.bincount(codes, minlength=len(vocabulary)))])
+    columns = {}
+    for code, name in enumerate(vocabulary):
+        selected = order[bounds[code]:bounds[code + 1]]
+        # -- Flag-only qualifiers ({'ThrowIn': True}) don't need a column.
+        if not quoted[token_codes[selected]].any():
+            continue
+        item_rows, first = np.unique(rows[selected], return_index=True)
+        first = token_codes[selected[first]]
+        try:
+            if literal[first].any():
+                raise ValueError
+            column = np.full(n_rows, np.nan)
+            column[item_rows] = values[first].astype(float)
+        except ValueError:
+            column = np.full(n_rows, None, dtype=object)
+            column[item_rows] = values[first]
+        columns[name] = column
+    return flags, pd.DataFrame(columns, index=pd.RangeIndex(n_rows))
+
+
+# ------------------------------------------------------------
+# Cached reading
+
+class QualifiedEvents:
+    '''
+    An event table with its parsed qualifiers and satisfied event types.
+    Every array is aligned with the rows of `data`.
+
+    Attributes:
+        data (pd.DataFrame): the CSV as read, list columns still as text.
+        qualifiers (FlagMatrix)
+        values (pd.DataFrame): the valued qualifiers (Length, Angle, Zone...).
+        event_types (FlagMatrix)
+    '''
+
+    def __init__(self, data, qualifiers, values, event_types):
+        self.data = data
+        self.qualifiers = qualifiers
+        self.values = values
+        self.event_types = event_types
+
+
+def _csv_hash(path):
+    '''
+    The SHA-256 recorded by socviz.data for the current columnar cache.
+    '''
+    try:
+        with open(os.path.join(cache_dir(path), "meta.json"), encoding="utf-8") as f:
+            return json.load(f)["sha256"]
+    except (OSError, ValueError, KeyError):
+        return None
+
+
+def _save(file, csv_hash, qualifiers, values, event_types):
+    arrays = {
+        "qualifiers_vocabulary": np.asarray(qualifiers.vocabulary, dtype=str),
+        "qualifiers_bits": qualifiers.bits,
+        "event_types_vocabulary": np.asarray(event_types.vocabulary, dtype=str),
+        "event_types_bits": event_types.bits,
+    }
+    for i, name in enumerate(values.columns):
+        arrays[f"value_{i}"] = values[name].to_numpy()
+    meta = {"version": CACHE_VERSION, "sha256": csv_hash, "values": list(values.columns)}
+    tmp_file = f"{file}.{os.getpid()}.tmp.npz"
+    np.savez(tmp_file, meta=np.array(json.dumps(meta)), **arrays)
+    os.replace(tmp_file, file)
+
+
+def _load(file, csv_hash):
+    try:
+        cached = np.load(file, allow_pickle=True)
+    except (OSError, ValueError):
+        return None
+    with cached:
+        meta = json.loads(str(cached["meta"]))
+        if meta["version"] != CACHE_VERSION or meta["sha256"] != csv_hash:
+            return None
+        qualifiers = FlagMatrix(cached["qualifiers_vocabulary"].tolist(), cached["qualifiers_bits"])
+        event_types = FlagMatrix(cached["event_types_vocabulary"].tolist(), cached["event_types_bits"])
+        values = pd.DataFrame({name: cached[f"value_{i}"] for i, name in enumerate(meta["values"])})
+    return qualifiers, values, event_types
+
+
+def read_event_csv(path, qualifiers="qualifiers", event_types="satisfied_events_types", refresh=False, **kwargs):
+    '''
+    Read an event CSV with socviz.data.read_csv and parse its list columns.
+
+    The parsed columns are cached in the CSV's .cols folder and reused for as
+    long as the CSV doesn't change.
+
+    Args:
+        path (str): the CSV file.
+        qualifiers, event_types (str): the names of the two list columns.
+        refresh (bool): rebuild both caches.
+        **kwargs: passed to read_csv.
+
+    Returns:
+        QualifiedEvents
+    '''
+    data = read_csv(path, refresh=refresh, **kwargs)
+    csv_hash = _csv_hash(path)
+    file = os.path.join(cache_dir(path), CACHE_NAME)
+    parsed = None if refresh or csv_hash is None else _load(file, csv_hash)
+    if parsed is None:
+        flags, values = parse_qualifiers(data[qualifiers])
+        parsed = (flags, values, parse_event_types(data[event_types]))
+        if csv_hash is not None:
+            try:
+                _save(file, csv_hash, *parsed)
+            except OSError:
+                pass
+    flags, values, types = parsed
+    values.index = data.index
+    return QualifiedEvents(data, flags, values, types)
@@ -0,0 +1,151 @@
+'''
+Rolling xG figures for every team at once, and their upsampled curves.
+
+The rolling gradient charts pivot the long xG table (one row per team, match
+and variable) into one row per team and match, take rolling means of xG for
+and against, and interpolate them onto a finer grid to shade between the two
+lines. RollingXG pivots once, computes the rolling means of every team with
+cumulative sums, and upsamples all the teams with a single np.interp call.
+Both steps are cached per window.
+
+Usage:
+    rolling = RollingXG(df, factor=10)
+    team_df = rolling.get(10260, window=10)          # rolling_xG_for, rolling_xG_ag, rolling_diff
+    curve = rolling.interpolated(10260, window=10)   # X, Y_for, Y_ag, Z
+'''
+
+import numpy as np
+import pandas as pd
+
+from socviz.groups import GroupedFrame
+
+
+def grouped_rolling_mean(values, starts, window):
+    '''
+    Rolling mean within contiguous groups, like
+    groupby().rolling(window, min_periods=0).mean() (NaNs are skipped).
+
+    Args:
+        values (np.ndarray): (rows, columns) values, groups in contiguous blocks.
+        starts (np.ndarray): the first row of the group of every row.
+        window (int): the number of rows in the window.
+    '''
+    values = np.asarray(values, dtype=float)
+    present = ~np.isnan(values)
+    sums = np.vstack([np.zeros((1, values.shape[1])), np.cumsum(np.where(present, values, 0), axis=0)])
+    counts = np.vstack([np.zeros((1, values.shape[1])), np.cumsum(present, axis=0)])
+    end = np.arange(len(values)) + 1
+    start = np.maximum(starts, end - window)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return (sums[end] - sums[start])/(counts[end] - counts[start])
+
+
+def upsample(groups, columns, factor=10, x="X"):
+    '''
+    Linearly interpolate columns of every group onto `factor` points per row.
+
+    All the groups are laid end to end on one axis so a single np.interp call
+    covers them; the query points never fall between two groups.
+
+    Args:
+        groups (GroupedFrame): rows in order within each group.
+        columns (dict): output column -> input column.
+        factor (int): points per row (factor - 1 new points between two rows).
+        x (str): name of the output column with the (fractional) row number.
+
+    Returns:
+        GroupedFrame: keyed like `groups`, (rows - 1)*factor + 1 points per group.
+    '''
+    frame = groups.frame
+    bounds = [groups.bounds(key) for key in groups.keys()]
+    sizes = np.array([end - start for start, end in bounds])
+    starts = np.array([start for start, _ in bounds])
+    points = np.where(sizes > 0, (sizes - 1)*factor + 1, 0)
+
+    # -- Position of every query point on the shared axis.
+    group = np.repeat(np.arange(len(sizes)), points)
+    local = np.arange(points.sum()) - np.repeat(np.cumsum(points) - points, points)
+    position = starts[group] + local/factor
+
+    keys = groups.keys()
+    data = {}
+    for i, name in enumerate(groups.by):
+        values = keys if len(groups.by) == 1 else [key[i] for key in keys]
+        data[name] = np.repeat(np.asarray(values), points)
+    data[x] = local/factor
+    axis = np.arange(len(frame), dtype=float)
+    for name, column in columns.items():
+        data[name] = np.interp(position, axis, frame[column].to_numpy(dtype=float))
+    return GroupedFrame(pd.DataFrame(data), groups.by)
+
+
+def rolling_xg(matches, window=10, team_col="team_id"):
+    '''
+    Add rolling_xG_for, rolling_xG_ag and rolling_diff to a table with one row
+    per team and match (in date order within each team).
+
+    Returns:
+        GroupedFrame: keyed by team_col.
+    '''
+    groups = GroupedFrame(matches, team_col)
+    frame = groups.frame.copy()
+    sizes = [end - start for start, end in (groups.bounds(key) for key in groups.keys())]
+    starts = np.repeat(np.cumsum(sizes) - sizes, sizes)
+    rolling = grouped_rolling_mean(frame[["xG_for", "xG_ag"]].to_numpy(), starts, window)
+    frame["rolling_xG_for"] = rolling[:, 0]
+    frame["rolling_xG_ag"] = rolling[:, 1]
+    frame["rolling_diff"] = frame["rolling_xG_for"] - frame["rolling_xG_ag"]
+    return GroupedFrame(frame, team_col)
+
+
+class RollingXG:
+    '''
+    Rolling and upsampled xG of every team, cached per window.
+
+    Args:
+        data (pd.DataFrame): the long table with date, match_id, team_id,
+            team_name, variable and value columns.
+        factor (int): points per match of the upsampled curves.
+    '''
+
+    def __init__(self, data, factor=10):
+        self.factor = factor
+        xg = data[data["variable"].isin(["xG_for", "xG_ag"])]
+        matches = (
+            xg.pivot(
+                index=["date", "match_id", "team_id", "team_name"],
+                columns="variable",
+                values="value"
+            )
+            .reset_index()
+        )
+        matches.columns.name = None
+        self.matches = matches[["date", "match_id", "team_id", "team_name", "xG_ag", "xG_for"]]
+        self._rolling = {}
+        self._dense = {}
+
+    def rolling(self, window=10):
+        if window not in self._rolling:
+            self._rolling[window] = rolling_xg(self.matches, window)
+        return self._rolling[window]
+
+    def dense(self, window=10):
+        if window not in self._dense:
+            self._dense[window] = upsample(
+                self.rolling(window),
+                {"Y_for": "rolling_xG_for", "Y_ag": "rolling_xG_ag", "Z": "rolling_diff"},
+                self.factor
+            )
+        return self._dense[window]
+
+    def get(self, team_id, window=10):
+        '''
+        The rolling figures of a team, one row per match.
+        '''
+        return self.rolling(window).get(team_id)
+
+    def interpolated(self, team_id, window=10):
+        '''
+        The X, Y_for, Y_ag and Z curves of a team, `factor` points per match.
+        '''
+        return self.dense(window).get(team_id)[["X", "Y_for", "Y_ag", "Z"]]
@@ -0,0 +1,408 @@
+'''
+Phase-level timing and memory traces of a visual's build.
+
+A trace is a tree of spans (phases) per thread. Each span records its wall
+time, the process CPU time, the artists created while it was open and the
+peak RSS of the process when it closed. Spans come from two places:
+    - phase(), a context manager / decorator for code we want to single out.
+    - hooks installed by recording() around the usual suspects: CSV loading
+      ("load"), LogoStore ("logos"), tight bbox and layout engines ("layout"),
+      the Agg draw ("draw") and PIL encoding ("encode").
+The time a span spends outside its children is its self time. The root span
+is the whole script, so its self time is the script's own code: transforms
+and artist creation.
+
+Traces are written as JSON (one file per visual) or in the Chrome trace event
+format (chrome://tracing, Perfetto). summary ranks the slowest phases across
+every trace in a folder.
+
+Usage:
+    python -m socviz.build --trace              # .build/traces/<visual>.json
+    python -m socviz.trace summary .build/traces
+    with phase("transform"):
+        ...
+'''
+
+import argparse
+import functools
+import glob
+import importlib
+import json
+import os
+import sys
+import threading
+import time
+from contextlib import ContextDecorator, contextmanager
+
+try:
+    import resource
+except ImportError:  # -- Windows
+    resource = None
+
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+TRACE_DIR = os.path.join(REPO_ROOT, ".build", "traces")
+
+_active = None
+
+
+def _max_rss():
+    '''
+    Peak resident set size of the process so far, in bytes.
+    '''
+    if resource is None:
+        return None
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # -- ru_maxrss is in kilobytes on Linux and bytes on macOS.
+    return rss if sys.platform == "darwin" else rss*1024
+
+
+class Tracer:
+    '''
+    Collects the spans of one build.
+    '''
+
+    def __init__(self, name):
+        self.name = name
+        self.origin = time.perf_counter()
+        self.spans = []
+        self.artists = 0
+        self._local = threading.local()
+        self._lock = threading.Lock()
+
+    def _stack(self):
+        if not hasattr(self._local, "stack"):
+            self._local.stack = []
+        return self._local.stack
+
+    def is_open(self, name=None):
+        '''
+        Whether this thread has an open span (named `name`, if given).
+        '''
+        stack = self._stack()
+        return bool(stack) and (name is None or any(x["name"] == name for x in stack))
+
+    def open(self, name, category=None):
+        stack = self._stack()
+        span = {
+            "name": name,
+            "category": category or name,
+            "thread": threading.get_ident(),
+            "depth": len(stack),
+            "start": time.perf_counter() - self.origin,
+            "_cpu": time.process_time(),
+            "_artists": self.artists,
+            "_rss": _max_rss(),
+            "_children": 0.,
+        }
+        stack.append(span)
+        return span
+
+    def close(self, span):
+        stack = self._stack()
+        stack.remove(span)
+        span["wall"] = time.perf_counter() - self.origin - span["start"]
+        span["self"] = span["wall"] - span.pop("_children")
+        span["cpu"] = time.process_time() - span.pop("_cpu")
+        span["artists"] = self.artists - span.pop("_artists")
+        rss = _max_rss()
+        start_rss = span.pop("_rss")
+        span["max_rss"] = rss
+        span["max_rss_growth"] = rss - start_rss if rss is not None else None
+        if stack:
+            stack[-1]["_children"] += span["wall"]
+        with self._lock:
+            self.spans.append(span)
+
+    @contextmanager
+    def phase(self, name, category=None):
+        span = self.open(name, category)
+        try:
+            yield span
+        finally:
+            self.close(span)
+
+    def to_dict(self):
+        spans = sorted(self.spans, key=lambda x: (x["start"], x["depth"]))
+        root = [x for x in spans if x["depth"] == 0 and x["name"] == self.name]
+        return {
+            "job": self.name,
+            "wall": root[0]["wall"] if root else None,
+            "spans": spans,
+        }
+
+    def to_chrome(self):
+        '''
+        The trace in the Chrome trace event format (complete "X" events).
+        '''
+        events = []
+        for span in self.spans:
+            events.append({
+                "name": span["name"],
+                "cat": span["category"],
+                "ph": "X",
+                "ts": span["start"]*1e6,
+                "dur": span["wall"]*1e6,
+                "pid": 0,
+                "tid": span["thread"],
+                "args": {k: span[k] for k in ("self", "cpu", "artists", "max_rss", "max_rss_growth", "depth")},
+            })
+        return {"traceEvents": events, "displayTimeUnit": "ms", "otherData": {"job": self.name}}
+
+    def write(self, path, format="json"):
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        data = self.to_chrome() if format == "chrome" else self.to_dict()
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(data, f, indent=1)
+        return path
+
+
+class phase(ContextDecorator):
+    '''
+    Record a span in the active trace, a no-op when nothing is being traced.
+
+    Usage:
+        with phase("transform"):
+            ...
+
+        @phase("artists")
+        def plot_panel(ax, ...):
+            ...
+    '''
+
+    def __init__(self, name, category=None):
+        self.name = name
+        self.category = category
+        self._local = threading.local()
+
+    def __enter__(self):
+        tracer = _active
+        span = tracer.open(self.name, self.category) if tracer is not None else None
+        self._local.__dict__.setdefault("spans", []).append((tracer, span))
+        return span
+
+    def __exit__(self, *exc):
+        tracer, span = self._local.spans.pop()
+        if tracer is not None:
+            tracer.close(span)
+        return False
+
+
+# ------------------------------------------------------------
+# Hooks
+
+def _traced(func, name, skip=None):
+    '''
+    Wrap `func` in a span named `name`. Nothing is recorded on threads
+    without an open span (worker pools) or when `skip` returns True (e.g.
+    nested calls of the same phase).
+    '''
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        tracer = _active
+        if tracer is None or not tracer.is_open() or tracer.is_open(name) or (skip and skip(tracer)):
+            return func(*args, **kwargs)
+        with tracer.phase(name):
+            return func(*args, **kwargs)
+    wrapper.__traced__ = func
+    return wrapper
+
+
+def _hooks():
+    '''
+    (owner, attribute, phase, skip) for every function recording() wraps.
+    Modules that aren't installed are skipped.
+    '''
+    def optional(module, owner, attributes, name, skip=None):
+        try:
+            target = importlib.import_module(module)
+        except ImportError:
+            return []
+        target = getattr(target, owner) if owner else target
+        return [(target, x, name, skip) for x in attributes]
+
+    # -- A Figure.draw outside of the Agg draw is the layout pass of savefig.
+    in_draw = lambda tracer: tracer.is_open("draw")
+    return (
+        optional("pandas", None, ["read_csv", "read_json"], "load")
+        + optional("socviz.data", None, ["read_csv"], "load")
+        + optional("socviz.qualifiers", None, ["read_event_csv"], "load")
+        + optional("socviz.events", None, ["read_events"], "load")
+        + optional("socviz.logos", "LogoStore", ["prefetch", "open_url"], "logos")
+        + optional("matplotlib.figure", "Figure", ["tight_layout", "get_tightbbox"], "layout")
+        + optional("matplotlib.figure", "Figure", ["draw"], "layout", in_draw)
+        + optional("matplotlib.backends.backend_agg", "FigureCanvasAgg", ["draw"], "draw")
+        + optional("PIL.Image", "Image", ["save"], "encode")
+    )
+
+
+def _count_artists(tracer):
+    from matplotlib.artist import Artist
+    init = Artist.__init__
+
+    @functools.wraps(init)
+    def wrapper(self, *args, **kwargs):
+        tracer.artists += 1
+        init(self, *args, **kwargs)
+    wrapper.__traced__ = init
+    return Artist, "__init__", wrapper
+
+
+def install(tracer):
+    '''
+    Make `tracer` the active trace and wrap the hooked functions.
+
+    Returns:
+        list: what to restore, see uninstall.
+    '''
+    global _active
+    _active = tracer
+    patched = []
+    for owner, attribute, name, skip in _hooks():
+        original = getattr(owner, attribute)
+        if hasattr(original, "__traced__"):
+            continue
+        setattr(owner, attribute, _traced(original, name, skip))
+        patched.append((owner, attribute, original))
+    try:
+        owner, attribute, wrapper = _count_artists(tracer)
+        patched.append((owner, attribute, getattr(owner, attribute)))
+        setattr(owner, attribute, wrapper)
+    except ImportError:
+        pass
+    return patched
+
+
+def uninstall(patched):
+    global _active
+    for owner, attribute, original in reversed(patched):
+        setattr(owner, attribute, original)
+    _active = None
+
+
+@contextmanager
+def recording(name, path=None, format="json"):
+    '''
+    Trace everything inside the block as one build named `name`, and write
+    the trace to `path` if given.
+    '''
+    tracer = Tracer(name)
+    patched = install(tracer)
+    try:
+        with tracer.phase(name, "script"):
+            yield tracer
+    finally:
+        uninstall(patched)
+        if path is not None:
+            tracer.write(path, format)
+
+
+def job_name(path):
+    '''
+    07112022/07112022.py for files in the repository, the file name otherwise.
+    '''
+    path = os.path.abspath(path)
+    name = os.path.relpath(path, REPO_ROOT)
+    return os.path.basename(path) if name.startswith(os.pardir) else name
+
+
+def trace_path(trace_dir, name, format="json"):
+    '''
+    .build/traces/07112022_07112022.py.json (or .trace.json for Chrome traces).
+    '''
+    suffix = ".trace.json" if format == "chrome" else ".json"
+    return os.path.join(trace_dir, name.replace(os.sep, "_") + suffix)
+
+
+# ------------------------------------------------------------
+# Summary
+
+def load_trace(path):
+    '''
+    Read a trace written in either format as (job, list of spans).
+    '''
+    with open(path, encoding="utf-8") as f:
+        data = json.load(f)
+    if "traceEvents" in data:
+        spans = [
+            dict(x["args"], name=x["name"], category=x["cat"], wall=x["dur"]/1e6)
+            for x in data["traceEvents"] if x.get("ph") == "X"
+        ]
+        return data.get("otherData", {}).get("job", path), spans
+    return data["job"], data["spans"]
+
+
+def summarize(paths, top=15, stream=sys.stdout):
+    '''
+    Print the phases ranked by total self time across all the traces, then
+    the slowest individual (visual, phase) pairs.
+    '''
+    totals = {}
+    pairs = []
+    for path in paths:
+        job, spans = load_trace(path)
+        per_job = {}
+        for span in spans:
+            # -- The root's self time is the script's own code.
+            category = span["category"]
+            entry = totals.setdefault(category, {"self": 0., "cpu": 0., "artists": 0, "calls": 0, "jobs": set()})
+            entry["self"] += span["self"]
+            entry["calls"] += 1
+            entry["jobs"].add(job)
+            if category == "script":
+                entry["artists"] += span.get("artists") or 0
+            per_job[category] = per_job.get(category, 0.) + span["self"]
+        pairs.extend((seconds, job, category) for category, seconds in per_job.items())
+
+    grand_total = sum(x["self"] for x in totals.values()) or 1.
+    print(f"{len(paths)} traces\n", file=stream)
+    print(f"{'phase':<10} {'self (s)':>9} {'share':>7} {'calls':>7} {'visuals':>8}", file=stream)
+    for category, entry in sorted(totals.items(), key=lambda x: -x[1]["self"]):
+        print(
+            f"{category:<10} {entry['self']:>9.2f} {entry['self']/grand_total:>7.1%} "
+            f"{entry['calls']:>7} {len(entry['jobs']):>8}",
+            file=stream
+        )
+    print(f"\nslowest phases:", file=stream)
+    width = max([len(x[1]) for x in pairs] + [6])
+    for seconds, job, category in sorted(pairs, reverse=True)[:top]:
+        print(f"{job:<{width}}  {category:<10} {seconds:>8.2f}s", file=stream)
+    return totals
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Summarize or record phase traces of the visuals.")
+    commands = parser.add_subparsers(dest="command", required=True)
+    summary = commands.add_parser("summary", help="rank the slowest phases across traces")
+    summary.add_argument("paths", nargs="*", default=[TRACE_DIR], help="trace files or folders")
+    summary.add_argument("--top", type=int, default=15, help="number of (visual, phase) pairs to list")
+    run = commands.add_parser("run", help="trace a single script or notebook")
+    run.add_argument("path", help="the script or notebook")
+    run.add_argument("--trace-dir", default=TRACE_DIR)
+    run.add_argument("--format", choices=["json", "chrome"], default="json")
+    args = parser.parse_args(argv)
+
+    if args.command == "summary":
+        files = []
+        for path in args.paths:
+            files += sorted(glob.glob(os.path.join(path, "*.json"))) if os.path.isdir(path) else [path]
+        if not files:
+            print("No traces found, run python -m socviz.build --trace first.", file=sys.stderr)
+            return 1
+        summarize(files, top=args.top)
+        return 0
+
+    # -- Under python -m this module is __main__, phase() looks at socviz.trace.
+    from socviz import trace
+    from socviz.build import run_job
+    path = os.path.abspath(args.path)
+    name = job_name(path)
+    output = trace_path(os.path.abspath(args.trace_dir), name, args.format)
+    with trace.recording(name, output, args.format):
+        run_job(path)
+    print(f"Wrote {output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
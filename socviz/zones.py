@@ -0,0 +1,244 @@
+'''
+Vectorized pitch-zone classification.
+
+A zone scheme is compiled once into breakpoint arrays, and classifying
+events is then a couple of np.searchsorted calls and a table lookup, no
+matter how many zones or events there are.
+
+Two kinds of schemes:
+    ZoneScheme: named rectangles with closed bounds where the first zone that
+        contains a point wins (the 08292022 shooting zones, the penalty box).
+    ZoneGrid: a grid of right-closed cells like pd.cut (mplsoccer's
+        positional zones, thirds).
+
+Usage:
+    df['zone_area'] = SHOT_ZONES.labels(df['x'], df['y'])
+    df['is_in_box'] = PENALTY_BOX.contains(df['y'], df['x'])
+    grid = positional_zones('opta')
+    counts = grid.aggregate(df['x'], df['y'])     # one row per cell with its bounds
+'''
+
+import numpy as np
+import pandas as pd
+
+
+# ------------------------------------------------------------
+# Pitch dimensions (same as mplsoccer's pitch.dim)
+
+PITCH_SIZE = {
+    "opta": (100, 100),
+    "uefa": (105, 68),
+    "statsbomb": (120, 80),
+}
+
+POSITIONAL_EDGES = {
+    "opta": (
+        [0, 17, 33.5, 50, 66.5, 83, 100],
+        [0, 21.1, 36.8, 63.2, 78.9, 100]
+    ),
+    "uefa": (
+        [0, 16.5, 34.5, 52.5, 70.5, 88.5, 105],
+        [0, 13.84, 24.84, 43.16, 54.16, 68]
+    ),
+    "statsbomb": (
+        [0, 18, 39, 60, 81, 102, 120],
+        [0, 18, 30, 50, 62, 80]
+    ),
+}
+
+
+def _slots(edges, values):
+    '''
+    Position of each value relative to the sorted edges: 2i + 1 when it's on
+    edges[i], 2i when it falls between edges[i - 1] and edges[i].
+    '''
+    values = np.asarray(values, dtype=float)
+    i = np.searchsorted(edges, values, side="left")
+    on_edge = edges[np.minimum(i, len(edges) - 1)] == values
+    return 2*i + on_edge
+
+
+def _slot_values(edges):
+    '''
+    A representative value of every slot (see _slots).
+    '''
+    below = np.concatenate([[-np.inf], edges])
+    above = np.concatenate([edges, [np.inf]])
+    with np.errstate(invalid="ignore"):
+        mids = np.where(
+            np.isfinite(below) & np.isfinite(above),
+            (below + above)/2,
+            np.where(np.isfinite(below), below + 1, above - 1)
+        )
+    values = np.empty(2*len(edges) + 1)
+    values[0::2] = mids
+    values[1::2] = edges
+    return values
+
+
+class ZoneScheme:
+    '''
+    Named rectangular zones with closed bounds. When zones overlap (or share
+    an edge) the first one in `zones` wins, like a chain of if statements.
+
+    Args:
+        zones (dict): name -> (x_min, x_max, y_min, y_max). Use np.inf for
+            open-ended zones.
+    '''
+
+    def __init__(self, zones):
+        self.names = list(zones)
+        bounds = np.array([zones[x] for x in self.names], dtype=float).reshape(-1, 4)
+        self.bounds = bounds
+        self.edges_x = np.unique(bounds[:, :2])
+        self.edges_y = np.unique(bounds[:, 2:])
+
+        # -- Evaluate the zones once at a representative point of every slot.
+        px = _slot_values(self.edges_x)[:, None]
+        py = _slot_values(self.edges_y)[None, :]
+        table = np.full((len(px), py.shape[1]), -1, dtype=np.int64)
+        for code in range(len(self.names) - 1, -1, -1):
+            x_min, x_max, y_min, y_max = bounds[code]
+            inside = (px >= x_min) & (px <= x_max) & (py >= y_min) & (py <= y_max)
+            table[inside] = code
+        self.table = table
+
+    @classmethod
+    def from_bounds(cls, zone_areas):
+        '''
+        Build a scheme from {'zone': {'x_lower_bound': ..., 'x_upper_bound': ...,
+        'y_lower_bound': ..., 'y_upper_bound': ...}}.
+        '''
+        return cls({
+            name: (
+                zone["x_lower_bound"], zone["x_upper_bound"],
+                zone["y_lower_bound"], zone["y_upper_bound"]
+            )
+            for name, zone in zone_areas.items()
+        })
+
+    def classify(self, x, y):
+        '''
+        Zone codes (positions in self.names), -1 outside every zone.
+        '''
+        x = np.asarray(x, dtype=float)
+        y = np.asarray(y, dtype=float)
+        codes = self.table[_slots(self.edges_x, x), _slots(self.edges_y, y)]
+        return np.where(np.isnan(x) | np.isnan(y), -1, codes)
+
+    def labels(self, x, y):
+        '''
+        Zone names, None outside every zone.
+        '''
+        names = np.array(self.names + [None], dtype=object)
+        return names[self.classify(x, y)]
+
+    def contains(self, x, y):
+        '''
+        Whether each point lies in any of the zones.
+        '''
+        return self.classify(x, y) >= 0
+
+
+class ZoneGrid:
+    '''
+    A grid of cells with edges like pd.cut: right-closed, and the lowest edge
+    is only included when include_lowest is True.
+
+    Cells are numbered x-major: zone = ix*(cells along y) + iy.
+    '''
+
+    def __init__(self, edges_x, edges_y, include_lowest=False):
+        self.edges_x = np.asarray(edges_x, dtype=float)
+        self.edges_y = np.asarray(edges_y, dtype=float)
+        self.include_lowest = include_lowest
+        self.shape = (len(self.edges_x) - 1, len(self.edges_y) - 1)
+
+    def _bin(self, edges, values):
+        values = np.asarray(values, dtype=float)
+        i = np.searchsorted(edges, values, side="left") - 1
+        if self.include_lowest:
+            i[values == edges[0]] = 0
+        i[(i < 0) | (i >= len(edges) - 1) | np.isnan(values)] = -1
+        return i
+
+    def bins(self, x, y):
+        '''
+        (ix, iy) cell indices, -1 outside the grid.
+        '''
+        return self._bin(self.edges_x, x), self._bin(self.edges_y, y)
+
+    def classify(self, x, y):
+        '''
+        Cell number of each point, -1 outside the grid.
+        '''
+        ix, iy = self.bins(x, y)
+        return np.where((ix >= 0) & (iy >= 0), ix*self.shape[1] + iy, -1)
+
+    def aggregate(self, x, y, weights=None, name="count"):
+        '''
+        Count (or sum `weights`) the points of every cell.
+
+        Returns:
+            pd.DataFrame: one row per cell, ordered by x and then y, with the
+                cell's left_x, right_x, left_y and right_y bounds.
+        '''
+        nx, ny = self.shape
+        zones = self.classify(x, y)
+        inside = zones >= 0
+        if weights is None:
+            totals = np.bincount(zones[inside], minlength=nx*ny)
+        else:
+            weights = np.asarray(weights)
+            totals = np.bincount(zones[inside], weights=weights[inside], minlength=nx*ny)
+            if weights.dtype.kind in "biu":
+                totals = totals.astype(np.int64)
+        ix, iy = np.divmod(np.arange(nx*ny), ny)
+        return pd.DataFrame({
+            "zone": np.arange(nx*ny),
+            "left_x": self.edges_x[ix],
+            "right_x": self.edges_x[ix + 1],
+            "left_y": self.edges_y[iy],
+            "right_y": self.edges_y[iy + 1],
+            name: totals
+        })
+
+
+# ------------------------------------------------------------
+# Predefined schemes
+
+# -- The 08292022 shooting zones, on a half VerticalPitch(pitch_type='uefa')
+# -- (x across the pitch, y towards goal).
+SHOT_ZONES = ZoneScheme({
+    "zone_1": (54.16, 68, 88.5, 105),
+    "zone_2": (0, 13.84, 88.5, 105),
+    "zone_3": (54.16, 68, 20, 88.5),
+    "zone_4": (0, 13.84, 20, 88.5),
+    "zone_5": (13.84, 24.84, 88.5, 105),
+    "zone_6": (43.16, 54.16, 88.5, 105),
+    "zone_7": (24.84, 43.16, 88.5, 99.5),
+    "zone_8": (24.84, 43.16, 99.5, 105),
+    "zone_9": (13.84, 24.84, 75, 88.5),
+    "zone_10": (43.16, 54.16, 75, 88.5),
+    "zone_11": (24.84, 43.16, 75, 88.5),
+    "zone_12": (13.84, 54.16, 20, 75),
+})
+
+# -- The attacking penalty box on the same vertical uefa pitch.
+PENALTY_BOX = ZoneScheme({"box": (13.84, 54.16, 88.5, np.inf)})
+
+
+def positional_zones(pitch_type="opta"):
+    '''
+    mplsoccer's juego de posición zones (pitch.dim.positional_x/_y).
+    '''
+    edges_x, edges_y = POSITIONAL_EDGES[pitch_type]
+    return ZoneGrid(edges_x, edges_y)
+
+
+def thirds(pitch_type="opta"):
+    '''
+    Defensive, middle and attacking thirds along the length of the pitch.
+    '''
+    length, width = PITCH_SIZE[pitch_type]
+    return ZoneGrid(np.linspace(0, length, 4), [0, width], include_lowest=True)
@@ -0,0 +1,86 @@
+'''
+The columnar CSV cache against pd.read_csv, on every data/*.csv file of the
+archive.
+
+Usage:
+    python -m pytest tests
+'''
+
+import glob
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+
+import numpy as np
+import pandas as pd
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from socviz.data import cache_dir, read_csv
+
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def _assert_same(test, df, expected):
+    test.assertEqual(list(df.columns), list(expected.columns))
+    pd.testing.assert_index_equal(df.index, expected.index, exact=False)
+    for column in expected.columns:
+        # -- Strings come back as objects, whatever pandas infers for them.
+        a, b = df[column], expected[column]
+        if b.dtype.kind in "biufM":
+            test.assertEqual(a.dtype, b.dtype, column)
+            np.testing.assert_array_equal(a.to_numpy(), b.to_numpy(), err_msg=column)
+        else:
+            test.assertEqual(a.isna().tolist(), b.isna().tolist(), column)
+            test.assertEqual(a[b.notna()].tolist(), b[b.notna()].tolist(), column)
+
+
+class TestDataCache(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp, ignore_errors=True)
+
+    def _copy(self, path):
+        copy = os.path.join(self.tmp, os.path.basename(path))
+        shutil.copy2(path, copy)
+        return copy
+
+    def test_round_trip(self):
+        paths = sorted(glob.glob(os.path.join(REPO_ROOT, "*", "data", "*.csv")))
+        self.assertTrue(paths)
+        for path in paths:
+            with self.subTest(os.path.relpath(path, REPO_ROOT)):
+                copy = self._copy(path)
+                expected = pd.read_csv(path, index_col=0, encoding="utf-8")
+                # -- The first read builds the cache, the second one maps it.
+                _assert_same(self, read_csv(copy, index_col=0, encoding="utf-8"), expected)
+                self.assertTrue(os.path.exists(os.path.join(cache_dir(copy), "meta.json")))
+                _assert_same(self, read_csv(copy, index_col=0, encoding="utf-8"), expected)
+                _assert_same(self, read_csv(copy, mmap_mode=None, index_col=0, encoding="utf-8"), expected)
+
+    def test_invalidation(self):
+        path = os.path.join(self.tmp, "data.csv")
+        pd.DataFrame({"a": [1, 2], "b": ["x", "y"]}).to_csv(path, index=False)
+        self.assertEqual(read_csv(path)["a"].tolist(), [1, 2])
+        # -- Same size, new contents.
+        pd.DataFrame({"a": [3, 4], "b": ["x", "y"]}).to_csv(path, index=False)
+        self.assertEqual(read_csv(path)["a"].tolist(), [3, 4])
+        # -- New read options rebuild the cache too.
+        self.assertEqual(read_csv(path, index_col=0).index.tolist(), [3, 4])
+        self.assertEqual(read_csv(path, categorical=True)["b"].dtype, "category")
+
+    def test_copy_on_write(self):
+        path = self._copy(os.path.join(REPO_ROOT, "10312022", "data", "10312022_epl_shots.csv"))
+        read_csv(path, index_col=0)
+        df = read_csv(path, index_col=0)
+        df.loc[df.index[0], "xG"] = -1.
+        self.assertNotEqual(read_csv(path, index_col=0)["xG"].iloc[0], -1.)
+
+
+if __name__ == "__main__":
+    unittest.main()
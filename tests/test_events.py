@@ -0,0 +1,87 @@
+'''
+The streaming WhoScored reader against json.load, on the 09052022 match file
+and on documents built to split tokens across chunks.
+
+Usage:
+    python -m pytest tests
+'''
+
+import json
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+from unittest import mock
+
+import numpy as np
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from socviz import events
+from socviz.events import iter_events, read_events
+
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+MATCH = os.path.join(REPO_ROOT, "09052022", "data", "brighton_leicester_09052022.json")
+PLAYERS = [122926, 71824, 345319, 410175, 113994, 353191]
+
+
+class TestEvents(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        with open(MATCH, encoding="utf-8") as f:
+            cls.data = json.load(f)
+
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp, ignore_errors=True)
+
+    def test_match_file(self):
+        self.assertEqual(list(iter_events(MATCH)), self.data["events"])
+
+    def test_small_chunks(self):
+        path = os.path.join(self.tmp, "match.json")
+        document = {
+            "matchId": 1,
+            "names": {"a": 'with "quotes", [brackets] and {braces}', "b": "\\"},
+            "events": [
+                {"id": 1.5, "playerId": 7, "x": 12345.678, "qualifiers": [{"value": "]}"}]},
+                {"id": 2, "text": "café \\u00e9 \"}", "x": -1e-05},
+                [], {}, "", 0, None, True,
+            ],
+            "after": [[1, [2, [3]]], {"deep": {"er": [4, "5"]}}],
+        }
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(document, f, indent=1)
+        # -- Every chunk size up to the whole document, so each token gets split.
+        size = os.path.getsize(path)
+        for chunk_size in range(1, size + 1, 3):
+            with mock.patch.object(events, "CHUNK_SIZE", chunk_size):
+                self.assertEqual(list(iter_events(path)), document["events"], chunk_size)
+                self.assertEqual(list(iter_events(path, "after")), document["after"], chunk_size)
+        with mock.patch.object(events, "CHUNK_SIZE", 1000):
+            self.assertEqual(list(iter_events(MATCH)), self.data["events"])
+
+    def test_touches(self):
+        # -- The filter 09052022 ran over the parsed document.
+        expected = []
+        for player_id in PLAYERS:
+            for d in self.data["events"]:
+                if d.get("playerId") == player_id and d["isTouch"]:
+                    expected.append(d)
+
+        table = read_events(MATCH)
+        self.assertEqual(len(table), len(self.data["events"]))
+        touches = table.to_frame(["playerId", "x", "y", "type"], player_ids=PLAYERS, touches_only=True)
+        self.assertEqual(touches["playerId"].tolist(), [x["playerId"] for x in expected])
+        np.testing.assert_array_equal(touches["x"], [x["x"] for x in expected])
+        np.testing.assert_array_equal(touches["y"], [x["y"] for x in expected])
+        self.assertEqual(touches["type"].tolist(), [x["type"]["displayName"] for x in expected])
+        self.assertEqual(len(table.rows([12345])), 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,80 @@
+'''
+save_variants against two plain savefig calls.
+
+Usage:
+    python -m pytest tests
+'''
+
+import os
+import sys
+import tempfile
+import unittest
+from unittest import mock
+
+import numpy as np
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.figure import Figure
+from PIL import Image
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from socviz import export
+
+
+FACECOLOR = "#EFE9E6"
+
+
+def _figure(axes_color=FACECOLOR, logos=0):
+    fig = Figure(figsize=(2, 2), dpi=100, facecolor=FACECOLOR)
+    FigureCanvasAgg(fig)
+    ax = fig.add_subplot(121, facecolor=axes_color)
+    ax.plot([0, 1], [0, 1])
+    fig.add_subplot(122, facecolor=FACECOLOR)
+    for i in range(logos):
+        # -- Like the crest axes of the scripts: white face, axis off.
+        logo_ax = fig.add_axes([.1*i, .9, .1, .1])
+        logo_ax.imshow(np.ones((4, 4, 3)))
+        logo_ax.axis("off")
+    return fig
+
+
+def _read(path):
+    return np.asarray(Image.open(path).convert("RGBA")).astype(int)
+
+
+class SaveVariantsTest(unittest.TestCase):
+
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.dir = tmp.name
+
+    def save(self, fig):
+        path = os.path.join(self.dir, "figure.png")
+        export.save_variants(fig, path, dpi=100)
+        options = dict(dpi=100, bbox_inches="tight", pad_inches=.1)
+        fig.savefig(os.path.join(self.dir, "expected.png"), facecolor=FACECOLOR, edgecolor="none", **options)
+        fig.savefig(os.path.join(self.dir, "expected_tr.png"), transparent=True, **options)
+        return [
+            (_read(os.path.join(self.dir, x)), _read(os.path.join(self.dir, f"expected{x[6:]}")))
+            for x in ("figure.png", "figure_tr.png")
+        ]
+
+    def test_matches_savefig(self):
+        (opaque, expected), (transparent, expected_tr) = self.save(_figure())
+        # -- Compositing rounds differently from Agg by a few levels.
+        self.assertLessEqual(np.abs(opaque - expected).max(), 4)
+        self.assertEqual(np.abs(transparent - expected_tr).max(), 0)
+
+    def test_axes_with_their_own_background(self):
+        (opaque, expected), (transparent, expected_tr) = self.save(_figure(axes_color="#123456"))
+        self.assertEqual(np.abs(opaque - expected).max(), 0)
+        self.assertEqual(np.abs(transparent - expected_tr).max(), 0)
+
+    def test_single_draw_with_logo_axes(self):
+        with mock.patch.object(export, "render_rgba", wraps=export.render_rgba) as render:
+            export.save_variants(_figure(logos=3), os.path.join(self.dir, "figure.png"), dpi=100)
+        self.assertEqual(render.call_count, 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
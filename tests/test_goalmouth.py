@@ -0,0 +1,78 @@
+'''
+Goal-mouth histograms against the pd.cut and groupby shot_map_bins they
+replaced in 08012022, on its Women's Euro shots.
+
+Usage:
+    python -m pytest tests
+'''
+
+import os
+import sys
+import unittest
+
+import numpy as np
+import pandas as pd
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from socviz.goalmouth import GoalMouthBins
+
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SHOTS = os.path.join(REPO_ROOT, "08012022", "data", "08012022_womens_euro.csv")
+
+
+def shot_map_bins(match_id, team_id, grid_x, grid_y, data):
+    data = data.copy()
+    width = 24
+    height = 8
+    increment_x = int(width / grid_x)
+    increment_y = int(height / grid_y)
+    data['x'] = [((x*width)/2.1) for x in data['x']]
+    data['y'] = [((y*height)/.7) for y in data['y']]
+    bins_x = range(0, width + 1, increment_x)
+    bins_y = range(0, height + 1, increment_y)
+    data['bins_x'] = pd.cut(data['x'], bins_x)
+    data['bins_y'] = pd.cut(data['y'], bins_y)
+    data['shot_aux'] = 1
+    # -- observed=False was the groupby default then: every cell gets a row.
+    data_bins = (
+        data
+        .groupby(['bins_x', 'bins_y', 'team_id', 'match_id'], observed=False)
+        ['shot_aux'].sum()
+        .reset_index()
+    )
+    total_shots = data.groupby(['team_id', 'match_id'])['shot_aux'].sum().reset_index()
+    total_shots.columns = ['team_id', 'match_id', 'total']
+    data_bins = pd.merge(data_bins, total_shots, how='left', on=['match_id', 'team_id'])
+    data_bins['shot_pct'] = data_bins['shot_aux']/data_bins['total']
+    team_bins = data_bins[(data_bins['team_id'] == team_id) & (data_bins['match_id'] == match_id)].reset_index()
+    team_bins = team_bins.sort_values(by=['bins_x', 'bins_y'])
+    return team_bins['shot_pct'].to_list()
+
+
+class TestGoalMouthBins(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.shots = pd.read_csv(SHOTS, index_col=0)
+
+    def test_matches_pd_cut(self):
+        bins = GoalMouthBins(self.shots, by=["match_id", "team_id"])
+        keys = self.shots[["match_id", "team_id"]].drop_duplicates().itertuples(index=False)
+        for match_id, team_id in list(keys)[:8]:
+            for grid_x, grid_y in [(6, 2), (4, 2), (8, 4)]:
+                expected = shot_map_bins(match_id, team_id, grid_x, grid_y, self.shots)
+                np.testing.assert_allclose(bins.get((match_id, team_id), grid_x, grid_y), expected)
+
+    def test_points_and_odd_grids(self):
+        bins = GoalMouthBins(self.shots, by="team_id")
+        team_id = self.shots["team_id"].iloc[0]
+        x, _ = bins.points(team_id)
+        team = self.shots[self.shots["team_id"] == team_id]
+        np.testing.assert_allclose(x, team["x"]*24/2.1)
+        with self.assertRaises(ValueError):
+            bins.histograms(5, 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
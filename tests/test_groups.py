@@ -0,0 +1,51 @@
+'''
+GroupedFrame against pandas groupby.
+
+Usage:
+    python -m pytest tests
+'''
+
+import os
+import sys
+import unittest
+
+import numpy as np
+import pandas as pd
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from socviz.groups import GroupedFrame
+
+
+class TestGroupedFrame(unittest.TestCase):
+
+    def setUp(self):
+        rng = np.random.default_rng(0)
+        self.df = pd.DataFrame({
+            "match_id": rng.integers(0, 5, 200),
+            "team_id": rng.choice([10, 20, 30], 200),
+            "x": rng.random(200),
+        })
+        self.df = self.df[~((self.df["match_id"] == 4) & (self.df["team_id"] == 30))]
+
+    def test_matches_groupby(self):
+        for by in ["team_id", ["match_id", "team_id"]]:
+            groups = GroupedFrame(self.df, by)
+            expected = self.df.groupby(by, sort=False)
+            self.assertEqual(len(groups), expected.ngroups)
+            for key, group in expected:
+                key = key[0] if isinstance(key, tuple) and len(key) == 1 else key
+                pd.testing.assert_frame_equal(groups.get(key), group.reset_index(drop=True))
+                np.testing.assert_array_equal(groups.values(key, "x"), group["x"].to_numpy())
+
+    def test_missing_key(self):
+        groups = GroupedFrame(self.df, ["match_id", "team_id"])
+        self.assertNotIn((4, 30), groups)
+        self.assertEqual(groups.bounds((4, 30)), (0, 0))
+        empty = groups.get((4, 30))
+        self.assertTrue(empty.empty)
+        self.assertEqual(list(empty.columns), list(self.df.columns))
+        self.assertEqual(groups.values((4, 30), "x").size, 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
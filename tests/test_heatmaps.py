@@ -0,0 +1,88 @@
+'''
+Zone heatmaps against one fill_between per zone, the way the zone boards
+drew them before.
+
+Usage:
+    python -m pytest tests
+'''
+
+import os
+import sys
+import unittest
+
+import numpy as np
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.colors import to_rgba_array
+from matplotlib.figure import Figure
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from socviz.heatmaps import zone_heatmap, zone_rgba
+from socviz.zones import positional_zones
+
+
+def _render(draw, vertical=False):
+    fig = Figure(figsize=(4, 3), dpi=100)
+    canvas = FigureCanvasAgg(fig)
+    ax = fig.add_axes([0, 0, 1, 1])
+    ax.set_axis_off()
+    draw(ax)
+    ax.set_xlim(0, 100)
+    ax.set_ylim(0, 100)
+    if vertical:
+        ax.set_xlim(100, 0)
+    canvas.draw()
+    return np.asarray(canvas.buffer_rgba()).astype(int)
+
+
+def _fill_zones(ax, grid, rgba, vertical=False):
+    nx, ny = grid.shape
+    for ix in range(nx):
+        for iy in range(ny):
+            x0, x1 = grid.edges_x[ix], grid.edges_x[ix + 1]
+            y0, y1 = grid.edges_y[iy], grid.edges_y[iy + 1]
+            if vertical:
+                ax.fill_betweenx([x0, x1], y0, y1, color=rgba[ix, iy], lw=0)
+            else:
+                ax.fill_between([x0, x1], y0, y1, color=rgba[ix, iy], lw=0)
+
+
+class ZoneHeatmapTest(unittest.TestCase):
+
+    def setUp(self):
+        self.grid = positional_zones("opta")
+        nx, ny = self.grid.shape
+        self.values = np.linspace(0, 1, nx*ny)
+        self.colors = np.select(
+            [self.values > .55, self.values < .45], ["#3E5641", "#461220"], "#FCB9B2"
+        )
+
+    def test_colors(self):
+        rgba = zone_rgba(self.grid, colors=self.colors, alpha=.75)
+        np.testing.assert_allclose(rgba[0, 0], to_rgba_array("#461220")[0]*[1, 1, 1, .75])
+        for vertical in (False, True):
+            with self.subTest(vertical=vertical):
+                expected = _render(lambda ax: _fill_zones(ax, self.grid, rgba, vertical), vertical)
+                mesh = _render(
+                    lambda ax: zone_heatmap(ax, self.grid, colors=self.colors, alpha=.75, vertical=vertical),
+                    vertical
+                )
+                self.assertEqual(np.abs(expected - mesh).max(), 0)
+
+    def test_values(self):
+        rgba = zone_rgba(self.grid, self.values, cmap="viridis", vmin=0, vmax=1)
+        expected = _render(lambda ax: _fill_zones(ax, self.grid, rgba))
+        mesh = _render(lambda ax: zone_heatmap(ax, self.grid, self.values, cmap="viridis", vmin=0, vmax=1))
+        self.assertEqual(np.abs(expected - mesh).max(), 0)
+
+    def test_face_order(self):
+        fig = Figure()
+        ax = fig.add_subplot()
+        nx, ny = self.grid.shape
+        mesh = zone_heatmap(ax, self.grid, colors=self.colors)
+        # -- Faces run along x first, then y.
+        faces = mesh.to_rgba(mesh.get_array()).reshape(ny, nx, 4)
+        np.testing.assert_allclose(faces.transpose(1, 0, 2), zone_rgba(self.grid, colors=self.colors))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,68 @@
+'''
+Inequality metrics against the per-team pandas code (and the O(n^2) Gini)
+they replaced in 07252022, on its Serie A touches.
+
+Usage:
+    python -m pytest tests
+'''
+
+import os
+import sys
+import unittest
+
+import numpy as np
+import pandas as pd
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from socviz.inequality import METRICS, inequality_metrics
+
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+TOUCHES = os.path.join(REPO_ROOT, "07252022", "data", "seriea_touches_07252022.csv")
+
+
+def _hoover_index(touches):
+    mean_ = touches.mean()
+    return 0.5*(abs(touches - mean_).sum())/touches.sum()
+
+
+def _gini_coefficient(touches):
+    abs_differences = []
+    for i in touches:
+        for j in touches:
+            abs_differences.append(abs(i - j))
+    return sum(abs_differences)/(2*(touches.shape[0]**2)*touches.mean())
+
+
+class TestInequality(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.data = pd.read_csv(TOUCHES, index_col=0)
+
+    def test_matches_original(self):
+        expected = (
+            self.data.groupby(["teamId", "teamName"])
+            ["touches"]
+            .agg(bottom_4=lambda x: x.quantile(.4), top_10=lambda x: x.quantile(.9))
+            .reset_index()
+        )
+        expected["palma_ratio"] = expected["top_10"]/expected["bottom_4"]
+        teams = dict(list(self.data.groupby("teamId")["touches"]))
+        expected["hoover_index"] = [_hoover_index(teams[x]) for x in expected["teamId"]]
+        expected["gini_coefficient"] = [_gini_coefficient(teams[x]) for x in expected["teamId"]]
+
+        result = inequality_metrics(self.data)
+        pd.testing.assert_frame_equal(result[expected.columns], expected, check_dtype=False)
+
+    def test_bootstrap(self):
+        result = inequality_metrics(self.data, bootstrap=200, seed=1)
+        again = inequality_metrics(self.data, bootstrap=200, seed=1)
+        pd.testing.assert_frame_equal(result, again)
+        for k in METRICS:
+            self.assertTrue((result[f"{k}_low"] <= result[f"{k}_high"]).all())
+            self.assertTrue(np.isfinite(result[[f"{k}_low", f"{k}_high"]].to_numpy()).all())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,152 @@
+'''
+LogoStore against a local stand-in for the logo server.
+
+Usage:
+    python -m pytest tests
+'''
+
+import io
+import os
+import sys
+import tempfile
+import threading
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from PIL import Image
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from socviz.logos import LogoStore
+
+
+def _png(color, size=(32, 32)):
+    buffer = io.BytesIO()
+    Image.new("RGBA", size, color).save(buffer, format="PNG")
+    return buffer.getvalue()
+
+
+class _LogoServer:
+    '''
+    Serves /<name>.png from a dict of PNG bytes on localhost and counts the
+    requests made for each path.
+    '''
+
+    def __init__(self, logos):
+        self.logos = logos
+        self.requests = {}
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                server.requests[self.path] = server.requests.get(self.path, 0) + 1
+                content = server.logos.get(self.path.lstrip("/"))
+                if content is None:
+                    self.send_error(404)
+                    return
+                self.send_response(200)
+                self.send_header("Content-Type", "image/png")
+                self.send_header("Content-Length", str(len(content)))
+                self.end_headers()
+                self.wfile.write(content)
+
+            def log_message(self, *args):
+                pass
+
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.base_url = f"http://127.0.0.1:{self.httpd.server_port}/"
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self.thread.start()
+
+    def close(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+class LogoStoreTest(unittest.TestCase):
+
+    def setUp(self):
+        self.logos = {
+            "1.png": _png("red"),
+            "2.png": _png("green"),
+            "3.png": _png("blue"),
+            "9.png": _png("black", size=(256, 256)),
+        }
+        self.server = _LogoServer(self.logos)
+        self.addCleanup(self.server.close)
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.cache_dir = tmp.name
+
+    def store(self, **kwargs):
+        kwargs.setdefault("offline", False)
+        return LogoStore(cache_dir=self.cache_dir, base_url=self.server.base_url, **kwargs)
+
+    def test_miss_then_hit(self):
+        store = self.store()
+        image = store.open(1)
+        self.assertEqual(image.getpixel((0, 0)), (255, 0, 0, 255))
+        store.open(1)
+        # -- A new store reads the index from disk, still no second request.
+        self.store().open(1)
+        self.assertEqual(self.server.requests, {"/1.png": 1})
+
+    def test_prefetch(self):
+        paths = self.store().prefetch([1, 2, 3, 1])
+        self.assertEqual(sorted(paths), [1, 2, 3])
+        self.assertTrue(all(os.path.exists(x) for x in paths.values()))
+        self.assertEqual(sorted(self.server.requests.values()), [1, 1, 1])
+
+    def test_offline(self):
+        self.store().prefetch([1])
+        store = self.store(offline=True)
+        self.assertEqual(store.open(1).getpixel((0, 0)), (255, 0, 0, 255))
+        with self.assertRaises(FileNotFoundError):
+            store.open(2)
+        self.assertNotIn("/2.png", self.server.requests)
+
+    def test_missing_logo(self):
+        with self.assertRaises(OSError):
+            self.store().open(404)
+
+    def test_lru_eviction(self):
+        size = len(self.logos["1.png"]) + len(self.logos["2.png"]) + len(self.logos["3.png"]) - 1
+        store = self.store(max_bytes=size)
+        store.open(1)
+        store.open(2)
+        # -- 1 is now the most recently used, 2 goes first.
+        store.open(1)
+        store.open(3)
+        self.assertLessEqual(store.size(), size)
+        cached = set(LogoStore(cache_dir=self.cache_dir, offline=True)._index)
+        self.assertEqual(cached, {self.server.base_url + "1.png", self.server.base_url + "3.png"})
+        store.open(1)
+        self.assertEqual(self.server.requests["/1.png"], 1)
+        store.open(2)
+        self.assertEqual(self.server.requests["/2.png"], 2)
+
+    def test_oversized_logo(self):
+        store = self.store(max_bytes=10)
+        path = store.fetch(self.server.base_url + "9.png")
+        self.assertTrue(os.path.exists(path))
+        self.assertEqual(Image.open(path).size, (256, 256))
+        # -- It goes as soon as another logo needs the room.
+        path_1 = store.fetch(self.server.base_url + "1.png")
+        self.assertTrue(os.path.exists(path_1))
+        self.assertFalse(os.path.exists(path))
+
+    def test_prefetch_over_the_bound(self):
+        paths = self.store(max_bytes=10).prefetch([1, 2, 3])
+        self.assertTrue(all(os.path.exists(x) for x in paths.values()))
+
+    def test_thumbnail(self):
+        store = self.store()
+        thumb = store.thumbnail(9, (64, 32), mode="LA")
+        self.assertEqual(thumb.size, (32, 32))
+        self.assertEqual(thumb.mode, "LA")
+        self.assertIs(store.thumbnail(9, (64, 32), mode="LA"), thumb)
+        self.assertEqual(self.store().thumbnail(9, (64, 32), mode="LA").size, (32, 32))
+        self.assertEqual(self.server.requests, {"/9.png": 1})
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,108 @@
+'''
+The long-format match helpers against the per-team code they replaced in
+10032022, on its match table.
+
+Usage:
+    python -m pytest tests
+'''
+
+import os
+import sys
+import unittest
+
+import numpy as np
+import pandas as pd
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from socviz.matches import add_outcomes, cumulative, long_format
+
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+MATCHES = os.path.join(REPO_ROOT, "10032022", "data", "10032022.csv")
+
+
+def compute_points(x, y):
+    if x > y:
+        return 3
+    if x == y:
+        return 1
+    else:
+        return 0
+
+
+def get_cumpoints_df(team, data):
+    df = data.copy()
+    df['date'] = pd.to_datetime(df['date'], format='%Y-%m-%d')
+    is_in_home = df[(df['team1'] == team)][['team1', 'points1', 'xpoints1', 'date']].reset_index(drop=True)
+    is_in_away = df[(df['team2'] == team)][['team2', 'points2', 'xpoints2', 'date']].reset_index(drop=True)
+    is_in_home.columns = ['team', 'points', 'xpoints', 'date']
+    is_in_away.columns = ['team', 'points', 'xpoints', 'date']
+    df = pd.concat([is_in_home, is_in_away]).sort_values(by='date', ascending=True).reset_index(drop=True)
+    df['cum_points'] = df['points'].cumsum()
+    df['cum_xpoints'] = df['xpoints'].cumsum()
+    return df
+
+
+class TestMatches(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.df = pd.read_csv(MATCHES, index_col=0).reset_index(drop=True)
+        # -- The per-match columns 10032022 computed row by row.
+        cls.original = cls.df.copy()
+        cls.original['xpoints1'] = cls.original['prob1']*3 + cls.original['probtie']
+        cls.original['xpoints2'] = cls.original['prob2']*3 + cls.original['probtie']
+        cls.original['points1'] = [compute_points(x, y) for x, y in zip(cls.df['score1'], cls.df['score2'])]
+        cls.original['points2'] = [compute_points(y, x) for x, y in zip(cls.df['score1'], cls.df['score2'])]
+
+    def _team_matches(self):
+        teams = long_format(
+            self.df,
+            columns={
+                'team': ('team1', 'team2'),
+                'goals': ('score1', 'score2'),
+                'prob_win': ('prob1', 'prob2'),
+            },
+            against={'goals_against': 'goals'},
+            shared=['date', 'league', 'probtie']
+        )
+        return add_outcomes(teams, prob_win='prob_win', prob_tie='probtie')
+
+    def test_long_format(self):
+        teams = self._team_matches()
+        self.assertEqual(len(teams), 2*len(self.df))
+        home, away = teams.iloc[0::2], teams.iloc[1::2]
+        self.assertEqual(home['team'].tolist(), self.df['team1'].tolist())
+        self.assertEqual(away['team'].tolist(), self.df['team2'].tolist())
+        self.assertEqual(home['venue'].unique().tolist(), ['H'])
+        np.testing.assert_array_equal(away['goals_against'], self.df['score1'])
+        np.testing.assert_array_equal(home['points'], self.original['points1'])
+        np.testing.assert_array_equal(away['points'], self.original['points2'])
+        np.testing.assert_allclose(home['xpoints'], self.original['xpoints1'])
+        np.testing.assert_allclose(away['xpoints'], self.original['xpoints2'])
+        self.assertTrue((teams['win'] + teams['tie'] + teams['loss'] == 1).all())
+
+    def test_cumulative_points(self):
+        teams = self._team_matches()
+        teams['date'] = pd.to_datetime(teams['date'], format='%Y-%m-%d')
+        teams = cumulative(
+            teams.sort_values(by='date', kind='stable').reset_index(drop=True),
+            'team', ['points', 'xpoints']
+        )
+        for team in self.df['team1'].unique():
+            expected = get_cumpoints_df(team, self.original)
+            result = teams[teams['team'] == team].reset_index(drop=True)
+            np.testing.assert_array_equal(result['date'], expected['date'])
+            np.testing.assert_array_equal(result['cum_points'], expected['cum_points'])
+            np.testing.assert_allclose(result['cum_xpoints'], expected['cum_xpoints'])
+
+    def test_cumulative_mean(self):
+        data = pd.DataFrame({'team': list('abab'), 'x': [1., 2., 3., 6.]})
+        result = cumulative(data, 'team', 'x', how='mean')
+        self.assertEqual(result['cum_x'].tolist(), [1., 2., 2., 4.])
+        with self.assertRaises(ValueError):
+            cumulative(data, 'team', 'x', how='max')
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,69 @@
+'''
+Pitch templates against the pinned mplsoccer: the pitches of the boards must
+be stamped as layers (not drawn the usual way) and look the same.
+
+Usage:
+    python -m pytest tests
+'''
+
+import os
+import sys
+import unittest
+
+import numpy as np
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+try:
+    from mplsoccer import Pitch, VerticalPitch
+except ImportError:
+    Pitch = VerticalPitch = None
+
+# -- The pitches drawn by 09052022, 10242022, 01172023 and 12262022.
+BOARD_PITCHES = [
+    ("VerticalPitch", dict(pitch_type="opta", goal_type="box", linewidth=1.25, line_color="black")),
+    ("Pitch", dict(pitch_type="uefa", goal_type="box", linewidth=1.1, line_color="black", pad_top=10, corner_arcs=True)),
+    ("Pitch", dict(pitch_type="opta", goal_type="box", linewidth=.65, line_color="black", half=False)),
+    ("VerticalPitch", dict(pitch_type="opta", goal_type="box", linewidth=1.1, line_color="black", pad_top=10, corner_arcs=True)),
+    ("VerticalPitch", dict(pitch_type="opta", half=True, goal_type="box", linewidth=1.1, line_color="black")),
+]
+
+
+def _render(draw):
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+    from matplotlib.figure import Figure
+    fig = Figure(figsize=(4, 3), dpi=150)
+    canvas = FigureCanvasAgg(fig)
+    draw(fig.add_subplot())
+    canvas.draw()
+    return np.asarray(canvas.buffer_rgba()).astype(int)
+
+
+@unittest.skipIf(Pitch is None, "mplsoccer is not installed")
+class PitchTemplateTest(unittest.TestCase):
+
+    def setUp(self):
+        from socviz.pitches import clear_templates
+        clear_templates()
+        self.addCleanup(clear_templates)
+
+    def test_board_pitches_are_stamped(self):
+        from socviz.pitches import pitch_template
+        classes = {"Pitch": Pitch, "VerticalPitch": VerticalPitch}
+        for name, params in BOARD_PITCHES:
+            with self.subTest(pitch=name, **params):
+                pitch_class = classes[name]
+                template = pitch_template(pitch_class, **params)
+                self.assertIsNotNone(template.layers)
+                expected = _render(lambda ax: pitch_class(**params).draw(ax=ax))
+                stamped = _render(template.draw)
+                self.assertEqual(np.abs(expected - stamped).max(), 0)
+
+    def test_visible_axis_falls_back(self):
+        from socviz.pitches import pitch_template
+        template = pitch_template(Pitch, pitch_type="opta", axis=True, label=True, tick=True)
+        self.assertIsNone(template.layers)
+
+
+if __name__ == "__main__":
+    unittest.main()
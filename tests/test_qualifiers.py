@@ -0,0 +1,107 @@
+'''
+Qualifier and event type flags against literal_eval of every row, on the
+02012023 FA Cup events.
+
+Usage:
+    python -m pytest tests
+'''
+
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+from ast import literal_eval
+
+import numpy as np
+import pandas as pd
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from socviz.qualifiers import parse_event_types, parse_qualifiers, read_event_csv
+
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+EVENTS = os.path.join(REPO_ROOT, "02012023", "data", "02012023_fa_cup_solar.csv")
+
+
+def _literal(strings):
+    return [literal_eval(x) if isinstance(x, str) else [] for x in strings]
+
+
+def _check_qualifiers(test, strings):
+    flags, values = parse_qualifiers(strings)
+    rows = _literal(strings)
+    expected = [{k for item in row for k in item} for row in rows]
+    test.assertEqual(set(flags.vocabulary), set().union(*expected))
+    frame = flags.to_frame()
+    for i, names in enumerate(expected):
+        test.assertEqual(set(frame.columns[frame.iloc[i].to_numpy()]), names, i)
+
+    for name in values.columns:
+        column = values[name]
+        for i, row in enumerate(rows):
+            found = [item[name] for item in row if name in item]
+            if not found:
+                test.assertTrue(pd.isna(column.iloc[i]), (name, i))
+            elif column.dtype == float:
+                test.assertEqual(column.iloc[i], float(found[0]), (name, i))
+            else:
+                test.assertEqual(column.iloc[i], found[0], (name, i))
+    # -- Every qualifier with a quoted value gets a column.
+    valued = {k for row in rows for item in row for k, v in item.items() if isinstance(v, str)}
+    test.assertEqual(set(values.columns), valued)
+    return flags, values
+
+
+class TestQualifiers(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.data = pd.read_csv(EVENTS, index_col=0, low_memory=False)
+
+    def test_qualifiers(self):
+        _check_qualifiers(self, self.data["qualifiers"])
+
+    def test_event_types(self):
+        flags = parse_event_types(self.data["satisfied_events_types"])
+        expected = [set(x) for x in _literal(self.data["satisfied_events_types"])]
+        frame = flags.to_frame()
+        for i, names in enumerate(expected):
+            self.assertEqual(set(frame.columns[frame.iloc[i].to_numpy()]), names, i)
+        won = flags.any("ballRecovery", "interceptionWon")
+        np.testing.assert_array_equal(won, [bool(x & {"ballRecovery", "interceptionWon"}) for x in expected])
+        both = flags.all("touches", "passAccurate")
+        np.testing.assert_array_equal(both, [{"touches", "passAccurate"} <= x for x in expected])
+        self.assertFalse(flags.all("touches", "notAnEventType").any())
+
+    def test_edge_cases(self):
+        strings = pd.Series([
+            "[{'Length': '17.4'}, {'Zone': 'Back'}, {'ThrowIn': True}]",
+            None,
+            "[]",
+            "[{'Length': '3'}, {'Length': '9'}, {'Zone': \"Opp's half\"}]",
+            "[{'Zone': 'Center'}, {'Flag': False}, {'Count': 2}]",
+        ])
+        flags, values = _check_qualifiers(self, strings)
+        self.assertEqual(values["Length"].dtype, float)
+        self.assertNotIn("ThrowIn", values)
+        np.testing.assert_array_equal(flags.any("ThrowIn"), [True, False, False, False, False])
+
+    def test_cache(self):
+        tmp = tempfile.mkdtemp()
+        try:
+            path = os.path.join(tmp, "events.csv")
+            shutil.copy2(EVENTS, path)
+            first = read_event_csv(path, index_col=0, low_memory=False)
+            second = read_event_csv(path, index_col=0, low_memory=False)
+        finally:
+            shutil.rmtree(tmp, ignore_errors=True)
+        np.testing.assert_array_equal(first.qualifiers.bits, second.qualifiers.bits)
+        np.testing.assert_array_equal(first.event_types.bits, second.event_types.bits)
+        self.assertEqual(first.qualifiers.vocabulary, second.qualifiers.vocabulary)
+        pd.testing.assert_frame_equal(first.values, second.values)
+        pd.testing.assert_index_equal(second.values.index, second.data.index)
+
+
+if __name__ == "__main__":
+    unittest.main()
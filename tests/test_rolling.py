@@ -0,0 +1,87 @@
+'''
+Rolling xG of every team against the per-team pivot, rolling and
+interpolate code it replaced in 09262022, on its EPL xG table.
+
+Usage:
+    python -m pytest tests
+'''
+
+import os
+import sys
+import unittest
+
+import numpy as np
+import pandas as pd
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from socviz.rolling import RollingXG, grouped_rolling_mean
+
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+XG = os.path.join(REPO_ROOT, "09262022", "data", "09262022_epl_xg.csv")
+
+
+def get_xG_rolling_data(team_id, window, data):
+    df = data.copy()
+    df_xg = df[(df['team_id'] == team_id) & (df['variable'].isin(['xG_for', 'xG_ag']))]
+    df_xg = (
+        df_xg.pivot(
+            index=['date', 'match_id', 'team_id', 'team_name'],
+            columns=['variable'],
+            values=['value']
+        ).reset_index()
+        .droplevel(level=0, axis=1)
+    )
+    df_xg.columns = ['date', 'match_id', 'team_id', 'team_name', 'xG_ag', 'xG_for']
+    df_xg['rolling_xG_for'] = df_xg['xG_for'].rolling(window=window, min_periods=0).mean()
+    df_xg['rolling_xG_ag'] = df_xg['xG_ag'].rolling(window=window, min_periods=0).mean()
+    df_xg['rolling_diff'] = df_xg['rolling_xG_for'] - df_xg['rolling_xG_ag']
+    return df_xg
+
+
+def get_xG_interpolated_df(team_id, window, data):
+    df_xG = get_xG_rolling_data(team_id, window, data)
+    df_xG['match_number'] = df_xG.index
+    series = {
+        'X': df_xG.match_number, 'Y_for': df_xG.rolling_xG_for,
+        'Y_ag': df_xG.rolling_xG_ag, 'Z': df_xG.rolling_diff
+    }
+    for name, aux in series.items():
+        aux = aux.copy()
+        aux.index = aux.index*10
+        aux = aux.reindex(range(aux.index[-1] + 1))
+        series[name] = aux.interpolate()
+    return pd.DataFrame(series)
+
+
+class TestRolling(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        df = pd.read_csv(XG, index_col=0)
+        cls.df = df.sort_values(by='date').reset_index(drop=True)
+        cls.rolling = RollingXG(cls.df, factor=10)
+
+    def test_matches_per_team_loops(self):
+        columns = ['match_id', 'xG_for', 'xG_ag', 'rolling_xG_for', 'rolling_xG_ag', 'rolling_diff']
+        for window in [1, 5, 10]:
+            for team_id in self.df['team_id'].unique():
+                expected = get_xG_rolling_data(team_id, window, self.df)
+                result = self.rolling.get(team_id, window)
+                pd.testing.assert_frame_equal(
+                    result[columns], expected[columns], check_dtype=False, check_index_type=False
+                )
+
+                expected = get_xG_interpolated_df(team_id, window, self.df).reset_index(drop=True)
+                result = self.rolling.interpolated(team_id, window)
+                pd.testing.assert_frame_equal(result, expected, check_dtype=False, check_index_type=False)
+
+    def test_missing_values(self):
+        values = np.array([[1.], [np.nan], [3.], [5.], [np.nan], [np.nan]])
+        starts = np.array([0, 0, 0, 3, 3, 3])
+        expected = pd.Series(values[:, 0]).groupby(starts).rolling(2, min_periods=0).mean()
+        np.testing.assert_allclose(grouped_rolling_mean(values, starts, 2)[:, 0], expected.to_numpy())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,126 @@
+'''
+Vectorised goal simulations against the one-shot-at-a-time loop of the
+10312022 notebook, and the exact distributions against each other and a
+simulation, on its shot data.
+
+Usage:
+    python -m pytest tests
+'''
+
+import os
+import sys
+import unittest
+
+import numpy as np
+import pandas as pd
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from socviz.simulation import (
+    goal_distribution, performance_tails, player_goal_distribution,
+    simulate_goals, simulate_player_goals
+)
+
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SHOTS = os.path.join(REPO_ROOT, "10312022", "data", "10312022_epl_shots.csv")
+# -- Ivan Toney, the notebook's example.
+PLAYER_ID = 408987
+
+
+def _original_counts(xg, simulations, seed):
+    # -- sim_goal_on_xG/sim_player_goals from the notebook, tallied per goal count.
+    np.random.seed(seed)
+    counts = np.zeros(len(xg) + 1, dtype=int)
+    for _ in range(simulations):
+        total_goals = 0
+        for x in xg:
+            total_goals += np.random.choice([0, 1], p=[1 - x, x])
+        counts[total_goals] += 1
+    return counts
+
+
+class TestSimulation(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.shots = pd.read_csv(SHOTS, index_col=0)
+        cls.xg = cls.shots.loc[cls.shots["player_id"] == PLAYER_ID, "xG"].to_numpy()
+
+    def test_matches_original_loop(self):
+        simulations = 2000
+        original = _original_counts(self.xg, simulations, 2022)/simulations
+        counts = simulate_goals(self.xg, simulations, rng=2022)
+        self.assertEqual(counts.sum(), simulations)
+        # -- Two samples of the same distribution: close, not equal.
+        self.assertLess(np.abs(counts/simulations - original).sum()/2, .06)
+        mean = (np.arange(counts.size)*counts).sum()/simulations
+        self.assertAlmostEqual(mean, self.xg.sum(), delta=.15)
+
+    def test_chunks_and_processes(self):
+        players = self.shots["player_id"].value_counts().index[:4]
+        serial = simulate_player_goals(self.shots, players, 3000, seed=7, processes=1)
+        pooled = simulate_player_goals(self.shots, players, 3000, seed=7, processes=2, chunk_size=1000)
+        pd.testing.assert_frame_equal(serial, pooled)
+        self.assertEqual(list(serial.columns), ["goals", "simulation_id", "prob", "player_id"])
+        for _, player in serial.groupby("player_id"):
+            self.assertEqual(player["simulation_id"].sum(), 3000)
+            self.assertAlmostEqual(player["prob"].sum(), 1.)
+            self.assertTrue((np.diff(player["goals"]) == 1).all())
+
+    def test_no_players(self):
+        df = simulate_player_goals(self.shots, [], seed=1)
+        self.assertTrue(df.empty)
+        self.assertEqual(list(df.columns), ["goals", "simulation_id", "prob", "player_id"])
+        df = player_goal_distribution(self.shots, [])
+        self.assertTrue(df.empty)
+        self.assertEqual(list(df.columns), ["goals", "prob", "player_id"])
+
+
+class TestGoalDistribution(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.shots = pd.read_csv(SHOTS, index_col=0)
+
+    def test_dp_and_fft(self):
+        rng = np.random.default_rng(0)
+        # -- Sizes around the powers of two the product tree pads to, and the
+        # -- whole season's shots.
+        samples = [rng.random(n)*.6 for n in [0, 1, 2, 3, 7, 8, 9, 200, 201, 513]]
+        samples.append(self.shots["xG"].dropna().to_numpy())
+        for xg in samples:
+            dp = goal_distribution(xg, method="dp")
+            fft = goal_distribution(xg, method="fft")
+            self.assertEqual(dp.size, xg.size + 1)
+            np.testing.assert_allclose(dp, fft, atol=1e-12)
+            self.assertAlmostEqual(dp.sum(), 1.)
+            self.assertAlmostEqual((np.arange(dp.size)*dp).sum(), xg.sum())
+
+    def test_against_simulation(self):
+        xg = self.shots.loc[self.shots["player_id"] == PLAYER_ID, "xG"].to_numpy()
+        simulations = 200_000
+        counts = simulate_goals(xg, simulations, rng=2022)
+        pmf = goal_distribution(xg)
+        # -- Well within the sampling error of 200k simulations.
+        np.testing.assert_allclose(counts/simulations, pmf, atol=.005)
+
+    def test_player_frame(self):
+        players = self.shots["player_id"].value_counts().index[:3]
+        df = player_goal_distribution(self.shots, players, tol=1e-4)
+        for player_id, player in df.groupby("player_id"):
+            xg = self.shots.loc[self.shots["player_id"] == player_id, "xG"]
+            pmf = goal_distribution(xg)
+            np.testing.assert_allclose(player["prob"], pmf[player["goals"]])
+            self.assertTrue((np.diff(player["goals"]) == 1).all())
+            self.assertGreater(player["prob"].sum(), 1 - 2e-4*len(pmf))
+
+    def test_performance_tails(self):
+        pmf = np.array([.1, .2, .3, .4])
+        self.assertEqual(performance_tails(pmf, 2), (.1 + .2, .3, .4))
+        np.testing.assert_allclose(performance_tails(pmf[1:], 2, start=1), (.2, .3, .4))
+        self.assertEqual(performance_tails(pmf, 9), (1., 0., 0.))
+        self.assertEqual(performance_tails(pmf[1:], 0, start=1), (0., 0., .9))
+
+
+if __name__ == "__main__":
+    unittest.main()
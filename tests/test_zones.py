@@ -0,0 +1,121 @@
+'''
+Zone classification against the if chains (08292022, 10172022) and pd.cut
+binning (12262022) it replaced, on the 08292022 shots and on points placed
+on every zone edge.
+
+Usage:
+    python -m pytest tests
+'''
+
+import os
+import sys
+import unittest
+
+import numpy as np
+import pandas as pd
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from socviz.zones import (
+    PENALTY_BOX, POSITIONAL_EDGES, SHOT_ZONES, ZoneGrid, positional_zones, thirds
+)
+
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SHOTS = os.path.join(REPO_ROOT, "08292022", "data", "belgian_shots_08292022.csv")
+
+
+# -- 08292022's zone_areas, as (x_lower, x_upper, y_lower, y_upper).
+ZONE_AREAS = {
+    'zone_1': (54.16, 68, 88.5, 105),
+    'zone_2': (0, 13.84, 88.5, 105),
+    'zone_3': (54.16, 68, 20, 88.5),
+    'zone_4': (0, 13.84, 20, 88.5),
+    'zone_5': (13.84, 24.84, 88.5, 105),
+    'zone_6': (43.16, 54.16, 88.5, 105),
+    'zone_7': (24.84, 43.16, 88.5, 99.5),
+    'zone_8': (24.84, 43.16, 99.5, 105),
+    'zone_9': (13.84, 24.84, 75, 88.5),
+    'zone_10': (43.16, 54.16, 75, 88.5),
+    'zone_11': (24.84, 43.16, 75, 88.5),
+    'zone_12': (13.84, 54.16, 20, 75),
+}
+
+
+def assign_shot_zone(x, y):
+    for zone, (x_min, x_max, y_min, y_max) in ZONE_AREAS.items():
+        if (x >= x_min) & (x <= x_max):
+            if (y >= y_min) & (y <= y_max):
+                return zone
+
+
+def is_inside_box(x, y):
+    if (x >= 13.84) & (x <= 54.16) & (y >= 88.5):
+        return True
+    else:
+        return False
+
+
+def _edge_points(edges_x, edges_y, rng):
+    # -- Every edge, halfway between edges, and random points, plus NaNs.
+    def axis(edges):
+        edges = np.asarray(edges, dtype=float)
+        edges = edges[np.isfinite(edges)]
+        mids = (edges[1:] + edges[:-1])/2
+        return np.concatenate([edges, mids, [edges.min() - 1, edges.max() + 1, np.nan]])
+    x, y = np.meshgrid(axis(edges_x), axis(edges_y))
+    lo_x, hi_x = np.nanmin(x), np.nanmax(x)
+    lo_y, hi_y = np.nanmin(y), np.nanmax(y)
+    x = np.concatenate([x.ravel(), rng.uniform(lo_x, hi_x, 5000)])
+    y = np.concatenate([y.ravel(), rng.uniform(lo_y, hi_y, 5000)])
+    return x, y
+
+
+class TestZones(unittest.TestCase):
+
+    def setUp(self):
+        self.rng = np.random.default_rng(0)
+
+    def test_shot_zones(self):
+        shots = pd.read_csv(SHOTS, index_col=0).rename(columns={"x": "y", "y": "x"})
+        x, y = _edge_points(SHOT_ZONES.edges_x, SHOT_ZONES.edges_y, self.rng)
+        x = np.concatenate([x, shots["x"]])
+        y = np.concatenate([y, shots["y"]])
+        expected = [assign_shot_zone(a, b) for a, b in zip(x, y)]
+        self.assertEqual(SHOT_ZONES.labels(x, y).tolist(), expected)
+
+    def test_penalty_box(self):
+        x, y = _edge_points([13.84, 54.16], [88.5, 105], self.rng)
+        expected = [is_inside_box(a, b) for a, b in zip(x, y)]
+        self.assertEqual(PENALTY_BOX.contains(x, y).tolist(), expected)
+
+    def test_grid_matches_pd_cut(self):
+        grids = [
+            (positional_zones(x), False, *POSITIONAL_EDGES[x]) for x in POSITIONAL_EDGES
+        ]
+        grids.append((thirds("uefa"), True, np.linspace(0, 105, 4), [0, 68]))
+        for grid, include_lowest, edges_x, edges_y in grids:
+            x, y = _edge_points(edges_x, edges_y, self.rng)
+            cut_x = pd.cut(x, edges_x, include_lowest=include_lowest, labels=False)
+            cut_y = pd.cut(y, edges_y, include_lowest=include_lowest, labels=False)
+            ix, iy = grid.bins(x, y)
+            np.testing.assert_array_equal(ix, np.nan_to_num(cut_x, nan=-1))
+            np.testing.assert_array_equal(iy, np.nan_to_num(cut_y, nan=-1))
+
+    def test_aggregate(self):
+        edges_x, edges_y = POSITIONAL_EDGES["opta"]
+        x, y = _edge_points(edges_x, edges_y, self.rng)
+        weights = self.rng.integers(0, 3, x.size)
+        data = pd.DataFrame({"x": x, "y": y, "w": weights})
+        data = data.assign(bins_x=pd.cut(data["x"], edges_x), bins_y=pd.cut(data["y"], edges_y))
+        expected = data.groupby(["bins_x", "bins_y"], observed=False)["w"].sum().reset_index(name="w")
+        expected["left_x"] = expected["bins_x"].apply(lambda x: x.left).astype(float)
+        expected["right_y"] = expected["bins_y"].apply(lambda x: x.right).astype(float)
+
+        result = ZoneGrid(edges_x, edges_y).aggregate(data["x"], data["y"], weights=data["w"], name="w")
+        np.testing.assert_array_equal(result["w"], expected["w"])
+        np.testing.assert_allclose(result["left_x"], expected["left_x"])
+        np.testing.assert_allclose(result["right_y"], expected["right_y"])
+
+
+if __name__ == "__main__":
+    unittest.main()